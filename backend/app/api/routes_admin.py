@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, Request
+import asyncio
+from typing import Any, Dict, Optional
 
-from ..models import RegistryResponse, ValidationResponse
+from fastapi import APIRouter, Depends, Request, Response, status
+
+from ..common.errors import GatewayException
+from ..models import ModelCacheRequest, RegistryResponse, ValidationResponse
 from ..runtime.agent_runtime import AgentRuntime
+from ..runtime.config_reload import ConfigReloader
+from ..services.model_cache import ModelCache
 
 router = APIRouter(prefix="/v1")
 
@@ -10,15 +16,69 @@ def get_runtime(request: Request) -> AgentRuntime:
     return request.app.state.runtime
 
 
+def get_model_cache(request: Request) -> ModelCache:
+    return request.app.state.model_cache
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored.
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
 @router.get("/registry", response_model=RegistryResponse)
-async def registry(request: Request, runtime: AgentRuntime = Depends(get_runtime)) -> RegistryResponse:
-    include_unconfigured = request.app.state.settings.dev_mode
+async def registry(request: Request, runtime: AgentRuntime = Depends(get_runtime)) -> Response:
     snapshot = runtime.registry_snapshot()
-    if not include_unconfigured:
-        snapshot = {k: [item for item in v if item.get("configured")] for k, v in snapshot.items()}
-    return RegistryResponse(**snapshot)
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(snapshot.body, media_type="application/json", headers=headers)
 
 
 @router.get("/admin/config/validate", response_model=ValidationResponse)
-async def validate(runtime: AgentRuntime = Depends(get_runtime)) -> ValidationResponse:
-    return await runtime.validate_connectors()
+async def validate(refresh: bool = False, runtime: AgentRuntime = Depends(get_runtime)) -> ValidationResponse:
+    """Cached results from the background validation; ``?refresh=true`` validates now and waits."""
+
+    if refresh:
+        return await runtime.validate_connectors()
+    return runtime.validation_view()
+
+
+@router.post("/admin/config/reload")
+async def reload_config(request: Request) -> Dict[str, Any]:
+    reloader: Optional[ConfigReloader] = request.app.state.config_reloader
+    if reloader is None:
+        raise GatewayException("CONFIG_FILE is not set; nothing to reload")
+    try:
+        return await reloader.reload()
+    except Exception as exc:  # noqa: BLE001
+        raise GatewayException(f"Config reload failed: {exc}", status.HTTP_422_UNPROCESSABLE_ENTITY) from exc
+
+
+@router.get("/admin/models")
+async def model_cache_stats(cache: ModelCache = Depends(get_model_cache)) -> Dict[str, Any]:
+    return cache.stats()
+
+
+@router.post("/admin/models/preload")
+async def preload_model(
+    payload: ModelCacheRequest, request: Request, cache: ModelCache = Depends(get_model_cache)
+) -> Dict[str, Any]:
+    compute_type = payload.compute_type or request.app.state.settings.stt_whisper_compute_type
+    try:
+        entry = await asyncio.to_thread(cache.preload, payload.model, compute_type)
+    except Exception as exc:  # noqa: BLE001
+        raise GatewayException(f"Failed to load model: {exc}", status.HTTP_503_SERVICE_UNAVAILABLE) from exc
+    return {"loaded": entry, "cache": cache.stats()}
+
+
+@router.post("/admin/models/unload")
+async def unload_model(payload: ModelCacheRequest, cache: ModelCache = Depends(get_model_cache)) -> Dict[str, Any]:
+    removed = cache.unload(payload.model, payload.compute_type)
+    return {
+        "unloaded": [{"model": name, "compute_type": compute_type} for name, compute_type in removed],
+        "cache": cache.stats(),
+    }
@@ -3,20 +3,17 @@ from __future__ import annotations
 import base64
 import json
 import logging
-import shutil
-import subprocess
-import tempfile
 import time
-from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict
 
 from fastapi import APIRouter, Depends, File, Form, Query, Request, UploadFile, status
 from fastapi.responses import JSONResponse
 
-from ..common.logging import bind_correlation_id, get_logger, log_event
+from ..common.logging import get_correlation_id, get_logger, log_event
+from ..common.tracing import current_span
 from ..runtime.agent_runtime import AgentRuntime
 from ..runtime.stats import StatsTracker
-from ..speech import SpeechProviderError, SpeechRouter
+from ..speech import AudioStream, SpeechProviderError, SpeechRouter
 
 router = APIRouter(prefix="/v1/audio")
 
@@ -33,6 +30,16 @@ def get_runtime(request: Request) -> AgentRuntime:
     return request.app.state.runtime
 
 
+def trusted_tenant(request: Request, speech_router: SpeechRouter) -> str | None:
+    """Tenant for STT_ADAPTIVE_TENANT_LIMITS, taken only from the header the authenticating proxy sets.
+
+    Callers could claim any tenant through the query string or body, so neither is consulted.
+    """
+
+    header = speech_router.settings.stt_adaptive_tenant_header
+    return (request.headers.get(header) or None) if header else None
+
+
 @router.post("/transcribe")
 async def transcribe(
     request: Request,
@@ -41,6 +48,7 @@ async def transcribe(
 ) -> dict:
     started = time.perf_counter()
     error: Exception | None = None
+    provider_used: str | None = None
     try:
         body = await request.json()
         provider_id = body.get("stt_provider", "auto")
@@ -54,8 +62,10 @@ async def transcribe(
             beam_size=1,
             vad=False,
             model=model,
-            correlation_id=request.headers.get(request.app.state.settings.correlation_id_header),
+            correlation_id=get_correlation_id(),
+            tenant=trusted_tenant(request, speech_router),
         )
+        provider_used = transcript.provider
         return {
             "ok": True,
             "text": transcript.text,
@@ -68,7 +78,9 @@ async def transcribe(
         error = exc
         raise
     finally:
-        stats.record((time.perf_counter() - started) * 1000, error)
+        stats.record(
+            (time.perf_counter() - started) * 1000, error, endpoint="/v1/audio/transcribe", provider=provider_used
+        )
 
 
 def _parse_transcribe_settings(settings_str: str | None) -> Dict[str, Any]:
@@ -95,82 +107,22 @@ def _parse_transcribe_settings(settings_str: str | None) -> Dict[str, Any]:
     return clean_settings
 
 
-def _guess_extension(content_type: str) -> str:
-    if content_type == "audio/webm":
-        return ".webm"
-    if content_type == "audio/ogg":
-        return ".ogg"
-    if content_type in {"audio/wav", "audio/wave", "audio/x-wav"}:
-        return ".wav"
-    return ".bin"
-
-
-def _convert_with_ffmpeg(audio_bytes: bytes, content_type: str) -> Tuple[bytes, float]:
-    if not shutil.which("ffmpeg"):
-        raise RuntimeError("FFmpeg is required to convert audio/webm or audio/ogg. Please install ffmpeg.")
-
-    convert_start = time.perf_counter()
-    with tempfile.TemporaryDirectory() as tmpdir:
-        input_path = Path(tmpdir) / f"input{_guess_extension(content_type)}"
-        output_path = Path(tmpdir) / "output.wav"
-        input_path.write_bytes(audio_bytes)
-
-        process = subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-i",
-                str(input_path),
-                "-ac",
-                "1",
-                "-ar",
-                "16000",
-                "-f",
-                "wav",
-                str(output_path),
-            ],
-            capture_output=True,
-            check=False,
-        )
-
-        if process.returncode != 0:
-            stderr = process.stderr.decode("utf-8", errors="ignore")
-            raise RuntimeError(f"FFmpeg conversion failed ({process.returncode}): {stderr.strip()[:500]}")
-
-        wav_bytes = output_path.read_bytes()
-
-    convert_ms = (time.perf_counter() - convert_start) * 1000
-    return wav_bytes, convert_ms
+_SUPPORTED_FORMATS = {
+    "audio/wav": "wav",
+    "audio/wave": "wav",
+    "audio/x-wav": "wav",
+    "audio/webm": "webm",
+    "audio/ogg": "ogg",
+}
 
 
-async def _ensure_wav(audio_bytes: bytes, content_type: str, logger) -> Tuple[bytes, float, str]:
+def _audio_format(content_type: str) -> str:
     safe_content_type = content_type or "application/octet-stream"
-    if safe_content_type in {"audio/wav", "audio/wave", "audio/x-wav"}:
-        log_event(
-            logger,
-            logging.INFO,
-            "stt.audio.using_wav",
-            "Using uploaded WAV audio without conversion",
-            bytes=len(audio_bytes),
-        )
-        return audio_bytes, 0.0, "wav"
-
-    if safe_content_type in {"audio/webm", "audio/ogg"}:
-        wav_bytes, convert_ms = _convert_with_ffmpeg(audio_bytes, safe_content_type)
-        log_event(
-            logger,
-            logging.INFO,
-            "stt.audio.converted",
-            "Converted audio to WAV for Whisper",
-            bytes_in=len(audio_bytes),
-            bytes_out=len(wav_bytes),
-            convert_ms=round(convert_ms, 2),
-        )
-        return wav_bytes, convert_ms, "wav"
-
-    raise ValueError(
-        f"Unsupported format {safe_content_type}. Supported: audio/wav, audio/webm, audio/ogg (conversion)."
-    )
+    # Browsers send e.g. "audio/webm;codecs=opus".
+    fmt = _SUPPORTED_FORMATS.get(safe_content_type.split(";", 1)[0].strip().lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported format {safe_content_type}. Supported: audio/wav, audio/webm, audio/ogg.")
+    return fmt
 
 
 @router.post("/transcribe-file")
@@ -186,28 +138,31 @@ async def transcribe_file(
     stats: StatsTracker = Depends(get_stats),
     speech_router: SpeechRouter = Depends(get_speech_router),
 ) -> Dict[str, Any]:
-    correlation_id = request.headers.get(request.app.state.settings.correlation_id_header)
-    logger = bind_correlation_id(get_logger(__name__), correlation_id)
+    logger = get_logger(__name__)
 
     overall_start = time.perf_counter()
     error: Exception | None = None
     response_data: Dict[str, Any] = {}
     status_code = status.HTTP_200_OK
+    provider_used: str | None = None
 
     try:
-        raw_bytes = await file.read()
-        if not raw_bytes:
+        # The upload stays in Starlette's spooled temp file; providers stream from it.
+        upload = AudioStream.from_upload(file)
+        if not upload.size:
             status_code = status.HTTP_400_BAD_REQUEST
             raise ValueError("Empty audio file uploaded")
+        fmt = _audio_format(upload.content_type)
 
         log_event(
             logger,
             logging.INFO,
             "stt.upload.received",
             "Received audio upload",
-            filename=file.filename,
+            upload_filename=file.filename,
             content_type=file.content_type or "unknown",
-            bytes=len(raw_bytes),
+            format=fmt,
+            bytes=upload.size,
         )
 
         parsed_settings = _parse_transcribe_settings(settings)
@@ -229,36 +184,21 @@ async def transcribe_file(
         if "vad" in request.query_params:
             selected_vad = vad
 
-        decode_start = time.perf_counter()
-        try:
-            wav_bytes, convert_ms, fmt = await _ensure_wav(raw_bytes, file.content_type or "", logger)
-        except RuntimeError as exc:  # explicit conversion errors
-            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-            raise exc
-        decoding_ms = (time.perf_counter() - decode_start) * 1000
-
         transcribe_start = time.perf_counter()
-        log_event(
-            logger,
-            logging.INFO,
-            "stt.transcribe.start",
-            "Starting transcription",
-            provider=provider_id,
-            model=selected_model,
-            locale=locale,
-            beam_size=selected_beam,
-            vad=selected_vad,
-        )
         transcript = await speech_router.transcribe(
-            wav_bytes,
+            upload,
             provider=provider_id,
             language=locale,
             beam_size=selected_beam,
             vad=selected_vad,
             model=selected_model,
-            correlation_id=request.headers.get(request.app.state.settings.correlation_id_header),
+            correlation_id=get_correlation_id(),
+            tenant=trusted_tenant(request, speech_router),
         )
         transcribe_ms = (time.perf_counter() - transcribe_start) * 1000
+        provider_used = transcript.provider
+        # Under load the router may have run cheaper settings than requested; report those.
+        used = transcript.options
 
         total_ms = (time.perf_counter() - overall_start) * 1000
         log_event(
@@ -280,22 +220,25 @@ async def transcribe_file(
             "timing_ms": {
                 "total": round(total_ms, 2),
                 "transcribe": round(transcript.timing_ms.get("transcribe", transcribe_ms), 2),
-                "convert": round(convert_ms, 2),
-                "decode": round(decoding_ms, 2),
-                "audio_seconds": round(len(wav_bytes) / (16000 * 2), 2),
+                "convert": round(transcript.timing_ms.get("convert", 0.0), 2),
+                "decode": round(transcript.timing_ms.get("decode", 0.0), 2),
+                "audio_seconds": round(transcript.timing_ms.get("audio_seconds", upload.size / (16000 * 2)), 2),
             },
             "settings_used": {
                 "provider": provider_id,
                 "language": locale,
-                "model": selected_model,
-                "beam_size": selected_beam,
+                "model": used.model if used else selected_model,
+                "beam_size": used.beam_size if used else selected_beam,
                 "vad_filter": selected_vad,
+                "compute_type": used.compute_type if used else None,
+                "adapted": transcript.adapted,
             },
             "provider_used": transcript.provider,
             "mode": transcript.mode,
             "filename": file.filename,
             "format": fmt,
-            "correlation_id": request.headers.get(request.app.state.settings.correlation_id_header),
+            "correlation_id": get_correlation_id(),
+            "trace_id": active.trace_id if (active := current_span()) else None,
         }
     except ValueError as exc:
         error = exc
@@ -308,17 +251,6 @@ async def transcribe_file(
             reason=str(exc),
         )
         response_data = {"ok": False, "error": str(exc)}
-    except RuntimeError as exc:
-        error = exc
-        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-        log_event(
-            logger,
-            logging.ERROR,
-            "stt.audio.convert_failed",
-            "Audio conversion failed",
-            reason=str(exc),
-        )
-        response_data = {"ok": False, "error": str(exc)}
     except SpeechProviderError as exc:
         error = exc
         status_code = status.HTTP_503_SERVICE_UNAVAILABLE if exc.credit_issue else status.HTTP_400_BAD_REQUEST
@@ -345,7 +277,7 @@ async def transcribe_file(
         response_data = {"ok": False, "error": str(exc)}
     finally:
         total_elapsed = (time.perf_counter() - overall_start) * 1000
-        stats.record(total_elapsed, error)
+        stats.record(total_elapsed, error, endpoint="/v1/audio/transcribe-file", provider=provider_used)
 
     return JSONResponse(status_code=status_code, content=response_data)
 
@@ -359,6 +291,8 @@ async def transcribe_config() -> Dict[str, Any]:
         "vad_filter": {"supported": True, "default": False},
         "notes": {
             "cpu_latency": "Medium model may run slowly on laptops; start with tiny/small for demos.",
+            "adaptive": "With STT_ADAPTIVE_ENABLED, busy servers may run a smaller model, beam or compute type; "
+            "settings_used reports what ran.",
         },
     }
 
@@ -1,9 +1,12 @@
+import time
 import uuid
 
 from fastapi import APIRouter, Depends, Request
 
+from ..common.logging import get_correlation_id
 from ..models import ChatRequest, ChatResponse, SessionResponse
 from ..runtime.agent_runtime import AgentRuntime
+from ..runtime.stats import UNKNOWN_PROVIDER
 
 router = APIRouter(prefix="/v1")
 
@@ -15,7 +18,7 @@ def get_runtime(request: Request) -> AgentRuntime:
 @router.post("/sessions", response_model=SessionResponse)
 async def create_session(runtime: AgentRuntime = Depends(get_runtime)) -> SessionResponse:
     session_id = str(uuid.uuid4())
-    runtime.memory.create_session(session_id)
+    await runtime.memory.create_session(session_id)
     return SessionResponse(session_id=session_id)
 
 
@@ -25,6 +28,20 @@ async def chat(
     request: Request,
     runtime: AgentRuntime = Depends(get_runtime),
 ) -> ChatResponse:
-    correlation_header = request.app.state.settings.correlation_id_header
-    correlation_id = request.headers.get(correlation_header)
-    return await runtime.handle_chat(payload, correlation_id)
+    correlation_id = get_correlation_id()
+    started = time.perf_counter()
+    error: Exception | None = None
+    try:
+        return await runtime.handle_chat(payload, correlation_id)
+    except Exception as exc:  # noqa: BLE001
+        error = exc
+        raise
+    finally:
+        # The provider comes from the client; only registered ones get their own latency tracker.
+        provider = payload.provider_selection.llm_provider
+        request.app.state.stats_tracker.record(
+            (time.perf_counter() - started) * 1000,
+            error,
+            endpoint="/v1/chat",
+            provider=provider if runtime.registry.find_provider("llm", provider) else UNKNOWN_PROVIDER,
+        )
@@ -1,18 +1,37 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import logging
+from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
 
-from ..common.logging import LogStreamBroadcaster
+from ..common.logging import LogFilter, LogStreamBroadcaster
 from ..settings import Settings
 
 router = APIRouter(prefix="/v1/debug")
 
 
+def _parse_level(level: Optional[str]) -> int:
+    if not level:
+        return logging.NOTSET
+    if level.isdigit():
+        return int(level)
+    value = logging.getLevelName(level.upper())
+    if not isinstance(value, int):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown log level {level}")
+    return value
+
+
 @router.get("/stream")
-async def debug_stream(request: Request) -> StreamingResponse:
+async def debug_stream(
+    request: Request,
+    level: Optional[str] = Query(None, description="Minimum level, e.g. WARNING"),
+    event: List[str] = Query([], description="Event names; repeat or comma-separate, 'stt.*' matches a prefix"),
+    correlation_id: Optional[str] = Query(None, description="Only lines for this correlation ID"),
+) -> StreamingResponse:
     settings: Settings = request.app.state.settings
     broadcaster: LogStreamBroadcaster = request.app.state.log_stream
 
@@ -24,15 +43,26 @@ async def debug_stream(request: Request) -> StreamingResponse:
                 detail="Debug stream disabled; set ENABLE_DEBUG_STREAM=true for local use.",
             )
 
+    log_filter = LogFilter(
+        level=_parse_level(level),
+        events=[name for value in event for name in value.split(",")],
+        correlation_id=correlation_id,
+    )
+
     async def event_generator():
-        queue = await broadcaster.subscribe()
+        subscription = await broadcaster.subscribe(log_filter)
         try:
             while True:
-                line = await queue.get()
-                yield f"data: {line}\n\n"
+                lines, dropped = await subscription.get_batch()
+                if dropped:
+                    # Tell the client it fell behind instead of buffering without bound.
+                    notice = json.dumps({"event": "log.stream.dropped", "level": "WARNING", "dropped": dropped})
+                    yield f"data: {notice}\n\n"
+                for line in lines:
+                    yield f"data: {line}\n\n"
         except asyncio.CancelledError:  # pragma: no cover - streaming cancellation
             raise
         finally:
-            broadcaster.unsubscribe(queue)
+            broadcaster.unsubscribe(subscription)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
@@ -2,8 +2,11 @@ import platform
 import sys
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Response, status
 
+from ..common.metrics import CONTENT_TYPE, REGISTRY
+from ..runtime.readiness import Readiness
+from ..runtime.shared_state import peer_snapshots
 from ..settings import Settings, get_settings
 
 router = APIRouter()
@@ -15,8 +18,11 @@ async def healthcheck(request: Request) -> dict:
     settings: Settings = getattr(request.app.state, "settings", get_settings())
     uptime_seconds = int((datetime.now(timezone.utc) - _started_at).total_seconds())
 
+    readiness: Readiness = getattr(request.app.state, "readiness", None) or Readiness()
+
     return {
         "status": "ok",
+        "ready": readiness.ready,
         "app": {
             "name": settings.app_name,
             "version": settings.app_version,
@@ -37,3 +43,29 @@ async def healthcheck(request: Request) -> dict:
         },
         "debug": {"stream_enabled": settings.enable_debug_stream},
     }
+
+
+@router.get("/livez")
+async def livez() -> dict:
+    """Liveness: the process serves requests. Warm-up state is deliberately ignored."""
+
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz(request: Request, response: Response) -> dict:
+    """Readiness: 503 until model preload, connector warm-up and required validation have passed."""
+
+    readiness: Readiness = request.app.state.readiness
+    snapshot = readiness.snapshot()
+    if not snapshot["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if snapshot["ready"] else "warming_up", **snapshot}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request) -> Response:
+    """This worker's metrics plus the counters and histograms other workers published to the shared state."""
+
+    peers = await peer_snapshots(getattr(request.app.state, "shared_state", None))
+    return Response(REGISTRY.render(peer["metrics"] for peer in peers if "metrics" in peer), media_type=CONTENT_TYPE)
@@ -4,7 +4,10 @@ from typing import Any, Dict
 from fastapi import APIRouter, Request
 
 from ..integrations.servicenow.config import ServiceNowConfig
-from ..runtime.stats import StatsTracker
+from ..runtime.agent_runtime import AgentRuntime
+from ..runtime.readiness import Readiness
+from ..runtime.shared_state import merged_stats, peer_snapshots
+from ..runtime.stats import DEFAULT_WINDOW, StatsTracker
 from ..settings import Settings
 from ..speech import SpeechRouter
 
@@ -26,14 +29,16 @@ def _runtime_meta(settings: Settings) -> Dict[str, Any]:
 @router.get("/v1/runtime")
 async def runtime(request: Request) -> Dict[str, Any]:
     settings: Settings = request.app.state.settings
-    stats: StatsTracker = request.app.state.stats_tracker
+    readiness: Readiness = request.app.state.readiness
+    peers = await peer_snapshots(request.app.state.shared_state)
+    stats: StatsTracker = merged_stats(request.app.state.stats_tracker, peers)
 
     snapshot = stats.snapshot()
-    p50, p95 = stats.percentiles()
+    current = snapshot.windows[DEFAULT_WINDOW]
 
     return {
-        "backend_ready": snapshot.backend_ready,
-        "stt_ready": snapshot.stt_ready,
+        "backend_ready": readiness.ready,
+        "stt_ready": readiness.is_ready("models"),
         "runtime": _runtime_meta(settings),
         "stats": {
             "since_started_at": snapshot.started_at.isoformat(),
@@ -41,9 +46,13 @@ async def runtime(request: Request) -> Dict[str, Any]:
             "total_failures": snapshot.total_failures,
             "last_request_at": snapshot.last_request_at.isoformat() if snapshot.last_request_at else None,
             "last_latency_ms": snapshot.last_latency_ms,
-            "rolling_window_size": snapshot.latencies.maxlen,
-            "p50_latency_ms": p50,
-            "p95_latency_ms": p95,
+            "window": DEFAULT_WINDOW,
+            "p50_latency_ms": current["p50_ms"],
+            "p95_latency_ms": current["p95_ms"],
+            "p99_latency_ms": current["p99_ms"],
+            "p999_latency_ms": current["p999_ms"],
+            "windows": snapshot.windows,
+            **stats.breakdown(),
             "last_error": snapshot.last_error,
         },
     }
@@ -51,12 +60,12 @@ async def runtime(request: Request) -> Dict[str, Any]:
 
 @router.get("/v1/runtime/status")
 async def runtime_status(request: Request) -> Dict[str, Any]:
-    settings: Settings = request.app.state.settings
     stats: StatsTracker = request.app.state.stats_tracker
     speech_router: SpeechRouter = request.app.state.speech_router
+    agent_runtime: AgentRuntime = request.app.state.runtime
 
     speech_status = speech_router.status()
-    sn_mode = ServiceNowConfig.from_settings(settings).mode_label
+    sn_mode = ServiceNowConfig.from_settings(agent_runtime.settings).mode_label
     stats_snapshot = stats.snapshot()
 
     return {
@@ -66,6 +75,9 @@ async def runtime_status(request: Request) -> Dict[str, Any]:
         "stt_provider_mode": speech_status.mode,
         "stt_provider_used": speech_status.stt_provider_active,
         "elevenlabs_ok": speech_status.elevenlabs_ok,
+        "stt_breakers": speech_status.breakers,
+        "stt_adaptive": speech_status.adaptive,
+        "llm_queues": agent_runtime.llm_scheduler.snapshot(),
         "last_error": speech_status.last_error or stats_snapshot.last_error,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
@@ -2,6 +2,7 @@ import uuid
 
 from fastapi import APIRouter, Depends, Request
 
+from ..common.logging import get_correlation_id
 from ..integrations.servicenow.config import ServiceNowConfig
 from ..integrations.servicenow.models import (
     AddWorkNoteRequest,
@@ -18,8 +19,10 @@ from ..settings import get_settings
 router = APIRouter(prefix="/v1/tools/servicenow", tags=["tools"])
 
 
-async def get_service() -> ServiceNowService:
-    settings = get_settings()
+async def get_service(request: Request) -> ServiceNowService:
+    # The runtime's settings follow CONFIG_FILE reloads, so rotated credentials apply to the next call.
+    runtime = getattr(request.app.state, "runtime", None)
+    settings = runtime.settings if runtime is not None else get_settings()
     config = ServiceNowConfig.from_settings(settings)
     service = ServiceNowService(config)
     try:
@@ -29,11 +32,12 @@ async def get_service() -> ServiceNowService:
 
 
 def _correlation_id(request: Request) -> str:
+    correlation_id = get_correlation_id()
+    if correlation_id:
+        return correlation_id
     settings = getattr(getattr(request.app, "state", None), "settings", None)
-    if settings:
-        cid_header = settings.correlation_id_header
-        return request.headers.get(cid_header) or str(uuid.uuid4())
-    return request.headers.get("X-Correlation-ID") or str(uuid.uuid4())
+    cid_header = settings.correlation_id_header if settings else "X-Correlation-ID"
+    return request.headers.get(cid_header) or str(uuid.uuid4())
 
 
 @router.post("/search", response_model=StandardToolResponse)
@@ -38,7 +38,7 @@ async def transcribe(
 
     parsed_settings = whisper_service.parse_settings(settings)
     try:
-        result = whisper_service.transcribe_audio(audio_bytes, parsed_settings)
+        result = await whisper_service.transcribe_audio_async(audio_bytes, parsed_settings)
     except Exception as exc:  # pragma: no cover - defensive guard for demo inputs
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker driven by error rate and slow-call rate.
+
+    ``closed`` lets everything through while outcomes are recorded. Once at
+    least ``min_calls`` outcomes in the window exceed either threshold the
+    breaker opens and rejects calls for ``open_seconds``. It then moves to
+    ``half_open`` and admits up to ``half_open_probes`` concurrent probes: a
+    successful probe closes the breaker, a failed one re-opens it.
+
+    The breaker is not thread-safe; it is meant to be used from the event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        error_rate_threshold: float = 0.5,
+        slow_call_ms: Optional[float] = None,
+        slow_rate_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        latency_samples: int = 200,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_ms = slow_call_ms
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._state = CLOSED
+        self._opened_at: Optional[float] = None
+        self._open_for = open_seconds
+        self._probes_in_flight = 0
+        # (timestamp, failed, slow)
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self._latencies: Deque[float] = deque(maxlen=latency_samples)
+        self.last_reason: Optional[str] = None
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._opened_at is not None:
+            if self._clock() - self._opened_at >= self._open_for:
+                self._state = HALF_OPEN
+                self._probes_in_flight = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return whether a call may proceed; every admitted call must be recorded or released."""
+
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    def _prune(self, now: float) -> None:
+        horizon = now - self.window_seconds
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+    def _open(self, reason: str, seconds: Optional[float] = None) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._open_for = seconds if seconds is not None else self.open_seconds
+        self._probes_in_flight = 0
+        self._outcomes.clear()
+        self.last_reason = reason
+        self.times_opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._opened_at = None
+        self._probes_in_flight = 0
+        self._outcomes.clear()
+
+    def _record(self, failed: bool, latency_ms: Optional[float], reason: Optional[str]) -> None:
+        now = self._clock()
+        slow = bool(self.slow_call_ms is not None and latency_ms is not None and latency_ms >= self.slow_call_ms)
+        if latency_ms is not None and not failed:
+            self._latencies.append(latency_ms)
+
+        state = self.state
+        if state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if failed or slow:
+                self._open(reason or ("slow probe" if slow else "probe failed"))
+            else:
+                self._close()
+            return
+        if state == OPEN:
+            return
+
+        self._outcomes.append((now, failed, slow))
+        self._prune(now)
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for _, is_failure, _ in self._outcomes if is_failure)
+        slow_calls = sum(1 for _, _, is_slow in self._outcomes if is_slow)
+        if failures / calls >= self.error_rate_threshold:
+            self._open(reason or f"error rate {failures}/{calls}")
+        elif slow_calls / calls >= self.slow_rate_threshold:
+            self._open(f"slow calls {slow_calls}/{calls} >= {self.slow_call_ms:.0f} ms")
+
+    def record_success(self, latency_ms: Optional[float] = None) -> None:
+        self._record(False, latency_ms, None)
+
+    def record_failure(self, latency_ms: Optional[float] = None, reason: Optional[str] = None) -> None:
+        self._record(True, latency_ms, reason)
+
+    def release(self) -> None:
+        """Give back an admitted call without a verdict (e.g. it was cancelled)."""
+
+        if self._state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def trip(self, reason: str, seconds: Optional[float] = None) -> None:
+        """Force the breaker open, optionally for a custom duration."""
+
+        self._open(reason, seconds)
+
+    def latency_quantile(self, quantile: float, min_samples: int = 1) -> Optional[float]:
+        """Quantile of recent successful call latencies, or None with fewer than ``min_samples``."""
+
+        if len(self._latencies) < max(1, min_samples):
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(quantile * len(ordered)))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        now = self._clock()
+        self._prune(now)
+        calls = len(self._outcomes)
+        failures = sum(1 for _, is_failure, _ in self._outcomes if is_failure)
+        retry_in = None
+        if state == OPEN and self._opened_at is not None:
+            retry_in = round(max(0.0, self._open_for - (now - self._opened_at)), 1)
+        return {
+            "name": self.name,
+            "state": state,
+            "window_calls": calls,
+            "window_failures": failures,
+            "times_opened": self.times_opened,
+            "last_reason": self.last_reason,
+            "retry_in_seconds": retry_in,
+            "p95_latency_ms": self.latency_quantile(0.95),
+        }
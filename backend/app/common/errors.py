@@ -1,3 +1,5 @@
+import math
+
 from fastapi import HTTPException, status
 
 
@@ -9,3 +11,21 @@ class GatewayException(HTTPException):
 class PolicyViolation(GatewayException):
     def __init__(self, detail: str = "Request rejected by policy"):
         super().__init__(detail, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class UpstreamThrottled(GatewayException):
+    """Every upstream that could serve the request is rate limited; tells the client when to retry."""
+
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(detail, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.retry_after = retry_after
+        self.headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+class QueueDeadlineExceeded(GatewayException):
+    """Shed by the gateway's own rate limiter because the queue would not drain in time."""
+
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(detail, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.retry_after = retry_after
+        self.headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
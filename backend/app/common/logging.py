@@ -1,20 +1,68 @@
 from __future__ import annotations
 
 import asyncio
-import datetime
+import atexit
 import json
 import logging
+import logging.handlers
+import random
 import threading
+import time
 from collections import deque
-from typing import Deque, Dict, Optional, Set
+from contextvars import ContextVar, Token
+from queue import Full, Queue
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .metrics import LOG_EVENTS_SUPPRESSED
+from .tracing import current_span
+
+try:  # Optional fast encoder; the stdlib encoder is the fallback.
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Attributes every LogRecord carries; anything else on a record is structured context.
+_STANDARD_ATTRS = frozenset(logging.LogRecord(None, None, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+def _dumps(payload: Dict[str, object]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=str).decode()
+        except TypeError:  # e.g. non-str dict keys or oversized ints inside extra fields
+            pass
+    return json.dumps(payload, default=str)
+
+
+# Set once per request by the correlation-ID middleware; copied into tasks and ``to_thread`` workers.
+_correlation_id: ContextVar[str] = ContextVar("correlation_id", default="-")
+
+
+def set_correlation_id(correlation_id: Optional[str]) -> Token:
+    return _correlation_id.set(correlation_id or "-")
+
+
+def reset_correlation_id(token: Token) -> None:
+    _correlation_id.reset(token)
+
+
+def get_correlation_id() -> Optional[str]:
+    """Correlation ID of the request being handled, or ``None`` outside a request."""
+
+    value = _correlation_id.get()
+    return None if value == "-" else value
 
 
 class CorrelationIdFilter(logging.Filter):
-    """Ensure every log record has a correlation_id to keep formatting safe."""
+    """Stamp records with the current request's correlation ID unless one was bound explicitly.
 
-    def filter(self, record: logging.LogRecord) -> bool:  # pragma: no cover - trivial
-        if not hasattr(record, "correlation_id"):
-            record.correlation_id = "-"
+    Runs on the logging thread (handler filters run before the record is
+    enqueued), so it sees the caller's context.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if "correlation_id" not in record.__dict__:
+            record.correlation_id = _correlation_id.get()
         return True
 
 
@@ -24,7 +72,12 @@ class JsonLogFormatter(logging.Formatter):
     default_event = "log"
 
     def format(self, record: logging.LogRecord) -> str:  # pragma: no cover - formatting logic
-        ts = datetime.datetime.utcnow().isoformat(timespec="milliseconds") + "Z"
+        # The stream and broadcast handlers share one formatter; encode each record once.
+        cached = record.__dict__.get("_json_line")
+        if cached is not None:
+            return cached
+        # Use the time the event happened, not the time the listener thread got to it.
+        ts = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
         message = record.getMessage()
         base: Dict[str, object] = {
             "ts": ts,
@@ -36,9 +89,8 @@ class JsonLogFormatter(logging.Formatter):
         }
 
         # Capture non-standard attributes to preserve structured context
-        standard_attrs = set(logging.LogRecord(None, None, "", 0, "", (), None).__dict__.keys())
         for key, value in record.__dict__.items():
-            if key in standard_attrs or key in base:
+            if key in _STANDARD_ATTRS or key in base:
                 continue
             base[key] = value
 
@@ -50,43 +102,134 @@ class JsonLogFormatter(logging.Formatter):
         if record.stack_info:
             base["stack_info"] = record.stack_info
 
-        return json.dumps(base, default=str)
+        line = _dumps(base)
+        record._json_line = line
+        return line
+
+
+class LogFilter:
+    """Server-side selection for one debug stream subscriber."""
+
+    __slots__ = ("level", "events", "prefixes", "correlation_id")
+
+    def __init__(
+        self, *, level: int = logging.NOTSET, events: Iterable[str] = (), correlation_id: Optional[str] = None
+    ) -> None:
+        self.level = level
+        names = [name.strip() for name in events if name.strip()]
+        # "stt.*" selects every event under "stt."; anything else must match exactly.
+        self.prefixes = tuple(name[:-1] for name in names if name.endswith("*"))
+        self.events = frozenset(name for name in names if not name.endswith("*"))
+        self.correlation_id = correlation_id
+
+    def matches(self, level: int, event: str, correlation_id: str) -> bool:
+        if level < self.level:
+            return False
+        if self.correlation_id is not None and correlation_id != self.correlation_id:
+            return False
+        if self.events or self.prefixes:
+            return event in self.events or event.startswith(self.prefixes)
+        return True
+
+
+class LogSubscription:
+    """Bounded ring buffer feeding one SSE client.
+
+    ``offer`` may run on any thread (the logging listener, request threads);
+    it appends under a lock and wakes the consumer's event loop with
+    ``call_soon_threadsafe``. When the client falls behind, the oldest lines
+    are overwritten and counted in ``dropped``.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, log_filter: LogFilter, maxlen: int) -> None:
+        self.loop = loop
+        self.filter = log_filter
+        self.buffer: Deque[str] = deque(maxlen=maxlen)
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+        self._wakeup_pending = False
+        self.closed = False
+
+    def offer(self, line: str) -> None:
+        with self._lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(line)
+            if self._wakeup_pending:
+                return
+            self._wakeup_pending = True
+        try:
+            self.loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:  # loop already closed; the subscriber is gone
+            self.closed = True
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    async def get_batch(self) -> tuple[list[str], int]:
+        """Wait for lines, then return them with the number dropped since the last batch."""
+
+        await self._ready.wait()
+        with self._lock:
+            self._ready.clear()
+            self._wakeup_pending = False
+            lines = list(self.buffer)
+            self.buffer.clear()
+            dropped = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+        return lines, dropped
 
 
 class LogStreamBroadcaster:
     """In-memory log buffer with broadcast support for SSE consumers."""
 
-    def __init__(self, maxlen: int = 200, replay: int = 50) -> None:
-        self.buffer: Deque[str] = deque(maxlen=maxlen)
+    def __init__(self, maxlen: int = 200, replay: int = 50, subscriber_maxlen: int = 1000) -> None:
+        # (line, levelno, event, correlation_id) so replay can honour subscriber filters.
+        self.buffer: Deque[tuple[str, int, str, str]] = deque(maxlen=maxlen)
         self.replay = replay
-        self.listeners: Set[asyncio.Queue[str]] = set()
+        self.subscriber_maxlen = subscriber_maxlen
+        self.listeners: Set[LogSubscription] = set()
+        self.dropped = 0
         self._lock = threading.Lock()
 
-    async def subscribe(self) -> asyncio.Queue[str]:
-        queue: asyncio.Queue[str] = asyncio.Queue()
+    async def subscribe(self, log_filter: Optional[LogFilter] = None) -> LogSubscription:
+        subscription = LogSubscription(
+            asyncio.get_running_loop(), log_filter or LogFilter(), self.subscriber_maxlen
+        )
         with self._lock:
             # Seed with recent history so new listeners see immediate output
-            for line in list(self.buffer)[-self.replay :]:
-                queue.put_nowait(line)
-            self.listeners.add(queue)
-        return queue
+            for line, level, event, correlation_id in list(self.buffer)[-self.replay :]:
+                if subscription.filter.matches(level, event, correlation_id):
+                    subscription.offer(line)
+            self.listeners.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription) -> None:
+        with self._lock:
+            self.listeners.discard(subscription)
+            self.dropped += subscription.dropped
 
-    def unsubscribe(self, queue: asyncio.Queue[str]) -> None:
+    def queue_depths(self) -> list[int]:
         with self._lock:
-            self.listeners.discard(queue)
+            return [len(subscription) for subscription in self.listeners]
 
-    def publish(self, line: str) -> None:
-        import asyncio
+    def dropped_total(self) -> int:
+        with self._lock:
+            return self.dropped + sum(subscription.dropped for subscription in self.listeners)
 
+    def publish(
+        self, line: str, *, level: int = logging.INFO, event: str = "log", correlation_id: str = "-"
+    ) -> None:
         with self._lock:
-            self.buffer.append(line)
+            self.buffer.append((line, level, event, correlation_id))
             listeners_snapshot = list(self.listeners)
-        for queue in listeners_snapshot:
-            try:
-                queue.put_nowait(line)
-            except asyncio.QueueFull:
-                # Drop if consumer is too slow; SSE clients will reconnect
-                continue
+        for subscription in listeners_snapshot:
+            if subscription.closed:
+                self.unsubscribe(subscription)
+            elif subscription.filter.matches(level, event, correlation_id):
+                subscription.offer(line)
 
 
 class BroadcastLogHandler(logging.Handler):
@@ -99,41 +242,282 @@ class BroadcastLogHandler(logging.Handler):
     def emit(self, record: logging.LogRecord) -> None:  # pragma: no cover - thin wrapper
         try:
             msg = self.format(record)
-            self.broadcaster.publish(msg)
+            self.broadcaster.publish(
+                msg,
+                level=record.levelno,
+                event=getattr(record, "event", JsonLogFormatter.default_event),
+                correlation_id=getattr(record, "correlation_id", "-"),
+            )
         except Exception:  # noqa: BLE001
             self.handleError(record)
 
 
-def configure_logging(level: int = logging.INFO) -> LogStreamBroadcaster:
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """Hand records to the listener thread without formatting them on the caller's thread.
+
+    ``QueueHandler.prepare`` renders the full record (and the traceback) before
+    enqueueing. Here only the ``%``-interpolated message is frozen, so later
+    mutation of the arguments cannot change it; JSON encoding and I/O happen
+    on the listener. The queue is bounded: when it is full, records below
+    ERROR are dropped and counted instead of blocking the request.
+    """
+
+    def __init__(self, log_queue: "Queue[logging.LogRecord]", block_timeout: float = 0.05) -> None:
+        super().__init__(log_queue)
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            if record.levelno >= logging.ERROR:
+                try:
+                    self.queue.put(record, timeout=self.block_timeout)
+                    return
+                except Full:
+                    pass
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Bounded queue between request threads and the listener that formats and writes records."""
+
+    def __init__(self, handlers: list[logging.Handler], *, max_queue: int = 10_000) -> None:
+        self.queue: "Queue[logging.LogRecord]" = Queue(maxsize=max_queue)
+        self.handler = _EnqueueHandler(self.queue)
+        self.handler.addFilter(CorrelationIdFilter())
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self._running = False
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def start(self) -> None:
+        if not self._running:
+            self.listener.start()
+            self._running = True
+
+    def stop(self) -> None:
+        """Drain queued records and stop the listener thread."""
+
+        if self._running:
+            self.listener.stop()
+            self._running = False
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def get_log_pipeline() -> Optional[LogPipeline]:
+    return _pipeline
+
+
+def configure_logging(level: int = logging.INFO, *, max_queue: int = 10_000) -> LogStreamBroadcaster:
+    global _pipeline
+
     broadcaster = LogStreamBroadcaster()
     handler = BroadcastLogHandler(broadcaster)
     json_formatter = JsonLogFormatter()
     handler.setFormatter(json_formatter)
 
-    root_logger = logging.getLogger()
-    root_logger.setLevel(level)
-    root_logger.handlers.clear()
-    root_logger.addHandler(handler)
-    root_logger.addFilter(CorrelationIdFilter())
-
     # Ensure standard output still receives logs
     stream_handler = logging.StreamHandler()
     stream_handler.setFormatter(json_formatter)
-    stream_handler.addFilter(CorrelationIdFilter())
-    root_logger.addHandler(stream_handler)
+
+    if _pipeline is not None:
+        _pipeline.stop()
+    _pipeline = LogPipeline([handler, stream_handler], max_queue=max_queue)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.handlers.clear()
+    root_logger.addHandler(_pipeline.handler)
+    _pipeline.start()
 
     return broadcaster
 
 
+@atexit.register
+def _stop_pipeline() -> None:  # pragma: no cover - interpreter shutdown
+    if _pipeline is not None:
+        _pipeline.stop()
+
+
+class StructuredLoggerAdapter(logging.LoggerAdapter):
+    """Adapter that merges its bound ``extra`` under the per-call ``extra``.
+
+    The stdlib adapter replaces the caller's ``extra`` with its own, which
+    silently dropped every ``log_event`` field. Adapters from ``get_logger``
+    bind nothing, so the common path passes ``kwargs`` through untouched.
+    """
+
+    def process(self, msg, kwargs):
+        if self.extra:
+            kwargs["extra"] = {**self.extra, **kwargs["extra"]} if kwargs.get("extra") else self.extra
+        return msg, kwargs
+
+
 def get_logger(name: str) -> logging.LoggerAdapter:
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
-    return logging.LoggerAdapter(logger, {"correlation_id": "-"})
+    return StructuredLoggerAdapter(logger, {})
 
 
 def bind_correlation_id(logger: logging.LoggerAdapter, correlation_id: Optional[str]) -> logging.LoggerAdapter:
-    logger.extra["correlation_id"] = correlation_id or "-"
-    return logger
+    """Return a logger that tags records with ``correlation_id``; never mutates ``logger``.
+
+    Inside a request the ID already comes from the context, so this returns
+    ``logger`` itself. A new adapter is only created when the ID differs,
+    e.g. for work running outside the request that started it.
+    """
+
+    if not correlation_id or correlation_id == _correlation_id.get():
+        return logger
+    return StructuredLoggerAdapter(logger.logger, {**(logger.extra or {}), "correlation_id": correlation_id})
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse ``"stt.upload.received=0.1,stt.hedge.*=0.5"`` into a pattern -> keep-ratio map."""
+
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        pattern, _, ratio = item.partition("=")
+        try:
+            value = float(ratio)
+        except ValueError:
+            raise ValueError(f"Invalid log sample rate {item.strip()!r}; expected event=ratio") from None
+        if not pattern.strip() or not 0.0 <= value <= 1.0:
+            raise ValueError(f"Invalid log sample rate {item.strip()!r}; expected event=ratio between 0 and 1")
+        rates[pattern.strip()] = value
+    return rates
+
+
+class EventSampler:
+    """Per-event sampling and token-bucket rate limiting for :func:`log_event`.
+
+    Records at ERROR and above, and records emitted inside a sampled trace,
+    always pass. Everything else is first sampled by its event's keep ratio
+    (exact names win over ``prefix.*`` patterns), then charged against a
+    per-event token bucket. Suppressed events are counted and periodically
+    summarised in one ``log.suppressed`` record.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_rates: Optional[Dict[str, float]] = None,
+        rate_per_second: float = 0.0,
+        burst: float = 50.0,
+        report_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        rates = sample_rates or {}
+        self._exact = {name: ratio for name, ratio in rates.items() if not name.endswith("*")}
+        # Longest prefix first so "stt.hedge.*" beats "stt.*".
+        self._prefixes: List[Tuple[str, float]] = sorted(
+            ((name[:-1], ratio) for name, ratio in rates.items() if name.endswith("*")), key=lambda item: -len(item[0])
+        )
+        self._ratio_cache: Dict[str, float] = {}
+        self.rate_per_second = rate_per_second
+        self.burst = max(burst, 1.0)
+        self.report_interval = report_interval
+        self._clock = clock
+        self._rng = rng
+        self._buckets: Dict[str, List[float]] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._last_report = clock()
+        self._lock = threading.Lock()
+
+    def ratio(self, event: str) -> float:
+        cached = self._ratio_cache.get(event)
+        if cached is None:
+            cached = self._exact.get(event)
+            if cached is None:
+                cached = next((ratio for prefix, ratio in self._prefixes if event.startswith(prefix)), 1.0)
+            self._ratio_cache[event] = cached
+        return cached
+
+    def allow(self, event: str, level: int) -> bool:
+        if level >= logging.ERROR:
+            return True
+        span = current_span()
+        if span is not None and span.sampled:
+            return True
+        ratio = self.ratio(event)
+        if ratio < 1.0 and self._rng() >= ratio:
+            self._suppress(event, "sampled")
+            return False
+        if self.rate_per_second > 0 and not self._take_token(event):
+            self._suppress(event, "rate_limited")
+            return False
+        return True
+
+    def _take_token(self, event: str) -> bool:
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(event)
+            if bucket is None:
+                bucket = self._buckets[event] = [self.burst, now]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_second)
+            bucket[1] = now
+            if tokens < 1.0:
+                bucket[0] = tokens
+                return False
+            bucket[0] = tokens - 1.0
+            return True
+
+    def _suppress(self, event: str, reason: str) -> None:
+        LOG_EVENTS_SUPPRESSED.inc(event, reason)
+        with self._lock:
+            self._suppressed[event] = self._suppressed.get(event, 0) + 1
+
+    def take_report(self) -> Optional[Tuple[Dict[str, int], float]]:
+        """Return ``(counts, seconds)`` suppressed since the last report once the interval has passed."""
+
+        now = self._clock()
+        if now - self._last_report < self.report_interval:
+            return None
+        with self._lock:
+            if now - self._last_report < self.report_interval:
+                return None
+            counts, self._suppressed = self._suppressed, {}
+            elapsed, self._last_report = now - self._last_report, now
+        return (counts, elapsed) if counts else None
+
+
+_sampler: Optional[EventSampler] = None
+
+
+def configure_log_sampling(settings) -> Optional[EventSampler]:
+    """Install the sampler described by ``settings``; no sampler means every event is logged."""
+
+    global _sampler
+
+    rates = parse_sample_rates(settings.log_sample_rates)
+    if not rates and settings.log_rate_limit_per_second <= 0:
+        _sampler = None
+    else:
+        _sampler = EventSampler(
+            sample_rates=rates,
+            rate_per_second=settings.log_rate_limit_per_second,
+            burst=settings.log_rate_limit_burst,
+            report_interval=settings.log_suppressed_report_seconds,
+        )
+    return _sampler
 
 
 def log_event(
@@ -147,4 +531,23 @@ def log_event(
 ) -> None:
     """Convenience helper to emit structured events consistently."""
 
+    sampler = _sampler
+    if sampler is not None:
+        if not logger.isEnabledFor(level):
+            return
+        if not sampler.allow(event, level):
+            return
+        report = sampler.take_report()
+        if report is not None:
+            counts, elapsed = report
+            logger.log(
+                logging.INFO,
+                "Suppressed %d log events",
+                sum(counts.values()),
+                extra={"event": "log.suppressed", "suppressed": counts, "window_seconds": round(elapsed, 1)},
+            )
+
+    if not _STANDARD_ATTRS.isdisjoint(fields):
+        # LogRecord refuses extras that shadow its own attributes (e.g. ``filename``).
+        fields = {f"{key}_" if key in _STANDARD_ATTRS else key: value for key, value in fields.items()}
     logger.log(level, message, extra={"event": event, **fields}, exc_info=exc_info)
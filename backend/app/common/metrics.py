@@ -0,0 +1,334 @@
+"""Minimal OpenMetrics registry tuned for cheap, lock-free recording.
+
+Every thread writes to its own shard (a couple of plain dicts reached through
+``threading.local``), so ``inc``/``observe`` never take a lock and never race
+with another writer. A scrape copies each shard (``dict(...)`` is atomic under
+the GIL) and merges them. Gauges are callbacks evaluated at scrape time, so
+state that already lives elsewhere (model cache, session store, queues) is
+read instead of mirrored.
+
+With several worker processes, each worker publishes ``export_state()`` to
+the shared state store and ``render(peers)`` adds the other workers' counters
+and histograms to its own. Gauges stay per worker.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[Labels, float]
+
+
+class _Shard:
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self) -> None:
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        # [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+class _Family:
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labelnames: Sequence[str]) -> None:
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+
+class Counter(_Family):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        counters = self.registry._shard().counters
+        key = (self.name, labels)
+        counters[key] = counters.get(key, 0.0) + amount
+
+
+class Histogram(_Family):
+    type = "histogram"
+
+    def __init__(self, registry, name, help_text, labelnames, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        histograms = self.registry._shard().histograms
+        key = (self.name, labels)
+        state = histograms.get(key)
+        if state is None:
+            state = histograms[key] = [0.0] * (len(self.buckets) + 2)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+
+class _Callback(_Family):
+    def __init__(self, registry, name, help_text, labelnames, kind: str, fn: Callable[[], Iterable[Sample]]) -> None:
+        super().__init__(registry, name, help_text, labelnames)
+        self.type = kind
+        self.fn = fn
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._families: Dict[str, _Family] = {}
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            # Only taken once per thread, never on the steady-state hot path.
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _register(self, family: _Family) -> _Family:
+        existing = self._families.get(family.name)
+        if existing is not None:
+            if type(existing) is not type(family):
+                raise ValueError(f"Metric {family.name} already registered with another type")
+            if isinstance(family, _Callback):
+                # Re-registration (e.g. a rebuilt app in tests) replaces the callback.
+                self._families[family.name] = family
+                return family
+            return existing
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help_text, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(self, name, help_text, labelnames, buckets))  # type: ignore[return-value]
+
+    def callback(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], Iterable[Sample]],
+        *,
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge",
+    ) -> None:
+        """Register a metric whose samples are produced by ``fn`` at scrape time."""
+
+        self._register(_Callback(self, name, help_text, labelnames, kind, fn))
+
+    def _collect(self) -> Tuple[Dict[Tuple[str, Labels], float], Dict[Tuple[str, Labels], List[float]]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        counters: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        for shard in shards:
+            for key, value in dict(shard.counters).items():
+                counters[key] = counters.get(key, 0.0) + value
+            for key, state in dict(shard.histograms).items():
+                snapshot = list(state)
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = snapshot
+                else:
+                    for index, value in enumerate(snapshot):
+                        merged[index] += value
+        return counters, histograms
+
+    def export_state(self) -> Dict[str, Any]:
+        """This process's counters and histograms as JSON-safe lists, for another worker's ``render``."""
+
+        counters, histograms = self._collect()
+        return {
+            "counters": [[name, list(labels), value] for (name, labels), value in counters.items()],
+            "histograms": [[name, list(labels), state] for (name, labels), state in histograms.items()],
+        }
+
+    def render(self, peers: Iterable[Dict[str, Any]] = ()) -> str:
+        counters, histograms = self._collect()
+        for peer in peers:
+            for name, labels, value in peer["counters"]:
+                key = (name, tuple(labels))
+                counters[key] = counters.get(key, 0.0) + value
+            for name, labels, state in peer["histograms"]:
+                key = (name, tuple(labels))
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = list(state)
+                elif len(merged) == len(state):
+                    for index, value in enumerate(state):
+                        merged[index] += value
+        lines: List[str] = []
+        for name, family in sorted(self._families.items()):
+            lines.append(f"# TYPE {name} {family.type}")
+            lines.append(f"# HELP {name} {family.help}")
+            if isinstance(family, Counter):
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}_total{_labels(family.labelnames, labels)} {_number(value)}")
+            elif isinstance(family, Histogram):
+                for (metric, labels), state in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0.0
+                    for bound, count in zip(family.buckets + (float("inf"),), state[:-1]):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        bucket_labels = _labels(family.labelnames, labels, f'le="{le}"')
+                        lines.append(f"{name}_bucket{bucket_labels} {_number(cumulative)}")
+                    lines.append(f"{name}_count{_labels(family.labelnames, labels)} {_number(cumulative)}")
+                    lines.append(f"{name}_sum{_labels(family.labelnames, labels)} {_number(state[-1])}")
+            elif isinstance(family, _Callback):
+                try:
+                    samples = list(family.fn())
+                except Exception:  # noqa: BLE001 - a broken gauge must not break the scrape
+                    samples = []
+                suffix = "_total" if family.type == "counter" else ""
+                for labels, value in samples:
+                    lines.append(f"{name}{suffix}{_labels(family.labelnames, labels)} {_number(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "gateway_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+PROVIDER_CALL_DURATION = REGISTRY.histogram(
+    "gateway_provider_call_duration_seconds",
+    "Latency of calls to LLM/STT/TTS/RAG/service desk providers",
+    ("kind", "provider", "model"),
+)
+PROVIDER_CALL_ERRORS = REGISTRY.counter(
+    "gateway_provider_call_errors",
+    "Failed provider calls by error type",
+    ("kind", "provider", "model", "error"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "gateway_llm_tokens",
+    "LLM token usage reported by providers",
+    ("provider", "model", "type"),
+)
+LOG_EVENTS_SUPPRESSED = REGISTRY.counter(
+    "gateway_log_events_suppressed",
+    "Structured log events dropped by sampling or rate limits",
+    ("event", "reason"),
+)
+CHAT_COALESCED = REGISTRY.counter(
+    "gateway_chat_coalesced",
+    "Chat work shared with an identical in-flight or recent request",
+    ("kind",),
+)
+LLM_QUEUE_WAIT = REGISTRY.histogram(
+    "gateway_llm_queue_wait_seconds",
+    "Time LLM calls spent waiting for client-side rate-limit budget",
+    ("provider",),
+)
+LLM_QUEUE_SHED = REGISTRY.counter(
+    "gateway_llm_queue_shed",
+    "LLM calls rejected because their queue wait would exceed the deadline",
+    ("provider", "reason"),
+)
+STT_ADAPTATIONS = REGISTRY.counter(
+    "gateway_stt_adaptations",
+    "Local transcriptions run with a cheaper setting than requested because of load",
+    ("setting",),
+)
+
+CONFIG_RELOADS = REGISTRY.counter(
+    "gateway_config_reloads",
+    "Provider configuration reloads by result",
+    ("result",),
+)
+
+
+# Label value for client-supplied models, indexes and voices the gateway does not know, so that
+# arbitrary request input cannot create new series.
+OTHER_LABEL = "other"
+
+
+@contextmanager
+def track_call(kind: str, provider: str, model: Optional[str] = None) -> Iterator[None]:
+    """Time one provider call and count it as an error if the body raises."""
+
+    started = time.perf_counter()
+    model_label = model or "-"
+    try:
+        yield
+    except BaseException as exc:
+        PROVIDER_CALL_ERRORS.inc(kind, provider, model_label, getattr(exc, "code", None) or type(exc).__name__)
+        raise
+    finally:
+        PROVIDER_CALL_DURATION.observe(time.perf_counter() - started, kind, provider, model_label)
+
+
+def record_token_usage(provider: str, model: str, usage: Dict[str, object]) -> None:
+    for usage_key, token_type in (
+        ("prompt_tokens", "prompt"),
+        ("completion_tokens", "completion"),
+        ("total_tokens", "total"),
+    ):
+        value = usage.get(usage_key)
+        if isinstance(value, (int, float)) and value:
+            LLM_TOKENS.inc(provider, model, token_type, amount=float(value))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency; labels use the route template, not the raw path."""
+
+    def __init__(self, app: ASGIApp, *, histogram: Histogram = HTTP_REQUEST_DURATION) -> None:
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+            self.histogram.observe(time.perf_counter() - started, scope["method"], template, str(status_code))
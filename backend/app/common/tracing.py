@@ -0,0 +1,395 @@
+"""Lightweight span tracing with W3C ``traceparent`` propagation and OTLP/JSON export.
+
+The current span lives in a ``ContextVar`` so it follows ``await`` chains,
+``asyncio.create_task`` and ``asyncio.to_thread`` without being passed around.
+Every request gets trace/span IDs (so ``traceparent`` is always propagated),
+but only sampled traces allocate child spans; in an unsampled trace
+:meth:`Tracer.span` returns a shared no-op object. Finished spans are handed
+to a bounded queue and exported in batches from a background thread. The
+sink is either an OTLP/JSON lines file or an OTLP/HTTP collector.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..settings import Settings, get_settings
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    """Stand-in for spans of unsampled traces; every operation is free."""
+
+    sampled = False
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+    def set_attributes(self, **attributes: Any) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = (
+        "tracer",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "sampled",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        *,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.attributes = attributes or {}
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._token = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"[:300]
+        _current_span.reset(self._token)
+        if self.sampled:
+            self.tracer.finish(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            payload["parentSpanId"] = self.parent_id
+        return payload
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    """Return ``(trace_id, parent_span_id, sampled)`` for a valid W3C header."""
+
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def inject_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Add ``traceparent`` for the active span to outgoing request headers."""
+
+    span = _current_span.get()
+    if span is not None:
+        headers["traceparent"] = span.traceparent
+    return headers
+
+
+class FileSink:
+    """Append each batch as one OTLP/JSON ``ExportTraceServiceRequest`` per line."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+
+    def __call__(self, payload: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+
+class CollectorSink:
+    """POST batches to an OTLP/HTTP collector (``/v1/traces``, JSON encoding)."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0) -> None:
+        import httpx
+
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self._client = httpx.Client(timeout=timeout)
+
+    def __call__(self, payload: Dict[str, Any]) -> None:
+        self._client.post(self.url, json=payload).raise_for_status()
+
+
+class Tracer:
+    def __init__(
+        self,
+        *,
+        service_name: str,
+        sample_ratio: float = 0.0,
+        sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_queue: int = 2048,
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+    ) -> None:
+        self.service_name = service_name
+        self.sample_ratio = sample_ratio if sink is not None else 0.0
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue)
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+        self.export_failures = 0
+
+    # -- span creation -------------------------------------------------
+    def start_request(
+        self, name: str, *, traceparent: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None
+    ) -> Span:
+        """Create the server span for an incoming request, continuing a remote trace if given."""
+
+        parent = parse_traceparent(traceparent)
+        if parent:
+            trace_id, parent_id, sampled = parent
+            # Honour an upstream sampling decision only when we export at all.
+            sampled = sampled and self.sink is not None
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = self.sample_ratio > 0 and random.random() < self.sample_ratio
+        return Span(
+            self, name, trace_id=trace_id, parent_id=parent_id, sampled=sampled, kind=SPAN_KIND_SERVER,
+            attributes=attributes,
+        )
+
+    def span(self, name: str, *, kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            return NOOP_SPAN
+        return Span(
+            self, name, trace_id=parent.trace_id, parent_id=parent.span_id, sampled=True, kind=kind,
+            attributes=attributes,
+        )
+
+    def record(self, name: str, duration_ms: float, *, start_ns: Optional[int] = None, **attributes: Any) -> None:
+        """Record an already measured stage as a child of the current span.
+
+        Used for time accumulated across an interleaved loop (e.g. resampling
+        inside the decode loop) that cannot be wrapped in its own ``with`` block.
+        The span starts with its parent unless ``start_ns`` is given.
+        """
+
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            return
+        span = Span(self, name, trace_id=parent.trace_id, parent_id=parent.span_id, sampled=True, attributes=attributes)
+        span.start_ns = parent.start_ns if start_ns is None else start_ns
+        span.end_ns = span.start_ns + int(duration_ms * 1_000_000)
+        self.finish(span)
+
+    # -- export --------------------------------------------------------
+    def finish(self, span: Span) -> None:
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._worker.start()
+
+    def _payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                    "scopeSpans": [
+                        {"scope": {"name": "enterprise-ai-gateway"}, "spans": [span.to_otlp() for span in spans]}
+                    ],
+                }
+            ]
+        }
+
+    def _export(self, spans: List[Span]) -> None:
+        if not spans or self.sink is None:
+            return
+        try:
+            self.sink(self._payload(spans))
+            self.exported += len(spans)
+        except Exception:  # noqa: BLE001 - exporting must never affect requests
+            self.export_failures += 1
+
+    def _run(self) -> None:
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+                timed_out = True
+            else:
+                timed_out = False
+            if item is not None:
+                batch.append(item)
+            stop = item is None and not timed_out
+            if stop or timed_out or len(batch) >= self.batch_size:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+            if stop:
+                return
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Flush queued spans and stop the exporter thread."""
+
+        worker = self._worker
+        if worker is None:
+            return
+        self._queue.put(None)
+        worker.join(timeout)
+        self._worker = None
+
+
+class TracingMiddleware:
+    """Open a server span per HTTP request and echo ``traceparent`` on the response.
+
+    Install it outside the correlation-ID middleware so the ID that middleware
+    generates is visible on the response headers passing through here.
+    """
+
+    def __init__(self, app: ASGIApp, *, tracer: "Tracer", correlation_header: str) -> None:
+        self.app = app
+        self.tracer = tracer
+        self.correlation_header = correlation_header.lower().encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        span = self.tracer.start_request(f"{scope['method']} {scope['path']}", traceparent=traceparent)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if span.sampled:
+                    span.set_attribute("http.status_code", message["status"])
+                    for name, value in headers:
+                        if name.lower() == self.correlation_header:
+                            span.set_attribute("gateway.correlation_id", value.decode("latin-1"))
+                headers.append((b"traceparent", span.traceparent.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        with span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if span.sampled:
+                    route = scope.get("route")
+                    template = getattr(route, "path_format", None) or scope["path"]
+                    span.name = f"{scope['method']} {template}"
+                    span.set_attributes(**{"http.method": scope["method"], "http.route": template})
+
+
+def build_tracer(settings: Settings) -> Tracer:
+    sink: Optional[Callable[[Dict[str, Any]], None]] = None
+    if settings.tracing_exporter == "file":
+        sink = FileSink(settings.tracing_file_path)
+    elif settings.tracing_exporter == "otlp":
+        sink = CollectorSink(settings.tracing_otlp_endpoint)
+    return Tracer(service_name=settings.app_name, sample_ratio=settings.tracing_sample_ratio, sink=sink)
+
+
+@lru_cache
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer configured from settings."""
+
+    return build_tracer(get_settings())
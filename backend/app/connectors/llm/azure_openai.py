@@ -1,8 +1,6 @@
 import time
 from typing import Any, Dict, List, Optional
 
-from openai import AsyncAzureOpenAI
-
 from ..base import LLMConnector
 
 
@@ -10,6 +8,9 @@ class AzureOpenAIConnector(LLMConnector):
     def __init__(
         self, endpoint: str, api_key: str, api_version: str, deployment_map: Optional[Dict[str, str]] | None = None
     ) -> None:
+        # Imported here: openai is slow to import and unused when only the mock LLM is enabled.
+        from openai import AsyncAzureOpenAI
+
         self.client = AsyncAzureOpenAI(azure_endpoint=endpoint, api_key=api_key, api_version=api_version)
         self.deployment_map = deployment_map or {}
 
@@ -0,0 +1,370 @@
+"""Load-balanced Azure OpenAI chat completions across several deployments of the same model.
+
+Each request goes to the eligible deployment with the lowest
+``(outstanding + 1) * latency EWMA`` score, so a slow or busy region sheds
+traffic to idle ones without a fixed weighting. A deployment is not
+eligible while it is cooling down after a 429 (for as long as
+``Retry-After`` / ``retry-after-ms`` asked) or while its tokens-per-minute
+budget cannot cover the request's estimated tokens. Throttled and
+transient failures are retried on the next-best deployment.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from ...common.errors import GatewayException, UpstreamThrottled
+from ...common.tracing import get_tracer, inject_headers
+
+DEFAULT_LATENCY_MS = 1000.0
+# Cooldown applied to a deployment after a 5xx or transport error.
+ERROR_COOLDOWN_SECONDS = 2.0
+THROTTLED = "throttled"
+
+
+@dataclass(frozen=True)
+class PoolEndpoint:
+    name: str
+    endpoint: str
+    api_key: str
+    deployment: str
+    model: str
+    tpm: int = 0  # tokens per minute; 0 means unlimited
+    api_version: str = "2024-02-15-preview"
+
+
+def parse_pool_config(raw: str, *, default_api_key: str = "", default_api_version: str = "") -> List[PoolEndpoint]:
+    """Parse ``AZURE_OPENAI_POOL`` (a JSON list of endpoint objects)."""
+
+    if not raw or not raw.strip():
+        return []
+    try:
+        items = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"AZURE_OPENAI_POOL is not valid JSON: {exc}") from exc
+    if not isinstance(items, list):
+        raise ValueError("AZURE_OPENAI_POOL must be a JSON list")
+    endpoints = []
+    for index, item in enumerate(items):
+        try:
+            endpoints.append(
+                PoolEndpoint(
+                    name=item.get("name") or f"{item['deployment']}-{index}",
+                    endpoint=item["endpoint"].rstrip("/"),
+                    api_key=item.get("api_key") or default_api_key,
+                    deployment=item["deployment"],
+                    model=item.get("model") or item["deployment"],
+                    tpm=int(item.get("tpm") or 0),
+                    api_version=item.get("api_version") or default_api_version or PoolEndpoint.api_version,
+                )
+            )
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise ValueError(f"AZURE_OPENAI_POOL entry {index} needs endpoint and deployment") from exc
+    return endpoints
+
+
+def parse_retry_after(headers: httpx.Headers, now: Callable[[], float] = time.time) -> Optional[float]:
+    """Seconds to wait from ``retry-after-ms`` or ``Retry-After`` (delta seconds or HTTP date)."""
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - now())
+        except (TypeError, ValueError):
+            return None
+
+
+@dataclass
+class _EndpointState:
+    config: PoolEndpoint
+    outstanding: int = 0
+    ewma_ms: Optional[float] = None
+    cooldown_until: float = 0.0
+    tokens: float = 0.0
+    tokens_at: float = 0.0
+    requests: int = 0
+    throttled: int = 0
+    failures: int = 0
+    last_error: Optional[str] = None
+    validation_error: Optional[str] = None
+
+    def refill(self, now: float) -> None:
+        tpm = self.config.tpm
+        if tpm:
+            self.tokens = min(float(tpm), self.tokens + (now - self.tokens_at) * tpm / 60.0)
+        self.tokens_at = now
+
+    def has_budget(self, estimate: int) -> bool:
+        # A request larger than the whole budget may still go out once the bucket is full.
+        return not self.config.tpm or self.tokens >= min(estimate, self.config.tpm)
+
+    def seconds_until_budget(self, estimate: int) -> float:
+        if not self.config.tpm:
+            return 0.0
+        needed = min(estimate, self.config.tpm) - self.tokens
+        return max(0.0, needed * 60.0 / self.config.tpm)
+
+    def score(self, unmeasured_ms: float) -> float:
+        return (self.outstanding + 1) * (self.ewma_ms if self.ewma_ms is not None else unmeasured_ms)
+
+
+class AzureOpenAIPoolConnector:
+    def __init__(
+        self,
+        endpoints: List[PoolEndpoint],
+        *,
+        timeout_seconds: float = 60.0,
+        max_attempts: int = 3,
+        ewma_alpha: float = 0.3,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("AzureOpenAIPoolConnector needs at least one endpoint")
+        self.endpoints = endpoints
+        self.max_attempts = max_attempts
+        self.ewma_alpha = ewma_alpha
+        self._clock = clock
+        self._timeout = timeout_seconds
+        self._transport = transport
+        self._client_instance: Optional[httpx.AsyncClient] = None
+        now = clock()
+        self.states: Dict[str, _EndpointState] = {
+            endpoint.name: _EndpointState(endpoint, tokens=float(endpoint.tpm), tokens_at=now) for endpoint in endpoints
+        }
+        self.tracer = get_tracer()
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._client_instance is None or self._client_instance.is_closed:
+            self._client_instance = httpx.AsyncClient(timeout=self._timeout, transport=self._transport)
+        return self._client_instance
+
+    async def aclose(self) -> None:
+        if self._client_instance is not None:
+            await self._client_instance.aclose()
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+        # ~4 characters per token is close enough for budgeting; actual usage is reconciled afterwards.
+        return sum(len(message.get("content") or "") for message in messages) // 4 + max_tokens
+
+    def _candidates(self, model: str) -> List[_EndpointState]:
+        states = [state for state in self.states.values() if state.config.model == model]
+        if not states:
+            states = [state for state in self.states.values() if state.config.deployment == model]
+        if not states:
+            raise GatewayException(f"No Azure OpenAI pool deployment serves model {model}")
+        return states
+
+    def _select(self, states: List[_EndpointState], estimate: int, tried: set[str]) -> Optional[_EndpointState]:
+        now = self._clock()
+        eligible = []
+        for state in states:
+            state.refill(now)
+            if state.config.name in tried or state.cooldown_until > now or not state.has_budget(estimate):
+                continue
+            eligible.append(state)
+        if not eligible:
+            return None
+        # Deployments that failed their last validation only take traffic when nothing else can.
+        eligible = [state for state in eligible if state.validation_error is None] or eligible
+        # Unmeasured deployments are scored optimistically so they get traffic (and an EWMA) at all.
+        measured = [state.ewma_ms for state in eligible if state.ewma_ms is not None]
+        unmeasured_ms = min(measured, default=DEFAULT_LATENCY_MS)
+        random.shuffle(eligible)  # break ties between equally loaded deployments
+        return min(eligible, key=lambda state: state.score(unmeasured_ms))
+
+    def _retry_after(self, states: List[_EndpointState], estimate: int) -> float:
+        now = self._clock()
+        waits = [max(state.cooldown_until - now, state.seconds_until_budget(estimate)) for state in states]
+        return max(0.0, min(waits))
+
+    def _observe_latency(self, state: _EndpointState, latency_ms: float) -> None:
+        if state.ewma_ms is None:
+            state.ewma_ms = latency_ms
+        else:
+            state.ewma_ms += self.ewma_alpha * (latency_ms - state.ewma_ms)
+
+    async def generate(
+        self, messages: List[Dict[str, str]], model: str, temperature: float = 0.2, max_tokens: int = 256
+    ) -> Dict[str, Any]:
+        states = self._candidates(model)
+        estimate = self.estimate_tokens(messages, max_tokens)
+        tried: set[str] = set()
+        errors: List[str] = []
+        only_throttled = True
+        for _ in range(min(self.max_attempts, len(states))):
+            state = self._select(states, estimate, tried)
+            if state is None:
+                break
+            tried.add(state.config.name)
+            result = await self._attempt(state, messages, temperature, max_tokens, estimate)
+            if isinstance(result, dict):
+                return result
+            errors.append(result)
+            only_throttled = only_throttled and result.endswith(THROTTLED)
+
+        if only_throttled:
+            raise UpstreamThrottled(
+                f"All Azure OpenAI deployments for {model} are throttled or over budget",
+                retry_after=self._retry_after(states, estimate),
+            )
+        raise GatewayException(f"Azure OpenAI pool request failed: {'; '.join(errors)}", status_code=502)
+
+    async def _attempt(
+        self,
+        state: _EndpointState,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        estimate: int,
+    ) -> Dict[str, Any] | str:
+        """Call one deployment; return the result, or a short error string when another deployment should try."""
+
+        config = state.config
+        url = f"{config.endpoint}/openai/deployments/{config.deployment}/chat/completions"
+        state.outstanding += 1
+        state.requests += 1
+        if config.tpm:
+            state.tokens -= estimate
+        started = time.perf_counter()
+        response: Optional[httpx.Response] = None
+        try:
+            with self.tracer.span("llm.pool.attempt", endpoint=config.name, deployment=config.deployment):
+                response = await self._client().post(
+                    url,
+                    params={"api-version": config.api_version},
+                    headers=inject_headers({"api-key": config.api_key}),
+                    json={"messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+                )
+        except httpx.TransportError as exc:
+            state.failures += 1
+            state.last_error = f"{type(exc).__name__}: {exc}"[:200]
+            state.cooldown_until = self._clock() + ERROR_COOLDOWN_SECONDS
+            self._observe_latency(state, (time.perf_counter() - started) * 1000)
+            return f"{config.name}: {state.last_error}"
+        finally:
+            state.outstanding -= 1
+            if response is None and config.tpm:
+                # Nothing came back (transport error, or the caller was cancelled by SingleFlight, the
+                # scheduler or a disconnect), so give the reserved budget back.
+                state.tokens += estimate
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        if response.status_code == 429:
+            state.throttled += 1
+            wait = parse_retry_after(response.headers)
+            state.cooldown_until = self._clock() + (wait if wait is not None else ERROR_COOLDOWN_SECONDS)
+            state.last_error = "429 throttled"
+            if config.tpm:
+                # The service says the budget is spent; stop counting on our own estimate.
+                state.tokens = min(state.tokens, 0.0)
+            return f"{config.name}: {THROTTLED}"
+        if response.status_code >= 500:
+            state.failures += 1
+            state.last_error = f"HTTP {response.status_code}"
+            state.cooldown_until = self._clock() + ERROR_COOLDOWN_SECONDS
+            self._observe_latency(state, latency_ms)
+            return f"{config.name}: HTTP {response.status_code}"
+        if response.status_code >= 400:
+            state.last_error = f"HTTP {response.status_code}"
+            raise GatewayException(
+                f"Azure OpenAI deployment {config.name} rejected the request: {response.text[:200]}",
+                status_code=502,
+            )
+
+        self._observe_latency(state, latency_ms)
+        try:
+            payload = response.json()
+        except ValueError:  # json.JSONDecodeError and UnicodeDecodeError
+            payload = None
+        if not isinstance(payload, dict):
+            state.failures += 1
+            state.last_error = "invalid JSON response"
+            state.cooldown_until = self._clock() + ERROR_COOLDOWN_SECONDS
+            return f"{config.name}: {state.last_error}"
+        usage = payload.get("usage") or {}
+        if config.tpm and usage.get("total_tokens"):
+            # Reconcile the estimate with what the service actually charged.
+            state.tokens += estimate - int(usage["total_tokens"])
+        choices = payload.get("choices") or [{}]
+        text = (choices[0].get("message") or {}).get("content") or ""
+        return {
+            "text": text,
+            "usage": usage,
+            "latency_ms": int(latency_ms),
+            "model": config.deployment,
+            "endpoint": config.name,
+        }
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = self._clock()
+        result = []
+        for state in self.states.values():
+            state.refill(now)
+            result.append(
+                {
+                    "name": state.config.name,
+                    "model": state.config.model,
+                    "deployment": state.config.deployment,
+                    "outstanding": state.outstanding,
+                    "ewma_ms": round(state.ewma_ms, 1) if state.ewma_ms is not None else None,
+                    "cooldown_seconds": round(max(0.0, state.cooldown_until - now), 1),
+                    "tokens_available": None if not state.config.tpm else math.floor(state.tokens),
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                    "failures": state.failures,
+                    "last_error": state.last_error,
+                    "validation_error": state.validation_error,
+                }
+            )
+        return result
+
+    async def _probe(self, endpoint: PoolEndpoint) -> Optional[str]:
+        """Check one deployment and record the outcome for routing; returns the problem, if any."""
+
+        problem = None
+        try:
+            response = await self._client().get(
+                f"{endpoint.endpoint}/openai/deployments/{endpoint.deployment}",
+                params={"api-version": endpoint.api_version},
+                headers={"api-key": endpoint.api_key},
+            )
+        except httpx.HTTPError as exc:
+            problem = f"{endpoint.name}: {type(exc).__name__}"
+        else:
+            if response.status_code in (401, 403):
+                problem = f"{endpoint.name}: credentials rejected"
+        self.states[endpoint.name].validation_error = problem
+        return problem
+
+    async def warm_up(self) -> Dict[str, Any]:
+        """Open a keep-alive connection to every deployment so first calls skip DNS and TLS setup."""
+
+        problems = [problem for problem in await asyncio.gather(*map(self._probe, self.endpoints)) if problem]
+        return {"endpoints": len(self.endpoints), "unreachable": problems}
+
+    async def validate(self) -> Dict[str, Any]:
+        problems = [problem for problem in await asyncio.gather(*map(self._probe, self.endpoints)) if problem]
+        if problems:
+            return {"status": "error", "reason": "; ".join(problems)}
+        return {"status": "ok", "reason": f"{len(self.endpoints)} Azure OpenAI deployments reachable"}
@@ -1,21 +1,59 @@
 import time
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from ..base import LLMConnector
+from ..mock_profile import MockBehavior
 
 
 class MockLLMConnector(LLMConnector):
+    def __init__(self, behavior: Optional[MockBehavior] = None) -> None:
+        self.behavior = behavior or MockBehavior(name="mock-llm")
+
+    def _target_tokens(self, max_tokens: int) -> Optional[int]:
+        profile = self.behavior.profile
+        target = profile.completion_tokens
+        if target is None and profile.payload_bytes is not None:
+            target = profile.payload_bytes // 4  # ~4 bytes per token
+        return None if target is None else min(target, max_tokens)
+
+    def _reply(self, messages: List[Dict[str, str]], model: str, max_tokens: int) -> str:
+        last_user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        timestamp = datetime.utcnow().isoformat()
+        reply = f"[MockLLM @ {timestamp}] You said: {last_user}. Responding via {model}"
+        target = self._target_tokens(max_tokens)
+        if target is None:
+            return reply
+        words = reply.split()
+        return " ".join((words * (target // max(len(words), 1) + 1))[: max(target, 1)])
+
+    async def stream(
+        self, messages: List[Dict[str, str]], model: str, temperature: float = 0.2, max_tokens: int = 256
+    ) -> AsyncIterator[str]:
+        """Yield the reply word by word at the profile's token rate, after its first-token latency."""
+
+        await self.behavior.delay()
+        for index, word in enumerate(self._reply(messages, model, max_tokens).split(" ")):
+            if index:
+                await self.behavior.pause_per_token()
+            yield word if not index else " " + word
+
     async def generate(
         self, messages: List[Dict[str, str]], model: str, temperature: float = 0.2, max_tokens: int = 256
     ) -> Dict[str, Any]:
         start = time.time()
         last_user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
-        timestamp = datetime.utcnow().isoformat()
-        reply = f"[MockLLM @ {timestamp}] You said: {last_user}. Responding via {model}"
+        chunks = [chunk async for chunk in self.stream(messages, model, temperature, max_tokens)]
+        reply = "".join(chunks)
+        prompt_tokens = len(last_user.split())
+        completion_tokens = len(chunks) if self._target_tokens(max_tokens) is not None else min(max_tokens, 32)
         return {
             "text": reply,
-            "usage": {"prompt_tokens": len(last_user.split()), "completion_tokens": min(max_tokens, 32)},
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
             "latency_ms": int((time.time() - start) * 1000),
             "model": model,
         }
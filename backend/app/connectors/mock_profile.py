@@ -0,0 +1,168 @@
+"""Latency, fault and payload-size behaviour for the mock connectors.
+
+A profile is a comma separated ``key=value`` string (one ``MOCK_*_PROFILE``
+setting per connector kind), e.g.::
+
+    latency=lognormal:800:0.6,error_rate=0.01,timeout_rate=0.002,tokens_per_second=40,completion_tokens=150
+
+- ``latency``: ``fixed:<ms>``, ``lognormal:<median_ms>:<sigma>``, or
+  ``replay:<path>[#span_name]``. Replay cycles through latencies recorded in a
+  file. The file can hold one number (ms) per line, a JSON list, JSON lines
+  with ``latency_ms``/``duration_ms``, or the OTLP/JSON span files written by
+  ``TRACING_EXPORTER=file`` (filtered to ``span_name`` when given).
+- ``error_rate`` / ``timeout_rate``: probability that a call fails with a 502,
+  or hangs for ``timeout_seconds`` (default 30) and then fails with a 504.
+- ``tokens_per_second``: LLM streaming rate after the first token (0 = instant).
+- ``completion_tokens``: LLM reply length in tokens.
+- ``payload_bytes``: size of the text each mock returns (snippets, transcript,
+  ticket body, synthesized audio). For the LLM it sets the reply length at
+  about 4 bytes per token when ``completion_tokens`` is not given.
+
+An empty profile keeps the mocks instant, which is what the tests rely on.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import math
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from fastapi import status
+
+from ..common.errors import GatewayException
+
+LatencySampler = Callable[[random.Random], float]
+
+
+class InjectedFault(GatewayException):
+    """A failure produced on purpose by a mock profile; ``code`` labels it in provider error metrics."""
+
+    def __init__(self, detail: str, status_code: int, code: str) -> None:
+        super().__init__(detail, status_code)
+        self.code = code
+
+
+def _replay_values(path: str, span_name: Optional[str]) -> List[float]:
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        return [float(value) for value in json.loads(text)]
+    values: List[float] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith("{"):
+            values.append(float(line))
+            continue
+        record = json.loads(line)
+        if "resourceSpans" in record:
+            for resource in record["resourceSpans"]:
+                for scope in resource.get("scopeSpans", []):
+                    for span in scope.get("spans", []):
+                        if span_name is None or span.get("name") == span_name:
+                            duration_ns = int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])
+                            values.append(duration_ns / 1e6)
+        elif "latency_ms" in record or "duration_ms" in record:
+            values.append(float(record.get("latency_ms", record.get("duration_ms"))))
+    if not values:
+        raise ValueError(f"No latencies found in {path}" + (f" for span {span_name}" if span_name else ""))
+    return values
+
+
+def parse_latency(spec: str) -> Optional[LatencySampler]:
+    """Turn a ``latency=`` value into a sampler returning milliseconds (``None`` = no delay)."""
+
+    kind, _, rest = spec.strip().partition(":")
+    if kind in ("", "none"):
+        return None
+    if kind == "fixed":
+        fixed_ms = float(rest)
+        return lambda rng: fixed_ms
+    if kind == "lognormal":
+        median_ms, _, sigma = rest.partition(":")
+        mu, spread = math.log(float(median_ms)), float(sigma or 0.5)
+        return lambda rng: rng.lognormvariate(mu, spread)
+    if kind == "replay":
+        path, _, span_name = rest.partition("#")
+        cycle: Iterator[float] = itertools.cycle(_replay_values(path, span_name or None))
+        return lambda rng: next(cycle)
+    raise ValueError(f"Unknown latency distribution {spec!r}; expected fixed, lognormal or replay")
+
+
+@dataclass(frozen=True)
+class MockProfile:
+    latency: str = ""
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 30.0
+    tokens_per_second: float = 0.0
+    completion_tokens: Optional[int] = None
+    payload_bytes: Optional[int] = None
+
+    @classmethod
+    def parse(cls, raw: str) -> "MockProfile":
+        fields = {}
+        for item in raw.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            key, sep, value = item.partition("=")
+            key = key.strip()
+            if not sep or key not in cls.__dataclass_fields__:
+                raise ValueError(f"Invalid mock profile entry {item!r}")
+            value = value.strip()
+            if key == "latency":
+                fields[key] = value
+            elif key in ("completion_tokens", "payload_bytes"):
+                fields[key] = int(value)
+            else:
+                fields[key] = float(value)
+        return cls(**fields)
+
+
+class MockBehavior:
+    """Applies one profile: ``delay`` before a mock answers, ``pause_per_token`` while it streams."""
+
+    def __init__(self, profile: Optional[MockProfile] = None, *, seed: Optional[int] = None, name: str = "mock"):
+        self.profile = profile or MockProfile()
+        self.name = name
+        self._rng = random.Random(seed)
+        self._latency = parse_latency(self.profile.latency)
+
+    @classmethod
+    def from_settings(cls, raw: str, seed: Optional[int], name: str) -> "MockBehavior":
+        return cls(MockProfile.parse(raw), seed=seed, name=name)
+
+    async def delay(self) -> None:
+        """Wait the sampled latency, or fail the way the profile asks."""
+
+        roll = self._rng.random()
+        if roll < self.profile.timeout_rate:
+            await asyncio.sleep(self.profile.timeout_seconds)
+            raise InjectedFault(
+                f"{self.name} timed out (injected)", status.HTTP_504_GATEWAY_TIMEOUT, "injected_timeout"
+            )
+        latency_ms = self._latency(self._rng) if self._latency is not None else 0.0
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+        if roll < self.profile.timeout_rate + self.profile.error_rate:
+            raise InjectedFault(f"{self.name} failed (injected)", status.HTTP_502_BAD_GATEWAY, "injected_error")
+
+    async def pause_per_token(self) -> None:
+        if self.profile.tokens_per_second > 0:
+            await asyncio.sleep(1 / self.profile.tokens_per_second)
+
+    def sized(self, text: str) -> str:
+        """Pad or trim ``text`` to ``payload_bytes`` when the profile sets it."""
+
+        size = self.profile.payload_bytes
+        if size is None:
+            return text
+        if len(text) >= size:
+            return text[:size]
+        return text + " " + "x" * max(0, size - len(text) - 1)
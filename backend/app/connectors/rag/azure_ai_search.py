@@ -1,20 +1,24 @@
-from typing import Any, Dict, List
-
-from azure.search.documents import SearchClient
-from azure.search.documents.models import QueryType
+from typing import TYPE_CHECKING, Any, Dict, List
 
 from ..base import RAGConnector
 
+if TYPE_CHECKING:
+    from azure.search.documents import SearchClient
+
 
 class AzureAISearchConnector(RAGConnector):
     def __init__(self, endpoint: str, key: str) -> None:
         self.endpoint = endpoint
         self.key = key
 
-    def _client(self, index_name: str) -> SearchClient:
+    def _client(self, index_name: str) -> "SearchClient":
+        from azure.search.documents import SearchClient
+
         return SearchClient(endpoint=self.endpoint, index_name=index_name, credential=self.key)
 
     async def search(self, query: str, top_k: int, index_name: str) -> List[Dict[str, Any]]:
+        from azure.search.documents.models import QueryType
+
         client = self._client(index_name)
         results = client.search(query, query_type=QueryType.SIMPLE, top=top_k)
         snippets = []
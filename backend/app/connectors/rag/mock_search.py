@@ -1,12 +1,17 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from ..base import RAGConnector
+from ..mock_profile import MockBehavior
 
 
 class MockSearchConnector(RAGConnector):
+    def __init__(self, behavior: Optional[MockBehavior] = None) -> None:
+        self.behavior = behavior or MockBehavior(name="mock-search")
+
     async def search(self, query: str, top_k: int, index_name: str) -> List[Dict[str, Any]]:
+        await self.behavior.delay()
         return [
-            {"text": f"Mock snippet {i+1} from {index_name} about {query}", "score": 1 - i * 0.1}
+            {"text": self.behavior.sized(f"Mock snippet {i+1} from {index_name} about {query}"), "score": 1 - i * 0.1}
             for i in range(top_k)
         ]
 
@@ -1,17 +1,30 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from ..base import ServiceDeskConnector
+from ..mock_profile import MockBehavior
 
 
 class MockServiceDeskConnector(ServiceDeskConnector):
+    def __init__(self, behavior: Optional[MockBehavior] = None) -> None:
+        self.behavior = behavior or MockBehavior(name="mock-servicedesk")
+
     async def create_ticket(self, title: str, body: str, severity: str, requester: str | None = None) -> Dict[str, Any]:
-        return {"id": "MOCK-1", "summary": title, "severity": severity, "requester": requester, "body": body}
+        await self.behavior.delay()
+        return {
+            "id": "MOCK-1",
+            "summary": title,
+            "severity": severity,
+            "requester": requester,
+            "body": self.behavior.sized(body),
+        }
 
     async def get_ticket(self, ticket_id: str) -> Dict[str, Any]:
-        return {"id": ticket_id, "status": "In Progress", "summary": "Mock ticket"}
+        await self.behavior.delay()
+        return {"id": ticket_id, "status": "In Progress", "summary": self.behavior.sized("Mock ticket")}
 
     async def search_kb(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
-        return [{"text": f"KB result for {query} #{i+1}"} for i in range(top_k)]
+        await self.behavior.delay()
+        return [{"text": self.behavior.sized(f"KB result for {query} #{i+1}")} for i in range(top_k)]
 
     async def validate(self) -> Dict[str, Any]:
         return {"status": "ok", "reason": "mock service desk available"}
@@ -1,19 +1,24 @@
 import io
 import time
-from typing import Any, Dict
-
-import azure.cognitiveservices.speech as speechsdk
+from typing import TYPE_CHECKING, Any, Dict
 
 from ..base import STTConnector, TTSConnector
 
+if TYPE_CHECKING:
+    import azure.cognitiveservices.speech as speechsdk
+
 
 class AzureSpeechConnector(STTConnector, TTSConnector):
     def __init__(self, key: str, region: str) -> None:
+        # The Speech SDK loads native libraries, so it is imported when the connector is built, not with the app.
+        import azure.cognitiveservices.speech as speechsdk
+
+        self.speechsdk = speechsdk
         self.key = key
         self.region = region
 
-    def _speech_config(self, locale: str | None = None) -> speechsdk.SpeechConfig:
-        config = speechsdk.SpeechConfig(subscription=self.key, region=self.region)
+    def _speech_config(self, locale: str | None = None) -> "speechsdk.SpeechConfig":
+        config = self.speechsdk.SpeechConfig(subscription=self.key, region=self.region)
         if locale:
             config.speech_recognition_language = locale
             config.speech_synthesis_language = locale
@@ -22,11 +27,11 @@ class AzureSpeechConnector(STTConnector, TTSConnector):
     async def transcribe(self, audio_payload: bytes, locale: str, model: str) -> Dict[str, Any]:
         start = time.time()
         config = self._speech_config(locale)
-        stream = speechsdk.audio.PushAudioInputStream()
+        stream = self.speechsdk.audio.PushAudioInputStream()
         stream.write(audio_payload)
         stream.close()
-        audio_config = speechsdk.audio.AudioConfig(stream=stream)
-        recognizer = speechsdk.SpeechRecognizer(speech_config=config, audio_config=audio_config)
+        audio_config = self.speechsdk.audio.AudioConfig(stream=stream)
+        recognizer = self.speechsdk.SpeechRecognizer(speech_config=config, audio_config=audio_config)
         result = recognizer.recognize_once_async().get()
         latency_ms = int((time.time() - start) * 1000)
         return {"text": result.text or "", "latency_ms": latency_ms, "model": model}
@@ -36,7 +41,7 @@ class AzureSpeechConnector(STTConnector, TTSConnector):
         config = self._speech_config(locale)
         if voice:
             config.speech_synthesis_voice_name = voice
-        synthesizer = speechsdk.SpeechSynthesizer(speech_config=config, audio_config=None)
+        synthesizer = self.speechsdk.SpeechSynthesizer(speech_config=config, audio_config=None)
         result = synthesizer.speak_text_async(text).get()
         latency_ms = int((time.time() - start) * 1000)
         audio_data = io.BytesIO(result.audio_data).getvalue() if result and result.audio_data else b""
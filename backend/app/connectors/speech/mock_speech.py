@@ -1,20 +1,28 @@
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from ..base import STTConnector, TTSConnector
+from ..mock_profile import MockBehavior
 
 
 class MockSpeechConnector(STTConnector, TTSConnector):
+    def __init__(self, behavior: Optional[MockBehavior] = None) -> None:
+        self.behavior = behavior or MockBehavior(name="mock-speech")
+
     async def transcribe(self, audio_payload: bytes, locale: str, model: str) -> Dict[str, Any]:
-        latency_ms = int(time.time() * 0) + 5
+        start = time.perf_counter()
+        await self.behavior.delay()
         return {
-            "text": f"[Mock STT {locale}] received {len(audio_payload)} bytes via {model}",
-            "latency_ms": latency_ms,
+            "text": self.behavior.sized(f"[Mock STT {locale}] received {len(audio_payload)} bytes via {model}"),
+            "latency_ms": max(5, int((time.perf_counter() - start) * 1000)),
         }
 
     async def synthesize(self, text: str, locale: str, voice: str) -> Dict[str, Any]:
-        latency_ms = int(time.time() * 0) + 5
-        return {"audio": b"mock-bytes", "latency_ms": latency_ms, "voice": voice}
+        start = time.perf_counter()
+        await self.behavior.delay()
+        size = self.behavior.profile.payload_bytes
+        audio = b"mock-bytes" if size is None else b"\0" * size
+        return {"audio": audio, "latency_ms": max(5, int((time.perf_counter() - start) * 1000)), "voice": voice}
 
     async def validate(self) -> Dict[str, Any]:
         return {"status": "ok", "reason": "mock speech connector always available"}
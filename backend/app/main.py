@@ -1,5 +1,9 @@
+import asyncio
+import logging
 import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -15,21 +19,161 @@ from .api import (
     routes_whisper,
 )
 from .api.routes_debug import router as routes_debug
-from .common.logging import configure_logging
+from .common.logging import (
+    configure_log_sampling,
+    configure_logging,
+    get_log_pipeline,
+    get_logger,
+    log_event,
+    reset_correlation_id,
+    set_correlation_id,
+)
+from .common.metrics import REGISTRY, MetricsMiddleware
+from .common.request_limits import BodySizeLimitMiddleware
+from .common.tracing import TracingMiddleware, get_tracer
 from .registry.service_registry import ServiceRegistry
 from .runtime.agent_runtime import AgentRuntime
+from .runtime.config_reload import ConfigReloader
 from .runtime.context_builder import ContextBuilder
 from .runtime.memory_store import MemoryStore
 from .runtime.policy import PolicyEngine
+from .runtime.readiness import CheckFailed, Readiness
 from .runtime.router import RuntimeRouter
+from .runtime.shared_state import SharedMemoryStore, SharedState
 from .runtime.stats import StatsTracker
+from .services import whisper_service
+from .services.model_cache import get_model_cache
 from .settings import get_settings
-from .speech import SpeechRouter
+from .speech import SpeechProviderError, SpeechRouter
 
 log_broadcaster = configure_logging()
 settings = get_settings()
+configure_log_sampling(settings)
+model_cache = get_model_cache()
+tracer = get_tracer()
+
+
+async def _warm_up(app: FastAPI) -> None:
+    """Readiness checks; run after the server is listening so /livez answers during warm-up."""
+
+    readiness: Readiness = app.state.readiness
+    runtime: AgentRuntime = app.state.runtime
+    logger = get_logger("app.startup")
+    preload = [name.strip() for name in settings.stt_preload_models.split(",") if name.strip()]
+
+    async def _models() -> str:
+        sidecar = app.state.speech_router.providers["local_whisper"].sidecar
+        if sidecar is not None:
+            # Models live in the sidecar, which preloads them before it listens; wait until it answers.
+            while True:
+                try:
+                    status = await sidecar.status()
+                except SpeechProviderError:
+                    await asyncio.sleep(1.0)
+                    continue
+                return f"sidecar pid {status['pid']}: {len(status['resident'])} models resident"
+        if not preload:
+            return "no models to preload"
+        report = await asyncio.to_thread(model_cache.warm_up, preload, settings.stt_whisper_compute_type)
+        log_event(logger, logging.INFO, "stt.model.warm_up", "Whisper models warmed up", models=report)
+        failed = [f"{item['model']}: {item['error']}" for item in report if item["status"] != "ok"]
+        if failed:
+            raise CheckFailed("; ".join(failed))
+        return f"{len(report)} models resident"
+
+    async def _connectors() -> str:
+        if not runtime.settings.connector_warm_up:
+            return "built on first use"
+        built = await runtime.warm_up()
+        log_event(logger, logging.INFO, "connectors.warm_up", "Connectors built", **built)
+        unreachable = [problem for pool in built["pools"].values() for problem in pool["unreachable"]]
+        if unreachable:
+            raise CheckFailed(f"pool endpoints unreachable: {'; '.join(unreachable)}")
+        return f"{built['connectors']} connectors built"
+
+    async def _validation() -> str:
+        result = await runtime.validate_connectors()
+        failing = [
+            f"{item.service_type}/{item.provider}: {item.reason or item.status}"
+            for item in result.results
+            if item.status != "ok"
+        ]
+        if failing:
+            raise CheckFailed("; ".join(failing))
+        return f"{len(result.results)} connectors validated"
+
+    # Validation runs after warm-up so it reuses the connectors and pool connections built there.
+    await asyncio.gather(
+        readiness.run("models", _models),
+        readiness.run("connectors", _connectors, timeout=settings.readiness_check_timeout_seconds),
+    )
+    await readiness.run("connector_validation", _validation, timeout=settings.readiness_check_timeout_seconds)
+    log_event(
+        logger,
+        logging.INFO if readiness.ready else logging.WARNING,
+        "app.readiness",
+        "Ready for traffic" if readiness.ready else "Warm-up finished with failing checks",
+        **readiness.snapshot(),
+    )
+
+
+def _worker_snapshot(app: FastAPI) -> dict:
+    return {"metrics": REGISTRY.export_state(), "stats": app.state.stats_tracker.to_state()}
+
 
-app = FastAPI(title=settings.app_name)
+async def _publish_worker_state(app: FastAPI) -> None:
+    """Copy this worker's metrics and stats to the shared state so the other workers can report them."""
+
+    shared: SharedState = app.state.shared_state
+    logger = get_logger("app.shared_state")
+    while True:
+        await asyncio.sleep(settings.shared_state_publish_interval_seconds)
+        try:
+            # The snapshot is taken on the loop, where the stats are written; only the SQLite write moves off it.
+            await asyncio.to_thread(shared.publish, _worker_snapshot(app))
+            # Keeps the gateway_sessions gauge current without a SQLite query per scrape.
+            await app.state.runtime.memory.session_count()
+        except Exception as exc:  # noqa: BLE001 - keep publishing; a busy database is usually transient
+            log_event(
+                logger, logging.WARNING, "shared_state.publish.failed", "Publishing worker state failed", error=str(exc)
+            )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    readiness: Readiness = app.state.readiness
+    readiness.add("models")
+    readiness.add("connectors")
+    readiness.add("connector_validation", required=settings.readiness_require_connectors)
+    reloader = app.state.config_reloader
+    watcher = None
+    if reloader is not None:
+        try:
+            await reloader.reload()
+        except Exception:  # noqa: BLE001 - logged by the reloader; start on the environment settings
+            pass
+        watcher = asyncio.create_task(reloader.run())
+    warm_up = asyncio.create_task(_warm_up(app))
+    runtime: AgentRuntime = app.state.runtime
+    health = asyncio.create_task(
+        runtime.connector_health.run(lambda: runtime.generation, settings.connector_validation_interval_seconds)
+    )
+    shared: Optional[SharedState] = app.state.shared_state
+    publisher = asyncio.create_task(_publish_worker_state(app)) if shared is not None else None
+    yield
+    for task in (watcher, warm_up, health, publisher):
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    if shared is not None:
+        await asyncio.to_thread(shared.retire)
+    await app.state.speech_router.aclose()
+    await whisper_service.aclose()
+    await app.state.runtime.aclose()
+    await asyncio.to_thread(tracer.shutdown)
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     # CORS enabled for local demo UI (GitHub Pages -> localhost)
@@ -39,12 +183,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=int(settings.stt_max_upload_mb * 1024 * 1024),
+    path_prefixes=("/v1/audio/", "/api/whisper/"),
+)
+
 registry = ServiceRegistry(settings=settings)
+shared_state = (
+    SharedState(
+        settings.shared_state_path,
+        # A few missed publishes before a worker counts as gone.
+        stale_after_seconds=3 * settings.shared_state_publish_interval_seconds,
+    )
+    if settings.shared_state_path
+    else None
+)
 
 runtime = AgentRuntime(
     settings=settings,
     registry=registry,
-    memory=MemoryStore(),
+    memory=SharedMemoryStore(shared_state) if shared_state is not None else MemoryStore(),
     context_builder=ContextBuilder(),
     policy_engine=PolicyEngine(),
     runtime_router=RuntimeRouter(),
@@ -52,10 +211,136 @@ runtime = AgentRuntime(
 
 app.state.runtime = runtime
 app.state.settings = settings
+app.state.readiness = Readiness()
+app.state.config_reloader = (
+    ConfigReloader(runtime, settings.config_file, settings.config_watch_interval_seconds)
+    if settings.config_file
+    else None
+)
+app.state.shared_state = shared_state
 app.state.stats_tracker = StatsTracker()
 app.state.log_stream = log_broadcaster
+app.state.model_cache = model_cache
 app.state.speech_router = SpeechRouter(settings)
 
+
+def _register_gauges(app: FastAPI) -> None:
+    """Scrape-time gauges that read state owned by other components."""
+
+    def _model_cache():
+        stats = app.state.model_cache.stats()
+        return [
+            (("resident_bytes",), stats["resident_mb"] * 1024 * 1024),
+            (("budget_bytes",), stats["budget_mb"] * 1024 * 1024),
+            (("resident_models",), len(stats["resident"])),
+        ]
+
+    def _model_cache_events():
+        stats = app.state.model_cache.stats()
+        return [((event,), stats[event]) for event in ("loads", "load_failures", "hits", "misses", "evictions")]
+
+    def _log_stream():
+        broadcaster = app.state.log_stream
+        depths = broadcaster.queue_depths()
+        return [
+            (("subscribers",), len(depths)),
+            (("max_depth",), max(depths, default=0)),
+            (("total",), sum(depths)),
+            (("dropped",), broadcaster.dropped_total()),
+        ]
+
+    def _breakers():
+        return [
+            ((snapshot["name"], snapshot["state"]), 1)
+            for snapshot in app.state.speech_router.status().breakers
+        ]
+
+    def _log_pipeline():
+        pipeline = get_log_pipeline()
+        if pipeline is None:
+            return []
+        return [(("queue_depth",), pipeline.depth()), (("dropped",), pipeline.dropped)]
+
+    def _llm_pool():
+        pool = app.state.runtime.llm_connectors.peek("azure-openai-pool")
+        if pool is None:
+            return []
+        samples = []
+        for endpoint in pool.snapshot():
+            for stat in ("outstanding", "ewma_ms", "cooldown_seconds", "tokens_available"):
+                if endpoint[stat] is not None:
+                    samples.append(((endpoint["name"], stat), endpoint[stat]))
+        return samples
+
+    def _llm_queue():
+        samples = []
+        for lane in app.state.runtime.llm_scheduler.snapshot():
+            for stat in ("depth", "queued_tokens", "tokens_available", "wait_p50_ms", "wait_p95_ms", "wait_p99_ms"):
+                if lane[stat] is not None:
+                    samples.append(((lane["provider"], stat), lane[stat]))
+        return samples
+
+    def _provider_health():
+        health = app.state.runtime.connector_health
+        return [((service_type, provider), entry.score) for (service_type, provider), entry in health.entries.items()]
+
+    def _stt_adaptive():
+        adaptive = app.state.speech_router.adaptive
+        if adaptive is None:
+            return []
+        snapshot = adaptive.snapshot()
+        return [((stat,), snapshot[stat]) for stat in ("in_flight", "rtf", "level") if snapshot[stat] is not None]
+
+    def _sessions():
+        return [((), app.state.runtime.memory.cached_session_count())]
+
+    REGISTRY.callback("gateway_sessions", "Chat sessions held in the memory store (shared by all workers)", _sessions)
+    REGISTRY.callback("gateway_model_cache", "Whisper model cache residency", _model_cache, labelnames=("stat",))
+    REGISTRY.callback(
+        "gateway_model_cache_events",
+        "Whisper model cache events",
+        _model_cache_events,
+        labelnames=("event",),
+        kind="counter",
+    )
+    REGISTRY.callback(
+        "gateway_log_stream_queue", "Debug log stream subscriber queues", _log_stream, labelnames=("stat",)
+    )
+    REGISTRY.callback(
+        "gateway_log_pipeline", "Async logging queue depth and records dropped", _log_pipeline, labelnames=("stat",)
+    )
+    REGISTRY.callback(
+        "gateway_llm_pool_endpoint",
+        "Azure OpenAI pool routing state per deployment",
+        _llm_pool,
+        labelnames=("endpoint", "stat"),
+    )
+    REGISTRY.callback(
+        "gateway_llm_queue",
+        "LLM rate-limit queue depth, budget and recent wait percentiles",
+        _llm_queue,
+        labelnames=("provider", "stat"),
+    )
+    REGISTRY.callback(
+        "gateway_provider_health",
+        "Provider health score from background validation (1 = passing, halves per consecutive failure)",
+        _provider_health,
+        labelnames=("kind", "provider"),
+    )
+    REGISTRY.callback(
+        "gateway_stt_adaptive",
+        "Local Whisper load signals and the downgrade level they produce",
+        _stt_adaptive,
+        labelnames=("stat",),
+    )
+    REGISTRY.callback(
+        "gateway_stt_breaker_state", "STT circuit breaker state", _breakers, labelnames=("provider", "state")
+    )
+
+
+_register_gauges(app)
+app.add_middleware(MetricsMiddleware)
+
 static_whisper_dir = Path(__file__).parent / "static" / "whisper"
 app.mount(
     "/tools/whisper",
@@ -74,14 +359,20 @@ app.mount(
 @app.middleware("http")
 async def ensure_correlation_id(request: Request, call_next):
     correlation_id = request.headers.get(settings.correlation_id_header) or str(uuid.uuid4())
-    request.headers.__dict__["_list"].append(
-        (settings.correlation_id_header.encode(), correlation_id.encode())
-    )
-    response = await call_next(request)
+    # Handlers and log records read the ID from the context; the request task inherits it.
+    token = set_correlation_id(correlation_id)
+    try:
+        response = await call_next(request)
+    finally:
+        reset_correlation_id(token)
     response.headers[settings.correlation_id_header] = correlation_id
     return response
 
 
+# Outermost, so the server span covers every other middleware and sees the correlation ID on the response.
+app.add_middleware(TracingMiddleware, tracer=tracer, correlation_header=settings.correlation_id_header)
+
+
 app.include_router(routes_health.router)
 app.include_router(routes_admin.router)
 app.include_router(routes_chat.router)
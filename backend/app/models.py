@@ -23,6 +23,7 @@ class ProviderSelection(BaseModel):
 class ChatRequest(BaseModel):
     session_id: Optional[str] = Field(None, description="Existing session identifier")
     channel: str = Field(..., description="Request channel such as web, teams, ivr")
+    tenant_id: Optional[str] = Field(None, description="Tenant for fair LLM queueing; the channel is used when unset")
     message: str = Field(..., description="User message content")
     provider_selection: ProviderSelection
     use_rag: bool = False
@@ -66,8 +67,17 @@ class ValidationDetail(BaseModel):
     provider: str
     status: str
     reason: str
+    score: Optional[float] = Field(None, description="Health score, 0.5 ** consecutive failed validations")
+    latency_ms: Optional[float] = None
+    checked_at: Optional[str] = None
 
 
 class ValidationResponse(BaseModel):
     status: str
     results: List[ValidationDetail]
+    checked_at: Optional[str] = Field(None, description="When the cached results were last refreshed")
+
+
+class ModelCacheRequest(BaseModel):
+    model: str = Field(..., description="Whisper model name, e.g. tiny, small, medium")
+    compute_type: Optional[str] = Field(None, description="CTranslate2 compute type; defaults to the server setting")
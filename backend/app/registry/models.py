@@ -1,9 +1,12 @@
 from typing import List
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ServiceProvider(BaseModel):
+    # Frozen so cached registry snapshots cannot go stale behind the registry's back.
+    model_config = ConfigDict(frozen=True)
+
     id: str
     display_name: str
     capabilities: List[str]
@@ -1,12 +1,43 @@
-from typing import Dict, List
+import hashlib
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
+from ..common.metrics import OTHER_LABEL
+from ..connectors.llm.azure_openai_pool import parse_pool_config
 from ..settings import Settings
 from .models import ServiceProvider
 
+SERVICE_TYPES = ("llm", "rag", "stt", "tts", "servicedesk")
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    """Read-only registry view with its JSON body and ETag computed once per registry version."""
+
+    version: int
+    providers: Mapping[str, Tuple[Mapping[str, Any], ...]]
+    body: bytes
+    etag: str
+
+
+def _build_snapshot(version: int, providers: Dict[str, List[ServiceProvider]]) -> RegistrySnapshot:
+    data = {key: [provider.model_dump() for provider in providers.get(key, [])] for key in SERVICE_TYPES}
+    body = json.dumps(data, separators=(",", ":")).encode()
+    frozen = MappingProxyType(
+        {key: tuple(MappingProxyType(item) for item in items) for key, items in data.items()}
+    )
+    # A content hash (not the version) so every worker and restart agrees on the tag.
+    return RegistrySnapshot(version, frozen, body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
 
 class ServiceRegistry:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
+        self.version = 0
+        self._index: Dict[Tuple[str, str], ServiceProvider] = {}
+        self._snapshots: Dict[bool, RegistrySnapshot] = {}
         self.providers: Dict[str, List[ServiceProvider]] = {
             "llm": [
                 ServiceProvider(
@@ -59,6 +90,9 @@ class ServiceRegistry:
                 )
             ],
         }
+        for service_type, items in self.providers.items():
+            for provider in items:
+                self._index[(service_type, provider.id)] = provider
         self._attach_real_providers()
 
     def _attach_real_providers(self) -> None:
@@ -81,6 +115,33 @@ class ServiceRegistry:
             ),
         )
 
+        pool_missing: list[str] = []
+        try:
+            pool = parse_pool_config(
+                self.settings.azure_openai_pool, default_api_key=self.settings.azure_openai_api_key or ""
+            )
+        except ValueError:
+            pool = []
+        if not pool:
+            pool_missing.append("AZURE_OPENAI_POOL")
+        elif any(not endpoint.api_key for endpoint in pool):
+            pool_missing.append("AZURE_OPENAI_API_KEY")
+        pool_models = sorted({endpoint.model for endpoint in pool})
+        pool_configured = self.settings.use_azure_openai_pool and not pool_missing
+        self._maybe_add(
+            "llm",
+            ServiceProvider(
+                id="azure-openai-pool",
+                display_name="Azure OpenAI (load-balanced pool)",
+                capabilities=["chat", "completion"],
+                supported=pool_models or ["gpt-4o-mini"],
+                requires_auth=True,
+                configured=pool_configured,
+                status="configured" if pool_configured else "missing_env",
+                missing_env=pool_missing,
+            ),
+        )
+
         search_missing = [env for env, val in {
             "AZURE_SEARCH_ENDPOINT": self.settings.azure_search_endpoint,
             "AZURE_SEARCH_QUERY_KEY": self.settings.azure_search_query_key,
@@ -183,7 +244,43 @@ class ServiceRegistry:
 
     def _maybe_add(self, key: str, provider: ServiceProvider) -> None:
         if provider.configured or self.settings.dev_mode:
-            self.providers.setdefault(key, []).append(provider)
+            self.register(key, provider)
+
+    def register(self, service_type: str, provider: ServiceProvider) -> None:
+        """Add or replace a provider; cached snapshots are rebuilt on next read."""
+
+        items = self.providers.setdefault(service_type, [])
+        existing = self._index.get((service_type, provider.id))
+        if existing is not None:
+            items[items.index(existing)] = provider
+        else:
+            items.append(provider)
+        self._index[(service_type, provider.id)] = provider
+        self._changed()
+
+    def unregister(self, service_type: str, provider_id: str) -> None:
+        provider = self._index.pop((service_type, provider_id), None)
+        if provider is not None:
+            self.providers[service_type].remove(provider)
+            self._changed()
+
+    def reconfigured(self, settings: Settings) -> "ServiceRegistry":
+        """Copy-on-write: a fresh registry for ``settings``; this one stays valid for requests still using it."""
+
+        registry = ServiceRegistry(settings=settings)
+        registry.version = self.version + 1
+        return registry
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._snapshots = {}
+
+    def snapshot(self, include_unconfigured: bool = False) -> RegistrySnapshot:
+        cached = self._snapshots.get(include_unconfigured)
+        if cached is None:
+            cached = _build_snapshot(self.version, self.list_providers(include_unconfigured))
+            self._snapshots = {**self._snapshots, include_unconfigured: cached}
+        return cached
 
     def list_providers(self, include_unconfigured: bool = False) -> Dict[str, List[ServiceProvider]]:
         if include_unconfigured:
@@ -193,18 +290,26 @@ class ServiceRegistry:
             filtered[key] = [p for p in items if p.configured]
         return filtered
 
+    def find_provider(self, service_type: str, provider_id: str) -> Optional[ServiceProvider]:
+        return self._index.get((service_type, provider_id))
+
     def get_provider(self, service_type: str, provider_id: str) -> ServiceProvider:
-        for provider in self.providers.get(service_type, []):
-            if provider.id == provider_id:
-                return provider
-        raise ValueError(f"Provider {provider_id} not found for {service_type}")
+        provider = self._index.get((service_type, provider_id))
+        if provider is None:
+            raise ValueError(f"Provider {provider_id} not found for {service_type}")
+        return provider
 
     def is_configured(self, service_type: str, provider_id: str) -> bool:
-        try:
-            provider = self.get_provider(service_type, provider_id)
-            return provider.configured
-        except ValueError:
-            return False
+        provider = self._index.get((service_type, provider_id))
+        return provider is not None and provider.configured
+
+    def metric_label(self, service_type: str, provider_id: str, value: Optional[str]) -> Optional[str]:
+        """``value`` if the provider lists it as supported, else ``other``; keeps metric labels bounded."""
+
+        if value is None:
+            return None
+        provider = self._index.get((service_type, provider_id))
+        return value if provider is not None and value in provider.supported else OTHER_LABEL
 
     def missing_env(self, service_type: str, provider_id: str) -> List[str]:
         provider = self.get_provider(service_type, provider_id)
@@ -1,11 +1,17 @@
+import asyncio
 import logging
+import time
 import uuid
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from ..common.errors import GatewayException
 from ..common.logging import bind_correlation_id, get_logger, log_event
+from ..common.metrics import record_token_usage, track_call
+from ..common.tracing import current_span, get_tracer
 from ..connectors.llm.azure_openai import AzureOpenAIConnector
+from ..connectors.llm.azure_openai_pool import AzureOpenAIPoolConnector, parse_pool_config
 from ..connectors.llm.mock_llm import MockLLMConnector
+from ..connectors.mock_profile import MockBehavior
 from ..connectors.rag.azure_ai_search import AzureAISearchConnector
 from ..connectors.rag.mock_search import MockSearchConnector
 from ..connectors.servicedesk.jira_sm import JiraServiceManagementConnector
@@ -18,16 +24,29 @@ from ..models import (
     ChatMessage,
     ChatRequest,
     ChatResponse,
-    ValidationDetail,
     ValidationResponse,
 )
-from ..registry.service_registry import ServiceRegistry
+from ..registry.service_registry import RegistrySnapshot, ServiceRegistry
 from ..settings import Settings
+from .coalescing import SingleFlight, TicketDeduplicator, prompt_key
+from .config_reload import ConnectorGeneration, ConnectorMap, ConnectorSlot, changed_connectors
+from .connector_health import ConnectorHealth
 from .context_builder import ContextBuilder
+from .llm_scheduler import LLMScheduler, parse_rate_limits
 from .memory_store import MemoryStore
 from .policy import PolicyEngine
 from .router import RuntimeRouter
 
+# (settings the connector depends on, factory); equal fingerprints mean the old connector is reused.
+ConnectorSpec = Tuple[Tuple[Any, ...], Callable[[], Any]]
+
+
+async def _close_all(connectors: List[Any]) -> None:
+    for connector in connectors:
+        close = getattr(connector, "aclose", None)
+        if close is not None:
+            await close()
+
 
 class AgentRuntime:
     def __init__(
@@ -39,149 +58,407 @@ class AgentRuntime:
         policy_engine: PolicyEngine,
         runtime_router: RuntimeRouter,
     ) -> None:
-        self.settings = settings
-        self.registry = registry
         self.memory = memory
         self.context_builder = context_builder
         self.policy_engine = policy_engine
         self.runtime_router = runtime_router
         self.logger = get_logger("agent_runtime")
-        self.llm_connectors = self._build_llm_connectors()
-        self.rag_connectors = self._build_rag_connectors()
-        self.stt_connectors = self._build_stt_connectors()
-        self.tts_connectors = self._build_tts_connectors()
-        self.servicedesk_connectors = self._build_servicedesk_connectors()
-
-    def _build_llm_connectors(self) -> Dict[str, Any]:
-        connectors: Dict[str, Any] = {"mock-llm": MockLLMConnector()}
-        if self.registry.is_configured("llm", "azure-openai"):
-            connectors["azure-openai"] = AzureOpenAIConnector(
-                endpoint=self.settings.azure_openai_endpoint or "",
-                api_key=self.settings.azure_openai_api_key or "",
-                api_version=self.settings.azure_openai_api_version or "",
-                deployment_map={dep: dep for dep in self.registry.get_provider("llm", "azure-openai").supported},
-            )
-        return connectors
-
-    def _build_rag_connectors(self) -> Dict[str, Any]:
-        connectors: Dict[str, Any] = {"mock-search": MockSearchConnector()}
-        if self.registry.is_configured("rag", "azure-ai-search"):
-            connectors["azure-ai-search"] = AzureAISearchConnector(
-                endpoint=self.settings.azure_search_endpoint or "",
-                key=self.settings.azure_search_query_key or "",
-            )
-        return connectors
-
-    def _build_stt_connectors(self) -> Dict[str, Any]:
-        connectors: Dict[str, Any] = {"mock-stt": MockSpeechConnector()}
-        if self.registry.is_configured("stt", "azure-speech"):
-            connectors["azure-speech"] = AzureSpeechConnector(
-                key=self.settings.azure_speech_key or "",
-                region=self.settings.azure_speech_region or "",
-            )
-        return connectors
-
-    def _build_tts_connectors(self) -> Dict[str, Any]:
-        connectors: Dict[str, Any] = {"mock-tts": MockSpeechConnector()}
-        if self.registry.is_configured("tts", "azure-speech"):
-            connectors["azure-speech"] = AzureSpeechConnector(
-                key=self.settings.azure_speech_key or "",
-                region=self.settings.azure_speech_region or "",
-            )
-        return connectors
-
-    def _build_servicedesk_connectors(self) -> Dict[str, Any]:
-        connectors: Dict[str, Any] = {"mock-servicedesk": MockServiceDeskConnector()}
-        if self.registry.is_configured("servicedesk", "servicenow"):
-            connectors["servicenow"] = ServiceNowConnector(
-                instance_url=self.settings.servicenow_instance_url or "",
-                client_id=self.settings.servicenow_client_id or "",
-                client_secret=self.settings.servicenow_client_secret or "",
-            )
-        if self.registry.is_configured("servicedesk", "jira-sm"):
-            connectors["jira-sm"] = JiraServiceManagementConnector(
-                base_url=self.settings.jira_base_url or "",
-                email=self.settings.jira_email or "",
-                api_token=self.settings.jira_api_token or "",
+        self.tracer = get_tracer()
+        self.generation = self._build_generation(settings, registry, previous=None)
+        self.llm_scheduler = self._build_llm_scheduler(settings)
+        self.llm_flights = SingleFlight(settings.chat_coalesce_window_seconds)
+        self.ticket_dedup = TicketDeduplicator(
+            settings.ticket_dedup_window_seconds, threshold=settings.ticket_dedup_similarity
+        )
+        self.connector_health = ConnectorHealth(
+            timeout_seconds=settings.connector_validation_timeout_seconds,
+            unhealthy_after=settings.connector_unhealthy_after,
+        )
+        self._retiring: Set[asyncio.Task] = set()
+
+    # The current generation's view; a request reads ``self.generation`` once and keeps using it.
+    @property
+    def settings(self) -> Settings:
+        return self.generation.settings
+
+    @property
+    def registry(self) -> ServiceRegistry:
+        return self.generation.registry
+
+    @property
+    def llm_connectors(self) -> ConnectorMap:
+        return self.generation.llm_connectors
+
+    @property
+    def rag_connectors(self) -> ConnectorMap:
+        return self.generation.rag_connectors
+
+    @property
+    def stt_connectors(self) -> ConnectorMap:
+        return self.generation.stt_connectors
+
+    @property
+    def tts_connectors(self) -> ConnectorMap:
+        return self.generation.tts_connectors
+
+    @property
+    def servicedesk_connectors(self) -> ConnectorMap:
+        return self.generation.servicedesk_connectors
+
+    @staticmethod
+    def _build_llm_scheduler(settings: Settings) -> LLMScheduler:
+        return LLMScheduler(
+            parse_rate_limits(settings.llm_rate_limits), max_wait_seconds=settings.llm_queue_max_wait_seconds
+        )
+
+    @staticmethod
+    def _mock_behavior(settings: Settings, profile: str, name: str) -> MockBehavior:
+        return MockBehavior.from_settings(profile, settings.mock_seed, name)
+
+    def _build_generation(
+        self, settings: Settings, registry: ServiceRegistry, previous: Optional[ConnectorGeneration]
+    ) -> ConnectorGeneration:
+        """Plan every configured connector, sharing ``previous`` ones whose settings are unchanged.
+
+        Nothing is constructed here; each connector is built on first use or by ``warm_up``.
+        """
+
+        specs = {
+            "llm": self._llm_specs(settings, registry),
+            "rag": self._rag_specs(settings),
+            "stt": self._speech_specs(settings, "stt"),
+            "tts": self._speech_specs(settings, "tts"),
+            "servicedesk": self._servicedesk_specs(settings),
+        }
+        fingerprints: Dict[Tuple[str, str], Tuple[Any, ...]] = {}
+        connectors: Dict[str, ConnectorMap] = {}
+        for service_type, entries in specs.items():
+            built = ConnectorMap()
+            for provider_id, (fingerprint, factory) in entries.items():
+                if not registry.is_configured(service_type, provider_id):
+                    continue
+                key = (service_type, provider_id)
+                fingerprints[key] = fingerprint
+                if previous is not None and previous.fingerprints.get(key) == fingerprint:
+                    built.adopt(provider_id, previous.connectors(service_type))
+                else:
+                    built.add(provider_id, factory)
+            connectors[service_type] = built
+        return ConnectorGeneration(
+            number=previous.number + 1 if previous is not None else 1,
+            settings=settings,
+            registry=registry,
+            fingerprints=fingerprints,
+            **{f"{service_type}_connectors": built for service_type, built in connectors.items()},
+        )
+
+    def _llm_specs(self, settings: Settings, registry: ServiceRegistry) -> Dict[str, ConnectorSpec]:
+        specs: Dict[str, ConnectorSpec] = {
+            "mock-llm": (
+                (settings.mock_llm_profile, settings.mock_seed),
+                lambda: MockLLMConnector(self._mock_behavior(settings, settings.mock_llm_profile, "mock-llm")),
             )
-        if self.registry.is_configured("servicedesk", "remedy"):
-            connectors["remedy"] = RemedyConnector(
-                base_url=self.settings.remedy_base_url or "",
-                username=self.settings.remedy_username or "",
-                password=self.settings.remedy_password or "",
+        }
+        aoai = registry.find_provider("llm", "azure-openai")
+        deployments = tuple(aoai.supported) if aoai is not None else ()
+        specs["azure-openai"] = (
+            (
+                settings.azure_openai_endpoint,
+                settings.azure_openai_api_key,
+                settings.azure_openai_api_version,
+                deployments,
+            ),
+            lambda: AzureOpenAIConnector(
+                endpoint=settings.azure_openai_endpoint or "",
+                api_key=settings.azure_openai_api_key or "",
+                api_version=settings.azure_openai_api_version or "",
+                deployment_map={dep: dep for dep in deployments},
+            ),
+        )
+        specs["azure-openai-pool"] = (
+            (
+                settings.azure_openai_pool,
+                settings.azure_openai_api_key,
+                settings.azure_openai_api_version,
+                settings.azure_openai_pool_timeout_seconds,
+                settings.azure_openai_pool_max_attempts,
+            ),
+            lambda: AzureOpenAIPoolConnector(
+                parse_pool_config(
+                    settings.azure_openai_pool,
+                    default_api_key=settings.azure_openai_api_key or "",
+                    default_api_version=settings.azure_openai_api_version or "",
+                ),
+                timeout_seconds=settings.azure_openai_pool_timeout_seconds,
+                max_attempts=settings.azure_openai_pool_max_attempts,
+            ),
+        )
+        return specs
+
+    def _rag_specs(self, settings: Settings) -> Dict[str, ConnectorSpec]:
+        return {
+            "mock-search": (
+                (settings.mock_search_profile, settings.mock_seed),
+                lambda: MockSearchConnector(
+                    self._mock_behavior(settings, settings.mock_search_profile, "mock-search")
+                ),
+            ),
+            "azure-ai-search": (
+                (settings.azure_search_endpoint, settings.azure_search_query_key),
+                lambda: AzureAISearchConnector(
+                    endpoint=settings.azure_search_endpoint or "",
+                    key=settings.azure_search_query_key or "",
+                ),
+            ),
+        }
+
+    def _speech_specs(self, settings: Settings, kind: str) -> Dict[str, ConnectorSpec]:
+        mock_id = f"mock-{kind}"
+        return {
+            mock_id: (
+                (settings.mock_speech_profile, settings.mock_seed),
+                lambda: MockSpeechConnector(self._mock_behavior(settings, settings.mock_speech_profile, mock_id)),
+            ),
+            "azure-speech": (
+                (settings.azure_speech_key, settings.azure_speech_region),
+                lambda: AzureSpeechConnector(
+                    key=settings.azure_speech_key or "",
+                    region=settings.azure_speech_region or "",
+                ),
+            ),
+        }
+
+    def _servicedesk_specs(self, settings: Settings) -> Dict[str, ConnectorSpec]:
+        return {
+            "mock-servicedesk": (
+                (settings.mock_servicedesk_profile, settings.mock_seed),
+                lambda: MockServiceDeskConnector(
+                    self._mock_behavior(settings, settings.mock_servicedesk_profile, "mock-servicedesk")
+                ),
+            ),
+            "servicenow": (
+                (
+                    settings.servicenow_instance_url,
+                    settings.servicenow_client_id,
+                    settings.servicenow_client_secret,
+                ),
+                lambda: ServiceNowConnector(
+                    instance_url=settings.servicenow_instance_url or "",
+                    client_id=settings.servicenow_client_id or "",
+                    client_secret=settings.servicenow_client_secret or "",
+                ),
+            ),
+            "jira-sm": (
+                (settings.jira_base_url, settings.jira_email, settings.jira_api_token),
+                lambda: JiraServiceManagementConnector(
+                    base_url=settings.jira_base_url or "",
+                    email=settings.jira_email or "",
+                    api_token=settings.jira_api_token or "",
+                ),
+            ),
+            "remedy": (
+                (settings.remedy_base_url, settings.remedy_username, settings.remedy_password),
+                lambda: RemedyConnector(
+                    base_url=settings.remedy_base_url or "",
+                    username=settings.remedy_username or "",
+                    password=settings.remedy_password or "",
+                ),
+            ),
+        }
+
+    async def reconfigure(self, settings: Settings) -> Dict[str, Any]:
+        """Swap in connectors for ``settings``; requests already running finish on the old ones."""
+
+        previous = self.generation
+        registry = previous.registry.reconfigured(settings)
+        generation = self._build_generation(settings, registry, previous)
+        if settings.connector_warm_up:
+            await self._warm_up(generation)
+        if (settings.llm_rate_limits, settings.llm_queue_max_wait_seconds) != (
+            previous.settings.llm_rate_limits,
+            previous.settings.llm_queue_max_wait_seconds,
+        ):
+            self.llm_scheduler = self._build_llm_scheduler(settings)
+        self.generation = generation
+        summary = changed_connectors(previous, generation)
+        kept = {id(slot) for slot in generation.slots()}
+        retired = [slot for slot in previous.slots() if id(slot) not in kept]
+        if retired:
+            task = asyncio.create_task(self._retire(previous, retired, settings.config_drain_timeout_seconds))
+            self._retiring.add(task)
+            task.add_done_callback(self._retiring.discard)
+        return {"generation": generation.number, "registry_version": registry.version, **summary}
+
+    async def _retire(self, generation: ConnectorGeneration, slots: List[ConnectorSlot], timeout: float) -> None:
+        try:
+            drained = await generation.drained(timeout)
+            log_event(
+                self.logger,
+                logging.INFO if drained else logging.WARNING,
+                "config.generation.retired",
+                "Closing replaced connectors" if drained else "Drain timed out; closing replaced connectors",
+                generation=generation.number,
+                in_flight=generation.in_flight,
             )
-        return connectors
+        finally:
+            # Read the slots only now: a draining request may have built one of them lazily.
+            await _close_all([slot.instance for slot in slots if slot.instance is not None])
+
+    async def aclose(self) -> None:
+        """Close pooled HTTP clients held by connectors, including ones still draining."""
+
+        for task in list(self._retiring):
+            task.cancel()
+        await asyncio.gather(*self._retiring, return_exceptions=True)
+        await _close_all([slot.instance for slot in self.generation.slots() if slot.instance is not None])
+
+    async def warm_up(self) -> Dict[str, Any]:
+        """Import SDKs and construct every configured connector now, and open connections for pools."""
+
+        return await self._warm_up(self.generation)
+
+    @staticmethod
+    async def _warm_up(generation: ConnectorGeneration) -> Dict[str, Any]:
+        started = time.perf_counter()
+        await asyncio.to_thread(generation.build_all)
+        pools = {}
+        for provider_id, connector in generation.llm_connectors.items():
+            warm = getattr(connector, "warm_up", None)
+            if warm is not None:
+                pools[provider_id] = await warm()
+        return {
+            "connectors": len(generation.slots()),
+            "pools": pools,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
 
     def _get_session_id(self, provided: Optional[str]) -> str:
         return provided or str(uuid.uuid4())
 
     async def handle_chat(self, request: ChatRequest, correlation_id: Optional[str]) -> ChatResponse:
+        generation = self.generation
+        with generation.pinned():
+            return await self._handle_chat(generation, request, correlation_id)
+
+    async def _handle_chat(
+        self, generation: ConnectorGeneration, request: ChatRequest, correlation_id: Optional[str]
+    ) -> ChatResponse:
         logger = bind_correlation_id(self.logger, correlation_id)
+        registry = generation.registry
         session_id = self._get_session_id(request.session_id)
-        self.memory.create_session(session_id)
+        await self.memory.create_session(session_id)
 
-        if not self.registry.is_configured("llm", request.provider_selection.llm_provider):
-            missing = self.registry.missing_env("llm", request.provider_selection.llm_provider)
+        if not registry.is_configured("llm", request.provider_selection.llm_provider):
+            missing = registry.missing_env("llm", request.provider_selection.llm_provider)
             raise GatewayException(f"LLM provider not configured; missing env: {', '.join(missing)}")
 
-        sanitized_message = self.policy_engine.enforce(request.message)
+        tracer = self.tracer
+        with tracer.span("chat.policy"):
+            sanitized_message = self.policy_engine.enforce(request.message)
         user_message = ChatMessage(role="user", content=sanitized_message)
-        self.memory.append_turn(session_id, user_message)
+        await self.memory.append_turn(session_id, user_message)
 
         rag_results = []
+        rag_skipped = None
         if request.use_rag and request.provider_selection.rag_provider:
-            if not self.registry.is_configured("rag", request.provider_selection.rag_provider):
-                missing = self.registry.missing_env("rag", request.provider_selection.rag_provider)
+            if not registry.is_configured("rag", request.provider_selection.rag_provider):
+                missing = registry.missing_env("rag", request.provider_selection.rag_provider)
                 raise GatewayException(f"RAG provider not configured; missing env: {', '.join(missing)}")
-            rag_connector = self.rag_connectors.get(request.provider_selection.rag_provider)
+            rag_connector = generation.rag_connectors.get(request.provider_selection.rag_provider)
             if not rag_connector:
                 raise GatewayException("RAG provider not found")
-            rag_results = await rag_connector.search(
-                request.message, top_k=3, index_name=request.provider_selection.rag_index or "default"
-            )
+            rag_provider = request.provider_selection.rag_provider
+            rag_index = request.provider_selection.rag_index
+            if not self.connector_health.healthy("rag", rag_provider):
+                # Grounding is optional; answer without it rather than wait on a failing search backend.
+                rag_skipped = "provider_unhealthy"
+            else:
+                rag_label = registry.metric_label("rag", rag_provider, rag_index)
+                with tracer.span("chat.rag", provider=rag_provider), track_call("rag", rag_provider, rag_label):
+                    rag_results = await rag_connector.search(
+                        request.message, top_k=3, index_name=rag_index or "default"
+                    )
 
-        history = self.memory.history(session_id)
-        llm_messages = self.context_builder.build(history, rag_results)
-        llm_connector = self.llm_connectors.get(request.provider_selection.llm_provider)
+        with tracer.span("chat.context_build") as span:
+            history = await self.memory.history(session_id)
+            llm_messages = self.context_builder.build(history, rag_results)
+            span.set_attributes(history_length=len(history), rag_results=len(rag_results))
+        llm_connector = generation.llm_connectors.get(request.provider_selection.llm_provider)
         if not llm_connector:
             raise GatewayException("LLM provider not found")
-        llm_result = await llm_connector.generate(
-            llm_messages,
-            model=request.provider_selection.llm_model,
-            temperature=0.2,
-            max_tokens=256,
-        )
+        llm_provider = request.provider_selection.llm_provider
+        llm_model = request.provider_selection.llm_model
+        llm_model_label = registry.metric_label("llm", llm_provider, llm_model)
+
+        async def _generate() -> Dict[str, Any]:
+            # Runs in its own task (see SingleFlight), so it pins the generation for itself.
+            with generation.pinned():
+                with tracer.span("chat.llm_queue", provider=llm_provider) as span:
+                    reservation = await self.llm_scheduler.acquire(
+                        llm_provider, request.tenant_id or request.channel, llm_messages, max_tokens=256
+                    )
+                    span.set_attributes(
+                        waited_ms=round(reservation.waited_ms, 2), estimated_tokens=reservation.tokens
+                    )
+                with (
+                    tracer.span("chat.llm", provider=llm_provider, model=llm_model),
+                    track_call("llm", llm_provider, llm_model_label),
+                ):
+                    result = await llm_connector.generate(
+                        llm_messages,
+                        model=llm_model,
+                        temperature=0.2,
+                        max_tokens=256,
+                    )
+                reservation.settle(result.get("usage"))
+                record_token_usage(llm_provider, llm_model_label, result.get("usage") or {})
+                return result
+
+        llm_result, coalesced = await self.llm_flights.do(prompt_key(llm_provider, llm_model, llm_messages), _generate)
         llm_reply = llm_result.get("text", "")
 
         servicedesk_action = None
         servicedesk_payload: Dict[str, Any] = {}
         if request.provider_selection.servicedesk_provider:
-            if not self.registry.is_configured("servicedesk", request.provider_selection.servicedesk_provider):
-                missing = self.registry.missing_env("servicedesk", request.provider_selection.servicedesk_provider)
+            if not registry.is_configured("servicedesk", request.provider_selection.servicedesk_provider):
+                missing = registry.missing_env("servicedesk", request.provider_selection.servicedesk_provider)
                 raise GatewayException(f"Service desk provider not configured; missing env: {', '.join(missing)}")
             intent = self.runtime_router.should_open_ticket(request.message)
-            if intent and request.provider_selection.servicedesk_provider in self.servicedesk_connectors:
-                connector = self.servicedesk_connectors[request.provider_selection.servicedesk_provider]
-                if intent == "create":
-                    servicedesk_payload = await connector.create_ticket(
-                        "AI Gateway Ticket", request.message, severity="3", requester=None
-                    )
-                elif intent == "status":
-                    servicedesk_payload = await connector.get_ticket("SNOW-1001")
+            if intent and request.provider_selection.servicedesk_provider in generation.servicedesk_connectors:
+                servicedesk_provider = request.provider_selection.servicedesk_provider
+                connector = generation.servicedesk_connectors[servicedesk_provider]
+                with (
+                    tracer.span("chat.servicedesk", provider=servicedesk_provider, intent=intent),
+                    track_call("servicedesk", servicedesk_provider, intent),
+                ):
+                    if intent == "create":
+                        servicedesk_payload = await self.ticket_dedup.create(
+                            servicedesk_provider,
+                            lambda: connector.create_ticket(
+                                "AI Gateway Ticket", request.message, severity="3", requester=None
+                            ),
+                            request.message,
+                            caller=session_id,
+                        )
+                    elif intent == "status":
+                        servicedesk_payload = await connector.get_ticket("SNOW-1001")
                 servicedesk_action = intent
 
         assistant_message = ChatMessage(role="assistant", content=llm_reply)
-        self.memory.append_turn(session_id, assistant_message)
+        await self.memory.append_turn(session_id, assistant_message)
 
         debug: Optional[Dict[str, Any]] = None
-        if request.include_debug or self.settings.dev_mode:
+        if request.include_debug or generation.settings.dev_mode:
             debug = {
                 "correlation_id": correlation_id,
+                "trace_id": active.trace_id if (active := current_span()) else None,
                 "rag_results": rag_results,
+                "rag_skipped": rag_skipped,
                 "servicedesk": servicedesk_payload,
                 "history_length": len(history) + 1,
                 "llm_usage": llm_result.get("usage", {}),
                 "latency_ms": llm_result.get("latency_ms"),
+                "coalesced": coalesced,
             }
             log_event(
                 logger,
@@ -203,74 +480,32 @@ class AgentRuntime:
         )
 
     async def transcribe_audio(self, provider_id: str, payload: bytes, locale: str, model: str) -> Dict[str, Any]:
-        connector = self.stt_connectors.get(provider_id)
+        generation = self.generation
+        connector = generation.stt_connectors.get(provider_id)
         if not connector:
             raise GatewayException("STT provider not found")
-        return await connector.transcribe(payload, locale=locale, model=model)
+        model_label = generation.registry.metric_label("stt", provider_id, model)
+        with generation.pinned(), track_call("stt", provider_id, model_label):
+            return await connector.transcribe(payload, locale=locale, model=model)
 
     async def synthesize_audio(
         self, provider_id: str, text: str, locale: str, voice: Optional[str] = None
     ) -> Dict[str, Any]:
-        connector = self.tts_connectors.get(provider_id)
+        generation = self.generation
+        connector = generation.tts_connectors.get(provider_id)
         if not connector:
             raise GatewayException("TTS provider not found")
-        return await connector.synthesize(text, locale=locale, voice=voice or "")
+        voice_label = generation.registry.metric_label("tts", provider_id, voice)
+        with generation.pinned(), track_call("tts", provider_id, voice_label):
+            return await connector.synthesize(text, locale=locale, voice=voice or "")
 
-    def registry_snapshot(self) -> Dict[str, Any]:
-        providers = self.registry.list_providers(include_unconfigured=self.settings.dev_mode)
-        return {key: [item.model_dump() for item in value] for key, value in providers.items()}
+    def registry_snapshot(self) -> RegistrySnapshot:
+        return self.registry.snapshot(include_unconfigured=self.settings.dev_mode)
 
     async def validate_connectors(self) -> ValidationResponse:
-        details: list[ValidationDetail] = []
-        for service_type, connectors in [
-            ("llm", self.llm_connectors),
-            ("rag", self.rag_connectors),
-            ("stt", self.stt_connectors),
-            ("tts", self.tts_connectors),
-            ("servicedesk", self.servicedesk_connectors),
-        ]:
-            for provider_id, connector in connectors.items():
-                provider = self.registry.get_provider(service_type, provider_id)
-                if not provider.configured:
-                    details.append(
-                        ValidationDetail(
-                            service_type=service_type,
-                            provider=provider_id,
-                            status="not_configured",
-                            reason=(
-                                f"Missing env: {', '.join(provider.missing_env)}"
-                                if provider.missing_env
-                                else "Disabled"
-                            ),
-                        )
-                    )
-                    continue
-                try:
-                    result = await connector.validate()
-                    details.append(
-                        ValidationDetail(
-                            service_type=service_type,
-                            provider=provider_id,
-                            status=result.get("status", "unknown"),
-                            reason=result.get("reason", ""),
-                        )
-                    )
-                except Exception as exc:  # noqa: BLE001
-                    details.append(
-                        ValidationDetail(
-                            service_type=service_type,
-                            provider=provider_id,
-                            status="error",
-                            reason=str(exc),
-                        )
-                    )
-        overall_status = (
-            "ok"
-            if all(
-                item.status == "ok"
-                for item in details
-                if self.registry.is_configured(item.service_type, item.provider)
-            )
-            else "attention"
-        )
-        return ValidationResponse(status=overall_status, results=details)
+        """Validate every connector now (concurrently, with timeouts) and update the cached health."""
+
+        return await self.connector_health.refresh(self.generation)
+
+    def validation_view(self) -> ValidationResponse:
+        return self.connector_health.view(self.generation)
@@ -0,0 +1,164 @@
+"""Share work between identical chat requests that arrive together.
+
+During an incident many users ask the same question within seconds. The
+``SingleFlight`` group runs one LLM call per normalized prompt; callers that
+arrive while it is in flight, or within ``window_seconds`` after it finished,
+get the same result. The call runs in its own task, so the request that
+started it can disconnect without failing everyone else.
+
+``TicketDeduplicator`` does the same for ticket creation, but matches near
+duplicates (word-set similarity) instead of exact prompts. It returns the
+existing ticket with the additional callers linked to it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+from ..common.metrics import CHAT_COALESCED
+
+_WHITESPACE = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+
+    return _WHITESPACE.sub(" ", text.casefold()).strip().rstrip("?!. ")
+
+
+def prompt_key(provider: str, model: Optional[str], messages: List[Dict[str, Any]]) -> str:
+    """Stable key for an LLM call: provider, model and the normalized context (history + RAG snippets)."""
+
+    digest = hashlib.sha256(f"{provider}\0{model or ''}".encode())
+    for message in messages:
+        digest.update(f"\0{message.get('role')}\0{normalize_text(str(message.get('content') or ''))}".encode())
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    def __init__(self, window_seconds: float = 2.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._recent: Dict[Hashable, Tuple[float, Any]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is true when another caller's call was reused."""
+
+        if self.window_seconds <= 0:
+            return await fn(), False
+        now = self._clock()
+        self._expire(now)
+        recent = self._recent.get(key)
+        if recent is not None:
+            CHAT_COALESCED.inc("llm")
+            return recent[1], True
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            CHAT_COALESCED.inc("llm")
+        return await asyncio.shield(task), shared
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._recent[key] = (self._clock() + self.window_seconds, task.result())
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, (until, _) in self._recent.items() if until <= now]
+        for key in expired:
+            del self._recent[key]
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+def _words(text: str) -> FrozenSet[str]:
+    return frozenset(_WORD.findall(text.casefold()))
+
+
+def similarity(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+@dataclass
+class _TicketEntry:
+    words: FrozenSet[str]
+    expires_at: float
+    result: asyncio.Future
+    callers: List[str] = field(default_factory=list)
+
+
+class TicketDeduplicator:
+    def __init__(
+        self,
+        window_seconds: float = 600.0,
+        threshold: float = 0.8,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window_seconds = window_seconds
+        self.threshold = threshold
+        self._clock = clock
+        self._entries: Dict[str, List[_TicketEntry]] = {}
+
+    def _match(self, provider: str, words: FrozenSet[str], now: float) -> Optional[_TicketEntry]:
+        entries = self._entries.get(provider, [])
+        entries[:] = [entry for entry in entries if entry.expires_at > now]
+        best, best_score = None, self.threshold
+        for entry in entries:
+            score = similarity(words, entry.words)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    async def create(
+        self,
+        provider: str,
+        create: Callable[[], Awaitable[Dict[str, Any]]],
+        body: str,
+        caller: str,
+    ) -> Dict[str, Any]:
+        """Create a ticket, or link ``caller`` to a recent near-identical one for the same provider.
+
+        Callers stay server-side: they are other users' session ids, so the result only says how many
+        sessions reported the ticket (``linked_count``).
+        """
+
+        if self.window_seconds <= 0:
+            return {**await create(), "linked_count": 1, "deduplicated": False}
+        now = self._clock()
+        words = _words(body)
+        entry = self._match(provider, words, now)
+        if entry is not None:
+            entry.callers.append(caller)
+            CHAT_COALESCED.inc("ticket")
+            ticket = entry.result.result() if entry.result.done() else await asyncio.shield(entry.result)
+            return {**ticket, "linked_count": len(entry.callers), "deduplicated": True}
+
+        entry = _TicketEntry(words, now + self.window_seconds, asyncio.get_running_loop().create_future(), [caller])
+        self._entries.setdefault(provider, []).append(entry)
+        try:
+            ticket = await create()
+        except BaseException as exc:
+            entries = self._entries.get(provider, [])
+            if entry in entries:
+                entries.remove(entry)
+            if isinstance(exc, Exception):
+                entry.result.set_exception(exc)
+                entry.result.exception()  # waiters re-raise it; don't warn if there are none
+            else:
+                entry.result.cancel()
+            raise
+        entry.result.set_result(ticket)
+        return {**ticket, "linked_count": len(entry.callers), "deduplicated": False}
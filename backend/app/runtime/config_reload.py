@@ -0,0 +1,297 @@
+"""Hot reload of provider settings without restarting the process.
+
+``CONFIG_FILE`` points at a JSON object of setting overrides keyed like the
+environment variables, e.g.::
+
+    {"USE_AZURE_OPENAI_POOL": true,
+     "AZURE_OPENAI_POOL": [{"name": "swe", "endpoint": "https://swe.openai.azure.com", "deployment": "gpt-4o"}],
+     "SERVICENOW_CLIENT_SECRET": "rotated"}
+
+``ConfigReloader`` polls the file (or is triggered through
+``POST /v1/admin/config/reload``) and hands the merged settings to
+``AgentRuntime.reconfigure``. The runtime builds a new ``ConnectorGeneration``
+copy-on-write: connectors whose settings did not change are carried over, the
+rest are built fresh, and the generation is published with one assignment.
+Requests pin the generation they started on, so they finish on the old
+connectors, which are closed once the last of those requests is done.
+
+Only settings that feed the connector generation can be reloaded (see
+``RELOADABLE_PREFIXES`` and ``RELOADABLE_KEYS``); the rest are read once at
+startup by the speech router, model cache, middleware and ``get_settings()``
+callers, so an override file naming them is rejected instead of being
+silently ignored.
+
+Connectors are constructed on first lookup (``ConnectorMap``), so SDKs for
+providers nobody calls are never imported. ``CONNECTOR_WARM_UP`` builds them
+up front instead, at startup and before a reloaded generation is published.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..common.logging import get_logger, log_event
+from ..common.metrics import CONFIG_RELOADS
+from ..connectors.llm.azure_openai_pool import parse_pool_config
+from ..registry.service_registry import SERVICE_TYPES, ServiceRegistry
+from ..settings import Settings
+
+if TYPE_CHECKING:
+    from .agent_runtime import AgentRuntime
+
+
+class ConnectorSlot:
+    """One connector and the factory that builds it; generations share a slot when the connector is reused."""
+
+    __slots__ = ("factory", "instance", "_lock")
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self.factory = factory
+        self.instance: Any = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self.instance is None:
+            # Warm-up builds from a worker thread while requests may build from the event loop.
+            with self._lock:
+                if self.instance is None:
+                    self.instance = self.factory()
+        return self.instance
+
+
+class ConnectorMap(MutableMapping):
+    """Provider id -> connector, constructed on first lookup. Membership checks never construct."""
+
+    def __init__(self) -> None:
+        self._slots: Dict[str, ConnectorSlot] = {}
+
+    def add(self, provider_id: str, factory: Callable[[], Any]) -> None:
+        self._slots[provider_id] = ConnectorSlot(factory)
+
+    def adopt(self, provider_id: str, other: "ConnectorMap") -> None:
+        self._slots[provider_id] = other._slots[provider_id]
+
+    def shares(self, provider_id: str, other: "ConnectorMap") -> bool:
+        return provider_id in other._slots and other._slots[provider_id] is self._slots.get(provider_id)
+
+    def peek(self, provider_id: str) -> Any:
+        """The connector if it has been built, without building it."""
+
+        slot = self._slots.get(provider_id)
+        return slot.instance if slot is not None else None
+
+    def slots(self) -> List[ConnectorSlot]:
+        return list(self._slots.values())
+
+    def build_all(self) -> None:
+        for slot in self._slots.values():
+            slot.get()
+
+    def __getitem__(self, provider_id: str) -> Any:
+        return self._slots[provider_id].get()
+
+    def __setitem__(self, provider_id: str, connector: Any) -> None:
+        slot = ConnectorSlot(lambda: connector)
+        slot.instance = connector
+        self._slots[provider_id] = slot
+
+    def __delitem__(self, provider_id: str) -> None:
+        del self._slots[provider_id]
+
+    def __contains__(self, provider_id: object) -> bool:
+        return provider_id in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._slots))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+@dataclass
+class ConnectorGeneration:
+    """Settings, registry and connectors that are swapped in together; never mutated once published."""
+
+    number: int
+    settings: Settings
+    registry: ServiceRegistry
+    llm_connectors: ConnectorMap
+    rag_connectors: ConnectorMap
+    stt_connectors: ConnectorMap
+    tts_connectors: ConnectorMap
+    servicedesk_connectors: ConnectorMap
+    fingerprints: Dict[Tuple[str, str], Tuple[Any, ...]] = field(default_factory=dict)
+    in_flight: int = 0
+    _idle: Optional[asyncio.Event] = field(default=None, repr=False)
+
+    def connectors(self, service_type: str) -> ConnectorMap:
+        return getattr(self, f"{service_type}_connectors")
+
+    def slots(self) -> List[ConnectorSlot]:
+        return [slot for service_type in SERVICE_TYPES for slot in self.connectors(service_type).slots()]
+
+    def build_all(self) -> None:
+        for service_type in SERVICE_TYPES:
+            self.connectors(service_type).build_all()
+
+    @contextmanager
+    def pinned(self) -> Iterator["ConnectorGeneration"]:
+        """Count a request against this generation until it finishes."""
+
+        self.in_flight += 1
+        try:
+            yield self
+        finally:
+            self.in_flight -= 1
+            if self.in_flight == 0 and self._idle is not None:
+                self._idle.set()
+
+    async def drained(self, timeout: float) -> bool:
+        """Wait until no request is pinned to this generation; ``False`` if ``timeout`` ran out first."""
+
+        if self.in_flight == 0:
+            return True
+        self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+RELOADABLE_PREFIXES = ("USE_", "AZURE_", "MOCK_", "SERVICENOW_", "JIRA_", "REMEDY_")
+RELOADABLE_KEYS = frozenset(
+    {"DEV_MODE", "LLM_RATE_LIMITS", "LLM_QUEUE_MAX_WAIT_SECONDS", "CONNECTOR_WARM_UP", "CONFIG_DRAIN_TIMEOUT_SECONDS"}
+)
+
+
+def is_reloadable(key: str) -> bool:
+    key = key.upper()
+    return key in RELOADABLE_KEYS or key.startswith(RELOADABLE_PREFIXES)
+
+
+def _override_keys() -> Dict[str, Tuple[str, bool]]:
+    """Upper-cased env name -> (init keyword, whether the field takes a plain string)."""
+
+    keys = {}
+    for name, info in Settings.model_fields.items():
+        takes_str = info.annotation in (str, Optional[str])
+        keys[(info.alias or name).upper()] = (info.alias or name, takes_str)
+    return keys
+
+
+def load_overrides(path: str) -> Dict[str, Any]:
+    """Read a JSON overrides file into ``Settings`` keyword arguments.
+
+    Lists and objects given for string settings (``AZURE_OPENAI_POOL``) are
+    re-encoded as JSON, the way they would be written in the environment.
+    Settings outside the reloadable set raise ``ValueError``.
+    """
+
+    data = json.loads(Path(path).read_text(encoding="utf-8") or "{}")
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+    keys = _override_keys()
+    overrides: Dict[str, Any] = {}
+    for key, value in data.items():
+        if key.upper() not in keys:
+            raise ValueError(f"Unknown setting {key!r} in {path}")
+        if not is_reloadable(key):
+            raise ValueError(f"Setting {key!r} in {path} cannot be reloaded; restart to change it")
+        init_key, takes_str = keys[key.upper()]
+        if takes_str and isinstance(value, (list, dict)):
+            value = json.dumps(value)
+        overrides[init_key] = value
+    return overrides
+
+
+def changed_connectors(previous: ConnectorGeneration, current: ConnectorGeneration) -> Dict[str, List[str]]:
+    """Summarise a swap as ``service_type/provider`` ids that were rebuilt, reused or removed."""
+
+    summary: Dict[str, List[str]] = {"rebuilt": [], "reused": [], "removed": []}
+    for service_type in SERVICE_TYPES:
+        old, new = previous.connectors(service_type), current.connectors(service_type)
+        for provider_id in new:
+            summary["reused" if new.shares(provider_id, old) else "rebuilt"].append(f"{service_type}/{provider_id}")
+        summary["removed"].extend(f"{service_type}/{provider_id}" for provider_id in old if provider_id not in new)
+    return summary
+
+
+class ConfigReloader:
+    def __init__(self, runtime: "AgentRuntime", path: str, interval_seconds: float = 5.0) -> None:
+        self.runtime = runtime
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.logger = get_logger("config_reload")
+        self._digest: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    def _read_digest(self) -> Optional[str]:
+        try:
+            return hashlib.sha256(Path(self.path).read_bytes()).hexdigest()
+        except FileNotFoundError:
+            return None
+
+    async def reload(self, force: bool = True) -> Dict[str, Any]:
+        """Apply the file if it changed (or always when ``force``); failures keep the current generation."""
+
+        async with self._lock:
+            digest = self._read_digest()
+            if digest is None:
+                CONFIG_RELOADS.inc("failed")
+                raise FileNotFoundError(f"Config file {self.path} does not exist")
+            if not force and digest == self._digest:
+                return {"generation": self.runtime.generation.number, "changed": False}
+            try:
+                settings = Settings(**load_overrides(self.path))
+                if settings.use_azure_openai_pool:
+                    # Reject a bad pool now rather than on the first chat request after the swap.
+                    parse_pool_config(
+                        settings.azure_openai_pool,
+                        default_api_key=settings.azure_openai_api_key or "",
+                        default_api_version=settings.azure_openai_api_version or "",
+                    )
+            except Exception as exc:
+                CONFIG_RELOADS.inc("failed")
+                log_event(
+                    self.logger,
+                    logging.ERROR,
+                    "config.reload.failed",
+                    "Config reload rejected; keeping current providers",
+                    path=self.path,
+                    error=str(exc),
+                )
+                raise
+            self._digest = digest
+            summary = await self.runtime.reconfigure(settings)
+        CONFIG_RELOADS.inc("applied")
+        log_event(
+            self.logger,
+            logging.INFO,
+            "config.reload.applied",
+            "Provider configuration reloaded",
+            path=self.path,
+            **summary,
+        )
+        return {**summary, "changed": True}
+
+    async def run(self) -> None:
+        """Poll the file until cancelled; a bad edit is logged and retried on the next change."""
+
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            if self._read_digest() in (None, self._digest):
+                continue
+            try:
+                await self.reload(force=False)
+            except Exception:  # noqa: BLE001 - logged in reload()
+                self._digest = self._read_digest()
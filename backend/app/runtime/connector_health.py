@@ -0,0 +1,181 @@
+"""Cached connector validation and the provider health scores derived from it.
+
+``validate()`` calls can be network round trips (ServiceNow token, Jira,
+``models.list()``), so they run concurrently, each bounded by a timeout, on a
+background schedule. ``/v1/admin/config/validate`` serves the last results.
+Each provider's score is ``0.5 ** consecutive_failures``. A provider is
+unhealthy once it has failed ``unhealthy_after`` validations in a row, and
+chat skips optional work (RAG) on unhealthy providers instead of waiting for
+them to time out.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..common.logging import get_logger, log_event
+from ..models import ValidationDetail, ValidationResponse
+from ..registry.service_registry import SERVICE_TYPES
+from .config_reload import ConnectorGeneration
+
+
+@dataclass(frozen=True)
+class ProviderHealth:
+    service_type: str
+    provider: str
+    status: str
+    reason: str
+    checked_at: datetime
+    latency_ms: float
+    consecutive_failures: int = 0
+
+    @property
+    def score(self) -> float:
+        return 0.5**self.consecutive_failures
+
+    def to_detail(self) -> ValidationDetail:
+        return ValidationDetail(
+            service_type=self.service_type,
+            provider=self.provider,
+            status=self.status,
+            reason=self.reason,
+            score=self.score,
+            latency_ms=self.latency_ms,
+            checked_at=self.checked_at.isoformat(),
+        )
+
+
+class ConnectorHealth:
+    def __init__(self, *, timeout_seconds: float = 5.0, unhealthy_after: int = 2) -> None:
+        self.timeout_seconds = timeout_seconds
+        self.unhealthy_after = unhealthy_after
+        self.logger = get_logger("connector_health")
+        self.entries: Dict[Tuple[str, str], ProviderHealth] = {}
+        self.checked_at: Optional[datetime] = None
+        self._refresh: Optional[Tuple[int, asyncio.Future]] = None
+
+    async def _check(self, service_type: str, provider_id: str, connector: Any) -> ProviderHealth:
+        started = time.perf_counter()
+        try:
+            if isinstance(connector, Exception):
+                status, reason = "error", f"Connector could not be built: {connector}"
+            else:
+                result = await asyncio.wait_for(connector.validate(), self.timeout_seconds)
+                status, reason = result.get("status", "unknown"), result.get("reason", "")
+        except asyncio.TimeoutError:
+            status, reason = "timeout", f"No answer within {self.timeout_seconds:g}s"
+        except Exception as exc:  # noqa: BLE001
+            status, reason = "error", str(exc)
+        previous = self.entries.get((service_type, provider_id))
+        failures = 0 if status == "ok" else (previous.consecutive_failures if previous else 0) + 1
+        return ProviderHealth(
+            service_type,
+            provider_id,
+            status,
+            reason,
+            datetime.now(timezone.utc),
+            round((time.perf_counter() - started) * 1000, 1),
+            failures,
+        )
+
+    @staticmethod
+    def _build(generation: ConnectorGeneration) -> Dict[Tuple[str, str], Any]:
+        """Build each connector on its own; a factory that raises (missing SDK, bad config) yields its error."""
+
+        built: Dict[Tuple[str, str], Any] = {}
+        for service_type in SERVICE_TYPES:
+            connectors = generation.connectors(service_type)
+            for provider_id in connectors:
+                try:
+                    built[(service_type, provider_id)] = connectors[provider_id]
+                except Exception as exc:  # noqa: BLE001
+                    built[(service_type, provider_id)] = exc
+        return built
+
+    async def _run_refresh(self, generation: ConnectorGeneration) -> ValidationResponse:
+        with generation.pinned():
+            # Building a connector can import its SDK; keep that off the event loop.
+            built = await asyncio.to_thread(self._build, generation)
+            checks = [self._check(*key, connector) for key, connector in built.items()]
+            results: List[ProviderHealth] = await asyncio.gather(*checks)
+        self.entries = {(entry.service_type, entry.provider): entry for entry in results}
+        self.checked_at = datetime.now(timezone.utc)
+        unhealthy = [f"{entry.service_type}/{entry.provider}" for entry in results if not self._healthy(entry)]
+        if unhealthy:
+            log_event(
+                self.logger,
+                logging.WARNING,
+                "connector.health.unhealthy",
+                "Connectors failing validation",
+                providers=unhealthy,
+            )
+        return self.view(generation)
+
+    async def refresh(self, generation: ConnectorGeneration) -> ValidationResponse:
+        """Validate every connector of ``generation`` now; concurrent callers share one run."""
+
+        if self._refresh is None or self._refresh[1].done() or self._refresh[0] != generation.number:
+            self._refresh = (generation.number, asyncio.ensure_future(self._run_refresh(generation)))
+        return await asyncio.shield(self._refresh[1])
+
+    async def run(self, current: Callable[[], ConnectorGeneration], interval_seconds: float) -> None:
+        """Refresh every ``interval_seconds`` until cancelled."""
+
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.refresh(current())
+            except Exception as exc:  # noqa: BLE001 - keep validating on the next tick
+                log_event(
+                    self.logger,
+                    logging.ERROR,
+                    "connector.health.refresh_failed",
+                    "Connector validation run failed",
+                    error=f"{type(exc).__name__}: {exc}",
+                )
+
+    def _healthy(self, entry: ProviderHealth) -> bool:
+        return entry.consecutive_failures < self.unhealthy_after
+
+    def healthy(self, service_type: str, provider_id: str) -> bool:
+        """Unvalidated providers count as healthy."""
+
+        entry = self.entries.get((service_type, provider_id))
+        return entry is None or self._healthy(entry)
+
+    def score(self, service_type: str, provider_id: str) -> float:
+        entry = self.entries.get((service_type, provider_id))
+        return entry.score if entry is not None else 1.0
+
+    def view(self, generation: ConnectorGeneration) -> ValidationResponse:
+        """Cached results for the connectors of ``generation``; ones not validated yet are ``pending``."""
+
+        details = []
+        for service_type in SERVICE_TYPES:
+            for provider_id in generation.connectors(service_type):
+                entry = self.entries.get((service_type, provider_id))
+                if entry is None:
+                    details.append(
+                        ValidationDetail(
+                            service_type=service_type,
+                            provider=provider_id,
+                            status="pending",
+                            reason="Not validated yet",
+                        )
+                    )
+                else:
+                    details.append(entry.to_detail())
+        if self.checked_at is None:
+            overall = "pending"
+        else:
+            overall = "ok" if all(item.status == "ok" for item in details) else "attention"
+        return ValidationResponse(
+            status=overall,
+            results=details,
+            checked_at=self.checked_at.isoformat() if self.checked_at else None,
+        )
@@ -7,6 +7,7 @@ class ContextBuilder:
     def build(self, history: List[ChatMessage], rag_results: List[Dict[str, Any]]) -> List[Dict[str, str]]:
         conversation = [{"role": msg.role, "content": msg.content} for msg in history]
         if rag_results:
-            snippets = "\n".join([item["snippet"] for item in rag_results])
+            # RAG connectors return {"text", "score"}; "snippet" is the older key.
+            snippets = "\n".join([item.get("text") or item.get("snippet", "") for item in rag_results])
             conversation.append({"role": "system", "content": f"Knowledge snippets:\n{snippets}"})
         return conversation
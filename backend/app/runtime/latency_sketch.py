@@ -0,0 +1,241 @@
+"""Mergeable streaming latency sketches with sliding time windows.
+
+``LatencyHistogram`` buckets values on a logarithmic scale (the DDSketch/HDR
+idea): every quantile it reports is within ``relative_accuracy`` of the true
+value, memory is bounded by the number of distinct buckets (a few hundred for
+latencies between microseconds and hours), and two histograms merge by adding
+bucket counts. ``WindowedHistogram`` keeps a small ring of such histograms so
+``1m``/``5m``/``1h`` views cost O(1) memory regardless of traffic.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Latencies at or below this many milliseconds share one "zero" bucket.
+_MIN_VALUE_MS = 1e-3
+
+WINDOWS: Dict[str, tuple[float, int]] = {
+    # name: (window seconds, ring slots)
+    "1m": (60.0, 6),
+    "5m": (300.0, 10),
+    "1h": (3600.0, 12),
+}
+QUANTILES: Dict[str, float] = {"p50": 0.5, "p95": 0.95, "p99": 0.99, "p999": 0.999}
+
+
+class LatencyHistogram:
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value <= _MIN_VALUE_MS:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge histograms with different accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-safe copy, so histograms can be shipped between processes and merged there."""
+
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "buckets": [[index, count] for index, count in self.buckets.items()],
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls(state["relative_accuracy"])
+        histogram.buckets = {int(index): int(count) for index, count in state["buckets"]}
+        histogram.zero_count = state["zero_count"]
+        histogram.count = state["count"]
+        histogram.total = state["total"]
+        histogram.min = state["min"]
+        histogram.max = state["max"]
+        return histogram
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def quantile(self, quantile: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = quantile * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return self.min
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                estimate = 2 * self._gamma**index / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+@dataclass
+class _Slot:
+    epoch: int
+    histogram: LatencyHistogram
+    failures: int = 0
+
+
+@dataclass
+class WindowedHistogram:
+    """Ring of histogram slots covering roughly the last ``window_seconds``."""
+
+    window_seconds: float
+    slots: int
+    relative_accuracy: float = 0.01
+    _ring: List[_Slot] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.slot_seconds = self.window_seconds / self.slots
+        self._ring = [_Slot(-1, LatencyHistogram(self.relative_accuracy)) for _ in range(self.slots)]
+
+    def _slot(self, now: float) -> _Slot:
+        epoch = int(now // self.slot_seconds)
+        slot = self._ring[epoch % self.slots]
+        if slot.epoch != epoch:
+            slot.epoch = epoch
+            slot.histogram.clear()
+            slot.failures = 0
+        return slot
+
+    def add(self, value: float, now: float, failed: bool = False) -> None:
+        slot = self._slot(now)
+        slot.histogram.add(value)
+        if failed:
+            slot.failures += 1
+
+    def to_state(self) -> List[Dict[str, Any]]:
+        return [
+            {"epoch": slot.epoch, "histogram": slot.histogram.to_state(), "failures": slot.failures}
+            for slot in self._ring
+            if slot.epoch >= 0
+        ]
+
+    def merge_state(self, state: List[Dict[str, Any]]) -> None:
+        """Fold in another ring of the same geometry; slots older than ours are stale and dropped."""
+
+        for other in state:
+            epoch = other["epoch"]
+            slot = self._ring[epoch % self.slots]
+            if epoch < slot.epoch:
+                continue
+            if epoch > slot.epoch:
+                slot.epoch = epoch
+                slot.histogram.clear()
+                slot.failures = 0
+            slot.histogram.merge(LatencyHistogram.from_state(other["histogram"]))
+            slot.failures += other["failures"]
+
+    def merged(self, now: float) -> tuple[LatencyHistogram, int]:
+        current = int(now // self.slot_seconds)
+        result = LatencyHistogram(self.relative_accuracy)
+        failures = 0
+        for slot in self._ring:
+            if 0 <= current - slot.epoch < self.slots:
+                result.merge(slot.histogram)
+                failures += slot.failures
+        return result, failures
+
+
+def summarize(histogram: LatencyHistogram, failures: Optional[int] = None) -> Dict[str, Optional[float]]:
+    summary: Dict[str, Optional[float]] = {"count": histogram.count}
+    if failures is not None:
+        summary["failures"] = failures
+    mean = histogram.mean
+    summary["mean_ms"] = round(mean, 2) if mean is not None else None
+    for label, quantile in QUANTILES.items():
+        value = histogram.quantile(quantile)
+        summary[f"{label}_ms"] = round(value, 2) if value is not None else None
+    summary["max_ms"] = round(histogram.max, 2) if histogram.max is not None else None
+    return summary
+
+
+class LatencyTracker:
+    """Latency and failure counts for one endpoint or provider across all windows."""
+
+    def __init__(self, clock: Callable[[], float] = time.time, relative_accuracy: float = 0.01) -> None:
+        self._clock = clock
+        self.windows = {
+            name: WindowedHistogram(seconds, slots, relative_accuracy) for name, (seconds, slots) in WINDOWS.items()
+        }
+        self.lifetime = LatencyHistogram(relative_accuracy)
+        self.failures = 0
+
+    def record(self, latency_ms: float, failed: bool = False) -> None:
+        now = self._clock()
+        for window in self.windows.values():
+            window.add(latency_ms, now, failed)
+        self.lifetime.add(latency_ms)
+        if failed:
+            self.failures += 1
+
+    def window(self, name: str) -> LatencyHistogram:
+        return self.windows[name].merged(self._clock())[0]
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "windows": {name: window.to_state() for name, window in self.windows.items()},
+            "lifetime": self.lifetime.to_state(),
+            "failures": self.failures,
+        }
+
+    def merge_state(self, state: Dict[str, Any]) -> None:
+        for name, ring in state["windows"].items():
+            if name in self.windows:
+                self.windows[name].merge_state(ring)
+        self.lifetime.merge(LatencyHistogram.from_state(state["lifetime"]))
+        self.failures += state["failures"]
+
+    def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        now = self._clock()
+        result = {}
+        for name, window in self.windows.items():
+            histogram, failures = window.merged(now)
+            result[name] = summarize(histogram, failures)
+        result["lifetime"] = summarize(self.lifetime, self.failures)
+        return result
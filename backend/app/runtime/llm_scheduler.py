@@ -0,0 +1,283 @@
+"""Client-side token budgets and fair queueing in front of the LLM connectors.
+
+Each rate-limited provider gets a lane with two token buckets: one in LLM
+tokens per minute and one in requests per minute. A call reserves its
+estimated cost (prompt estimate + ``max_tokens``). When the buckets can cover
+it and nobody is waiting, the call goes straight through. Otherwise it waits in
+a queue keyed by tenant (or channel), and queues are served round-robin so one
+busy tenant cannot starve the others. Before queueing, the lane estimates how
+long the backlog ahead of the call takes to drain at the refill rate. If that
+exceeds ``max_wait_seconds`` the call is shed at once with a 503 and
+``Retry-After`` instead of being sent into an upstream 429. After the call, the
+reservation is settled against the ``usage`` the provider reports.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from ..common.errors import QueueDeadlineExceeded
+from ..common.metrics import LLM_QUEUE_SHED, LLM_QUEUE_WAIT
+from .latency_sketch import LatencyTracker, summarize
+from .stats import DEFAULT_WINDOW
+
+# Per-message framing overhead in the chat completions format.
+_TOKENS_PER_MESSAGE = 4
+
+
+def estimate_prompt_tokens(messages: Iterable[Dict[str, Any]]) -> int:
+    """Rough prompt size: ~4 characters per token plus per-message framing."""
+
+    total = 0
+    for message in messages:
+        total += len(str(message.get("content") or "")) // 4 + _TOKENS_PER_MESSAGE
+    return total
+
+
+def parse_rate_limits(raw: str) -> Dict[str, tuple[float, float]]:
+    """Parse ``provider=tpm:rpm`` pairs (comma separated); ``0`` leaves that bucket unlimited."""
+
+    limits: Dict[str, tuple[float, float]] = {}
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        provider, sep, budget = item.partition("=")
+        tpm, _, rpm = budget.partition(":")
+        try:
+            if not sep or not provider.strip():
+                raise ValueError
+            limits[provider.strip()] = (float(tpm or 0), float(rpm or 0))
+        except ValueError:
+            raise ValueError(f"Invalid LLM rate limit {item!r}; expected provider=tpm:rpm") from None
+    return limits
+
+
+class _Bucket:
+    __slots__ = ("capacity", "rate", "level", "updated")
+
+    def __init__(self, per_minute: float, now: float) -> None:
+        self.capacity = per_minute if per_minute > 0 else math.inf
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        if self.rate and now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def seconds_until(self, amount: float) -> float:
+        deficit = amount - self.level
+        if deficit <= 0 or self.capacity == math.inf:
+            return 0.0
+        return deficit / self.rate
+
+
+class _Waiter:
+    __slots__ = ("key", "tokens", "future", "enqueued")
+
+    def __init__(self, key: str, tokens: float, future: asyncio.Future, enqueued: float) -> None:
+        self.key = key
+        self.tokens = tokens
+        self.future = future
+        self.enqueued = enqueued
+
+
+class Reservation:
+    """Budget held by one admitted call; ``settle`` corrects it to the reported usage."""
+
+    __slots__ = ("_lane", "tokens", "waited_ms", "_settled")
+
+    def __init__(self, lane: Optional["_Lane"], tokens: float, waited_ms: float) -> None:
+        self._lane = lane
+        self.tokens = tokens
+        self.waited_ms = waited_ms
+        self._settled = False
+
+    def settle(self, usage: Optional[Dict[str, Any]] = None) -> None:
+        if self._settled or self._lane is None:
+            return
+        self._settled = True
+        actual = (usage or {}).get("total_tokens")
+        if isinstance(actual, (int, float)):
+            self._lane.refund(self.tokens - actual)
+
+
+class _Lane:
+    def __init__(self, provider: str, tpm: float, rpm: float, max_wait_seconds: float, clock: Callable[[], float]):
+        self.provider = provider
+        self.max_wait_seconds = max_wait_seconds
+        self._clock = clock
+        now = clock()
+        self.tokens = _Bucket(tpm, now)
+        self.requests = _Bucket(rpm, now)
+        self.queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self.queued = 0
+        self.queued_tokens = 0.0
+        self.shed = 0
+        self.waits = LatencyTracker(clock=time.time)
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self, now: float) -> None:
+        self.tokens.refill(now)
+        self.requests.refill(now)
+
+    def _take(self, tokens: float) -> None:
+        self.tokens.level -= tokens
+        self.requests.level -= 1
+
+    def _wait_for(self, tokens: float, requests: float) -> float:
+        return max(self.tokens.seconds_until(tokens), self.requests.seconds_until(requests))
+
+    def refund(self, tokens: float) -> None:
+        self.tokens.refill(self._clock())
+        self.tokens.level = min(self.tokens.capacity, self.tokens.level + tokens)
+        if tokens > 0 and self.queued:
+            self._pump()
+
+    def _shed(self, reason: str, retry_after: float) -> QueueDeadlineExceeded:
+        self.shed += 1
+        LLM_QUEUE_SHED.inc(self.provider, reason)
+        return QueueDeadlineExceeded(
+            f"LLM provider {self.provider} is at its rate limit; queue wait would exceed "
+            f"{self.max_wait_seconds:g}s",
+            retry_after=retry_after,
+        )
+
+    def _record_wait(self, waited_ms: float) -> None:
+        self.waits.record(waited_ms)
+        LLM_QUEUE_WAIT.observe(waited_ms / 1000, self.provider)
+
+    async def acquire(self, key: str, tokens: float) -> Reservation:
+        # A request larger than a whole minute of budget could never run; let it through once the bucket is full.
+        tokens = min(tokens, self.tokens.capacity)
+        now = self._clock()
+        self._refill(now)
+        if not self.queued and self._wait_for(tokens, 1) == 0:
+            self._take(tokens)
+            self._record_wait(0.0)
+            return Reservation(self, tokens, 0.0)
+
+        # Everything already queued drains first at the refill rate.
+        expected = self._wait_for(self.queued_tokens + tokens, self.queued + 1)
+        if expected > self.max_wait_seconds:
+            raise self._shed("deadline", expected)
+
+        waiter = _Waiter(key, tokens, asyncio.get_running_loop().create_future(), now)
+        self.queues.setdefault(key, deque()).append(waiter)
+        self.queued += 1
+        self.queued_tokens += tokens
+        if self._timer is None:
+            self._pump()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            # _pump may have granted the call (and taken its budget) in the same tick the deadline passed;
+            # then the call goes ahead on that budget instead of being shed with it.
+            if not self._granted(waiter):
+                self._remove(waiter)
+                raise self._shed("timeout", self._wait_for(self.queued_tokens + tokens, self.queued + 1)) from None
+        except asyncio.CancelledError:
+            if self._granted(waiter):
+                # Granted just as the caller went away: hand the budget back.
+                self.requests.level = min(self.requests.capacity, self.requests.level + 1)
+                self.refund(tokens)
+            else:
+                self._remove(waiter)
+            raise
+        waited_ms = (self._clock() - waiter.enqueued) * 1000
+        self._record_wait(waited_ms)
+        return Reservation(self, tokens, waited_ms)
+
+    @staticmethod
+    def _granted(waiter: _Waiter) -> bool:
+        return waiter.future.done() and not waiter.future.cancelled()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self.queues.get(waiter.key)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del self.queues[waiter.key]
+        self.queued -= 1
+        self.queued_tokens -= waiter.tokens
+        waiter.future.cancel()
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(max(delay, 0.001), self._pump)
+
+    def _pump(self) -> None:
+        """Admit queued calls round-robin across keys while the buckets allow."""
+
+        self._timer = None
+        self._refill(self._clock())
+        while self.queues:
+            key, queue = next(iter(self.queues.items()))
+            waiter = queue[0]
+            wait = self._wait_for(waiter.tokens, 1)
+            if wait > 0:
+                self._schedule(wait)
+                return
+            queue.popleft()
+            self.queued -= 1
+            self.queued_tokens -= waiter.tokens
+            # Rotate: this key goes to the back of the line (or away if it is empty).
+            del self.queues[key]
+            if queue:
+                self.queues[key] = queue
+            if not waiter.future.done():
+                self._take(waiter.tokens)
+                waiter.future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._refill(self._clock())
+        waits = summarize(self.waits.window(DEFAULT_WINDOW))
+        return {
+            "provider": self.provider,
+            "depth": self.queued,
+            "queued_tokens": round(self.queued_tokens),
+            "tenants_waiting": len(self.queues),
+            "tokens_available": None if self.tokens.capacity == math.inf else math.floor(self.tokens.level),
+            "requests_available": None if self.requests.capacity == math.inf else math.floor(self.requests.level),
+            "shed": self.shed,
+            "wait_window": DEFAULT_WINDOW,
+            "wait_p50_ms": waits["p50_ms"],
+            "wait_p95_ms": waits["p95_ms"],
+            "wait_p99_ms": waits["p99_ms"],
+        }
+
+
+class LLMScheduler:
+    """Per-provider lanes; providers without a configured limit pass straight through."""
+
+    def __init__(
+        self,
+        limits: Dict[str, tuple[float, float]],
+        *,
+        max_wait_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.lanes = {
+            provider: _Lane(provider, tpm, rpm, max_wait_seconds, clock)
+            for provider, (tpm, rpm) in limits.items()
+            if tpm > 0 or rpm > 0
+        }
+
+    async def acquire(
+        self, provider: str, key: str, messages: List[Dict[str, Any]], max_tokens: int = 0
+    ) -> Reservation:
+        lane = self.lanes.get(provider)
+        if lane is None:
+            return Reservation(None, 0, 0.0)
+        return await lane.acquire(key, estimate_prompt_tokens(messages) + max_tokens)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [lane.snapshot() for lane in self.lanes.values()]
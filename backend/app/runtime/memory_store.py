@@ -4,14 +4,24 @@ from ..models import ChatMessage
 
 
 class MemoryStore:
+    """Chat turns per session. Async so stores backed by a database can keep I/O off the event loop."""
+
     def __init__(self) -> None:
         self._sessions: Dict[str, List[ChatMessage]] = {}
 
-    def create_session(self, session_id: str) -> None:
+    async def create_session(self, session_id: str) -> None:
         self._sessions.setdefault(session_id, [])
 
-    def append_turn(self, session_id: str, message: ChatMessage) -> None:
+    async def append_turn(self, session_id: str, message: ChatMessage) -> None:
         self._sessions.setdefault(session_id, []).append(message)
 
-    def history(self, session_id: str) -> List[ChatMessage]:
+    async def history(self, session_id: str) -> List[ChatMessage]:
         return self._sessions.get(session_id, [])
+
+    async def session_count(self) -> int:
+        return len(self._sessions)
+
+    def cached_session_count(self) -> int:
+        """Session count for scrape-time gauges, which cannot await."""
+
+        return len(self._sessions)
@@ -0,0 +1,81 @@
+"""Startup checks that decide when a pod may receive traffic.
+
+Warm-up (Whisper preload, connector construction and pool connections,
+connector validation) runs in the background after the server starts, so
+``/livez`` answers immediately while ``/readyz`` returns 503 until every
+required check has passed. Optional checks are reported but never block.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+
+class CheckFailed(Exception):
+    """Raised by a check body to fail with a readable detail instead of a traceback."""
+
+
+@dataclass
+class ReadinessCheck:
+    name: str
+    required: bool
+    status: str = PENDING
+    detail: str = ""
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round(((self.finished_at or time.monotonic()) - self.started_at) * 1000, 1)
+        return {"status": self.status, "required": self.required, "detail": self.detail, "elapsed_ms": elapsed}
+
+
+class Readiness:
+    def __init__(self) -> None:
+        self.checks: Dict[str, ReadinessCheck] = {}
+
+    def add(self, name: str, *, required: bool = True) -> ReadinessCheck:
+        check = self.checks[name] = ReadinessCheck(name, required)
+        return check
+
+    @property
+    def ready(self) -> bool:
+        return all(check.status == READY for check in self.checks.values() if check.required)
+
+    def is_ready(self, name: str) -> bool:
+        check = self.checks.get(name)
+        return check is None or check.status == READY
+
+    async def run(
+        self, name: str, body: Callable[[], Awaitable[Optional[str]]], *, timeout: Optional[float] = None
+    ) -> None:
+        """Run one registered check; its return value becomes the detail. Never raises."""
+
+        check = self.checks[name]
+        check.status, check.started_at = RUNNING, time.monotonic()
+        try:
+            detail = await asyncio.wait_for(body(), timeout)
+        except asyncio.TimeoutError:
+            check.status, check.detail = FAILED, f"timed out after {timeout:g}s"
+        except CheckFailed as exc:
+            check.status, check.detail = FAILED, str(exc)
+        except Exception as exc:  # noqa: BLE001
+            check.status, check.detail = FAILED, f"{type(exc).__name__}: {exc}"
+        else:
+            check.status, check.detail = READY, detail or ""
+        check.finished_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "checks": {name: check.to_dict() for name, check in self.checks.items()},
+        }
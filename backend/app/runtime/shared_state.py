@@ -0,0 +1,161 @@
+"""State shared by the worker processes of one pod (``uvicorn --workers N``).
+
+Everything in one process is per worker, so with several workers a session
+created on one worker would be unknown to the next, and ``/metrics`` or
+``/v1/runtime`` would describe whichever worker answered. With
+``SHARED_STATE_PATH`` set, the workers share a SQLite database (WAL mode, so
+readers never block the writer):
+
+- ``SharedMemoryStore`` keeps chat sessions in it instead of a dict.
+- ``SharedState.publish`` stores this worker's metric counters, histograms
+  and request stats every ``SHARED_STATE_PUBLISH_INTERVAL_SECONDS``, and
+  ``peers()`` returns the other workers' latest copies for merging.
+
+A worker deletes its row when it shuts down, and rows not refreshed for
+``stale_after_seconds`` (a worker that was killed) are pruned, so merged
+totals only cover live workers. Like any process restart, that shows up as a
+counter reset, which Prometheus ``rate()`` handles. Put the file on storage
+that lives exactly as long as the pod (an ``emptyDir`` or ``/dev/shm``).
+SQLite calls block, so the async entry points run them in a thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..models import ChatMessage
+from .memory_store import MemoryStore
+from .stats import StatsTracker
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, created_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS turns (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_by_session ON turns (session_id, seq);
+CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, updated_at REAL NOT NULL, snapshot TEXT NOT NULL);
+"""
+
+
+class SharedState:
+    def __init__(self, path: str, *, worker_id: Optional[str] = None, stale_after_seconds: float = 5.0) -> None:
+        self.path = path
+        self.stale_after_seconds = stale_after_seconds
+        # The start time keeps a recycled PID from overwriting an exited worker's totals.
+        self.worker_id = worker_id or f"{os.getpid()}-{int(time.time() * 1000)}"
+        self._local = threading.local()
+        self.connection().executescript(_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        """One autocommitting connection per thread."""
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def publish(self, snapshot: Dict[str, Any]) -> None:
+        self.connection().execute(
+            "INSERT INTO workers (worker, updated_at, snapshot) VALUES (?, ?, ?) "
+            "ON CONFLICT (worker) DO UPDATE SET updated_at = excluded.updated_at, snapshot = excluded.snapshot",
+            (self.worker_id, time.time(), json.dumps(snapshot, separators=(",", ":"))),
+        )
+
+    def peers(self) -> List[Dict[str, Any]]:
+        """The latest snapshot of every other live worker; rows of workers that stopped publishing are pruned."""
+
+        conn = self.connection()
+        conn.execute("DELETE FROM workers WHERE updated_at < ?", (time.time() - self.stale_after_seconds,))
+        rows = conn.execute("SELECT snapshot FROM workers WHERE worker != ?", (self.worker_id,))
+        return [json.loads(snapshot) for (snapshot,) in rows]
+
+    def retire(self) -> None:
+        """Remove this worker's row at shutdown."""
+
+        self.connection().execute("DELETE FROM workers WHERE worker = ?", (self.worker_id,))
+
+    def workers(self) -> List[Dict[str, Any]]:
+        rows = self.connection().execute("SELECT worker, updated_at FROM workers ORDER BY worker")
+        return [{"worker": worker, "updated_at": updated_at} for worker, updated_at in rows]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SharedMemoryStore(MemoryStore):
+    """``MemoryStore`` backed by ``SharedState`` so every worker sees every session."""
+
+    def __init__(self, shared: SharedState) -> None:
+        self.shared = shared
+        self._session_count = 0
+
+    def _create_session(self, session_id: str) -> None:
+        self.shared.connection().execute(
+            "INSERT OR IGNORE INTO sessions (session_id, created_at) VALUES (?, ?)", (session_id, time.time())
+        )
+
+    def _append_turn(self, session_id: str, message: str) -> None:
+        self._create_session(session_id)
+        self.shared.connection().execute("INSERT INTO turns (session_id, message) VALUES (?, ?)", (session_id, message))
+
+    def _history(self, session_id: str) -> List[str]:
+        rows = self.shared.connection().execute(
+            "SELECT message FROM turns WHERE session_id = ? ORDER BY seq", (session_id,)
+        )
+        return [message for (message,) in rows]
+
+    def _count(self) -> int:
+        return self.shared.connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    async def create_session(self, session_id: str) -> None:
+        await asyncio.to_thread(self._create_session, session_id)
+
+    async def append_turn(self, session_id: str, message: ChatMessage) -> None:
+        await asyncio.to_thread(self._append_turn, session_id, message.model_dump_json())
+
+    async def history(self, session_id: str) -> List[ChatMessage]:
+        messages = await asyncio.to_thread(self._history, session_id)
+        return [ChatMessage.model_validate_json(message) for message in messages]
+
+    async def session_count(self) -> int:
+        self._session_count = await asyncio.to_thread(self._count)
+        return self._session_count
+
+    def cached_session_count(self) -> int:
+        """The count from the last ``session_count()``; the worker's publish loop refreshes it."""
+
+        return self._session_count
+
+
+async def peer_snapshots(shared: Optional[SharedState]) -> List[Dict[str, Any]]:
+    """Other workers' snapshots, read off the event loop; empty in single-process mode."""
+
+    if shared is None:
+        return []
+    return await asyncio.to_thread(shared.peers)
+
+
+def merged_stats(local: StatsTracker, peers: Iterable[Dict[str, Any]]) -> StatsTracker:
+    """``local`` itself without peers; otherwise a new tracker adding the peers' published stats."""
+
+    peer_stats = [peer["stats"] for peer in peers if "stats" in peer]
+    if not peer_stats:
+        return local
+    merged = StatsTracker(local._clock)
+    merged.merge_state(local.to_state())
+    for state in peer_stats:
+        merged.merge_state(state)
+    return merged
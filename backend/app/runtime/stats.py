@@ -1,71 +1,119 @@
 from __future__ import annotations
 
-from collections import deque
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Deque, Optional
+from typing import Any, Callable, Dict, Optional
 
+from .latency_sketch import LatencyTracker
 
-def _percentile(latencies: Deque[float], percentile: float) -> Optional[float]:
-    if not latencies:
-        return None
-    ordered = sorted(latencies)
-    k = (len(ordered) - 1) * percentile
-    f = int(k)
-    c = min(f + 1, len(ordered) - 1)
-    if f == c:
-        return ordered[int(k)]
-    d0 = ordered[f] * (c - k)
-    d1 = ordered[c] * (k - f)
-    return d0 + d1
+DEFAULT_WINDOW = "5m"
+# Latency for providers the registry does not know is grouped here, so client input cannot add trackers.
+UNKNOWN_PROVIDER = "unknown"
 
 
 @dataclass
 class StatsSnapshot:
-    backend_ready: bool
-    stt_ready: bool
     started_at: datetime
     total_requests: int
     total_failures: int
     last_request_at: Optional[datetime]
     last_latency_ms: Optional[float]
-    latencies: Deque[float] = field(default_factory=deque)
+    windows: Dict[str, Dict[str, Optional[float]]] = field(default_factory=dict)
     last_error: Optional[str] = None
 
 
 class StatsTracker:
-    def __init__(self, window: int = 50) -> None:
+    """Request counters plus windowed latency sketches, overall and per endpoint/provider."""
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
         self.started_at = datetime.now(timezone.utc)
         self.total_requests = 0
         self.total_failures = 0
         self.last_request_at: Optional[datetime] = None
         self.last_latency_ms: Optional[float] = None
         self.last_error: Optional[str] = None
-        self.latencies: Deque[float] = deque(maxlen=window)
+        self.overall = LatencyTracker(clock)
+        self.endpoints: Dict[str, LatencyTracker] = {}
+        self.providers: Dict[str, LatencyTracker] = {}
+
+    def _tracker(self, group: Dict[str, LatencyTracker], key: str) -> LatencyTracker:
+        tracker = group.get(key)
+        if tracker is None:
+            tracker = group[key] = LatencyTracker(self._clock)
+        return tracker
 
-    def record(self, latency_ms: float, error: Optional[Exception] = None) -> None:
+    def record(
+        self,
+        latency_ms: float,
+        error: Optional[Exception] = None,
+        *,
+        endpoint: Optional[str] = None,
+        provider: Optional[str] = None,
+    ) -> None:
+        failed = error is not None
         self.total_requests += 1
         self.last_request_at = datetime.now(timezone.utc)
         self.last_latency_ms = round(latency_ms, 2)
-        self.latencies.append(self.last_latency_ms)
+        self.overall.record(latency_ms, failed)
+        if endpoint:
+            self._tracker(self.endpoints, endpoint).record(latency_ms, failed)
+        if provider:
+            self._tracker(self.providers, provider).record(latency_ms, failed)
         if error:
             self.total_failures += 1
             self.last_error = str(error)[:160]
 
     def snapshot(self) -> StatsSnapshot:
         return StatsSnapshot(
-            backend_ready=True,
-            stt_ready=True,
             started_at=self.started_at,
             total_requests=self.total_requests,
             total_failures=self.total_failures,
             last_request_at=self.last_request_at,
             last_latency_ms=self.last_latency_ms,
-            latencies=self.latencies,
+            windows=self.overall.summary(),
             last_error=self.last_error,
         )
 
-    def percentiles(self) -> tuple[Optional[float], Optional[float]]:
-        p50 = _percentile(self.latencies, 0.5)
-        p95 = _percentile(self.latencies, 0.95)
-        return (p50, p95)
+    def percentiles(self, window: str = DEFAULT_WINDOW) -> tuple[Optional[float], Optional[float]]:
+        histogram = self.overall.window(window)
+        return (histogram.quantile(0.5), histogram.quantile(0.95))
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-safe copy of everything ``snapshot()``/``breakdown()`` report, for sharing across workers."""
+
+        return {
+            "started_at": self.started_at.isoformat(),
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+            "last_request_at": self.last_request_at.isoformat() if self.last_request_at else None,
+            "last_latency_ms": self.last_latency_ms,
+            "last_error": self.last_error,
+            "overall": self.overall.to_state(),
+            "endpoints": {name: tracker.to_state() for name, tracker in self.endpoints.items()},
+            "providers": {name: tracker.to_state() for name, tracker in self.providers.items()},
+        }
+
+    def merge_state(self, state: Dict[str, Any]) -> None:
+        """Add another tracker's counts; the "last request" fields follow whichever saw the latest request."""
+
+        self.started_at = min(self.started_at, datetime.fromisoformat(state["started_at"]))
+        self.total_requests += state["total_requests"]
+        self.total_failures += state["total_failures"]
+        last_request_at = datetime.fromisoformat(state["last_request_at"]) if state["last_request_at"] else None
+        if last_request_at is not None and (self.last_request_at is None or last_request_at > self.last_request_at):
+            self.last_request_at = last_request_at
+            self.last_latency_ms = state["last_latency_ms"]
+            self.last_error = state["last_error"] or self.last_error
+        self.overall.merge_state(state["overall"])
+        for name, tracker in state["endpoints"].items():
+            self._tracker(self.endpoints, name).merge_state(tracker)
+        for name, tracker in state["providers"].items():
+            self._tracker(self.providers, name).merge_state(tracker)
+
+    def breakdown(self) -> Dict[str, Dict[str, Dict[str, Dict[str, Optional[float]]]]]:
+        return {
+            "endpoints": {name: tracker.summary() for name, tracker in self.endpoints.items()},
+            "providers": {name: tracker.summary() for name, tracker in self.providers.items()},
+        }
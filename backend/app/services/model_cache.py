@@ -0,0 +1,361 @@
+"""Process-wide, memory-bounded cache for local Whisper models.
+
+Models are loaded at most once per ``(model_name, compute_type)`` key even when
+several requests ask for the same model concurrently. Residency is bounded by
+an approximate memory budget; the least recently used idle models are evicted
+first. Both the SpeechRouter's local provider and the playground
+``whisper_service`` share the instance returned by :func:`get_model_cache`, so
+the same weights are never resident twice.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..settings import Settings, get_settings
+
+CacheKey = Tuple[str, str]
+Loader = Callable[[str, str], Any]
+
+# Parameter counts (millions) for the public Whisper checkpoints.
+_MODEL_PARAMS_M = {
+    "tiny": 39,
+    "tiny.en": 39,
+    "base": 74,
+    "base.en": 74,
+    "small": 244,
+    "small.en": 244,
+    "distil-small.en": 166,
+    "medium": 769,
+    "medium.en": 769,
+    "distil-medium.en": 394,
+    "large-v1": 1550,
+    "large-v2": 1550,
+    "large-v3": 1550,
+    "large": 1550,
+    "distil-large-v2": 756,
+    "distil-large-v3": 756,
+}
+KNOWN_MODELS = frozenset(_MODEL_PARAMS_M)
+_BYTES_PER_PARAM = {
+    "int8": 1.0,
+    "int8_float16": 1.0,
+    "int8_float32": 1.0,
+    "int16": 2.0,
+    "float16": 2.0,
+    "bfloat16": 2.0,
+    "float32": 4.0,
+}
+# Tokenizer, CTranslate2 runtime buffers and allocator slack per loaded model.
+_RUNTIME_OVERHEAD_MB = 120.0
+
+
+class ModelDependencyError(RuntimeError):
+    """Raised when faster-whisper is not importable in this interpreter."""
+
+
+def estimate_model_mb(model_name: str, compute_type: str) -> float:
+    """Return an approximate resident size in MB for a Whisper model."""
+
+    params_m = _MODEL_PARAMS_M.get(model_name, _MODEL_PARAMS_M["medium"])
+    bytes_per_param = _BYTES_PER_PARAM.get(compute_type, 4.0)
+    return round(params_m * bytes_per_param + _RUNTIME_OVERHEAD_MB, 1)
+
+
+@dataclass
+class CacheEntry:
+    model: Any
+    approx_mb: float
+    load_ms: float
+    loaded_at: float = field(default_factory=time.time)
+    last_used_at: float = field(default_factory=time.time)
+    hits: int = 0
+    refcount: int = 0
+    evict_on_release: bool = False
+
+    def to_dict(self, key: CacheKey) -> Dict[str, Any]:
+        return {
+            "model": key[0],
+            "compute_type": key[1],
+            "approx_mb": self.approx_mb,
+            "load_ms": round(self.load_ms, 2),
+            "loaded_at": self.loaded_at,
+            "last_used_at": self.last_used_at,
+            "hits": self.hits,
+            "in_use": self.refcount,
+        }
+
+
+class ModelCache:
+    """LRU model cache with per-key load locks, reference counts and a memory budget.
+
+    Models handed out through :meth:`acquire`/:meth:`lease` are pinned until
+    released; pinned models are never evicted to make room for another load.
+    """
+
+    def __init__(
+        self,
+        loader: Loader,
+        *,
+        budget_mb: float,
+        estimator: Callable[[str, str], float] = estimate_model_mb,
+    ) -> None:
+        self._loader = loader
+        self._estimator = estimator
+        self.budget_mb = budget_mb
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[CacheKey, threading.Lock] = {}
+        self.loads = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_failures = 0
+        self.total_load_ms = 0.0
+
+    def _key_lock(self, key: CacheKey) -> threading.Lock:
+        with self._lock:
+            lock = self._load_locks.get(key)
+            if lock is None:
+                lock = self._load_locks[key] = threading.Lock()
+            return lock
+
+    @contextmanager
+    def _key_locked(self, key: CacheKey) -> Iterator[threading.Lock]:
+        """Hold the load lock for ``key``, taking the current one if it was pruned while we waited."""
+
+        while True:
+            lock = self._key_lock(key)
+            lock.acquire()
+            with self._lock:
+                if self._load_locks.get(key) is lock:
+                    break
+            lock.release()
+        try:
+            yield lock
+        finally:
+            lock.release()
+
+    def _evict_locked(self, key: CacheKey) -> None:
+        del self._entries[key]
+        # Drop the key's load lock too, so one-off model names do not accumulate. A lock that is
+        # held belongs to a load in progress; waiters on a pruned lock retry with a fresh one.
+        lock = self._load_locks.get(key)
+        if lock is not None and not lock.locked():
+            del self._load_locks[key]
+
+    def _touch(self, key: CacheKey, pin: bool) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            entry.last_used_at = time.time()
+            if pin:
+                entry.refcount += 1
+            self.hits += 1
+            return entry.model
+
+    def _resident_mb_locked(self) -> float:
+        return sum(entry.approx_mb for entry in self._entries.values())
+
+    def _make_room_locked(self, needed_mb: float) -> List[CacheKey]:
+        evicted: List[CacheKey] = []
+        resident_mb = self._resident_mb_locked()
+        # Oldest first; models currently in use stay resident even if that means exceeding the budget.
+        for key in list(self._entries):
+            if resident_mb + needed_mb <= self.budget_mb:
+                break
+            entry = self._entries[key]
+            if entry.refcount:
+                continue
+            self._evict_locked(key)
+            resident_mb -= entry.approx_mb
+            evicted.append(key)
+            self.evictions += 1
+        return evicted
+
+    def get(self, model_name: str, compute_type: str, on_load: Optional[Callable[[str], None]] = None) -> Any:
+        """Return a cached model without pinning it, loading it once if absent.
+
+        ``on_load`` receives human-readable progress lines and is only invoked
+        when this call actually performs the load.
+        """
+
+        return self._get(model_name, compute_type, on_load, pin=False)
+
+    def acquire(self, model_name: str, compute_type: str, on_load: Optional[Callable[[str], None]] = None) -> Any:
+        """Return a model pinned against eviction; pair every call with :meth:`release`."""
+
+        return self._get(model_name, compute_type, on_load, pin=True)
+
+    def release(self, model_name: str, compute_type: str) -> None:
+        key = (model_name, compute_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refcount == 0:
+                return
+            entry.refcount -= 1
+            if entry.refcount == 0 and entry.evict_on_release:
+                self._evict_locked(key)
+
+    @contextmanager
+    def lease(
+        self, model_name: str, compute_type: str, on_load: Optional[Callable[[str], None]] = None
+    ) -> Iterator[Any]:
+        model = self.acquire(model_name, compute_type, on_load)
+        try:
+            yield model
+        finally:
+            self.release(model_name, compute_type)
+
+    def _get(
+        self, model_name: str, compute_type: str, on_load: Optional[Callable[[str], None]], *, pin: bool
+    ) -> Any:
+        key = (model_name, compute_type)
+        model = self._touch(key, pin)
+        if model is not None:
+            return model
+
+        with self._key_locked(key) as lock:
+            # Another caller may have finished loading while we waited.
+            model = self._touch(key, pin)
+            if model is not None:
+                return model
+
+            approx_mb = self._estimator(model_name, compute_type)
+            with self._lock:
+                self.misses += 1
+                evicted = self._make_room_locked(approx_mb)
+            for evicted_key in evicted:
+                if on_load:
+                    on_load(f"Evicted model '{evicted_key[0]}' ({evicted_key[1]}) to stay within memory budget")
+
+            if on_load:
+                on_load(f"Loading model '{model_name}' on CPU (compute_type={compute_type})")
+            started = time.perf_counter()
+            try:
+                model = self._loader(model_name, compute_type)
+            except Exception:
+                with self._lock:
+                    self.load_failures += 1
+                    if self._load_locks.get(key) is lock:
+                        del self._load_locks[key]
+                raise
+            load_ms = (time.perf_counter() - started) * 1000
+
+            with self._lock:
+                # Re-check: concurrent loads of other keys may have filled the budget meanwhile.
+                self._make_room_locked(approx_mb)
+                self._entries[key] = CacheEntry(
+                    model=model, approx_mb=approx_mb, load_ms=load_ms, refcount=1 if pin else 0
+                )
+                self.loads += 1
+                self.total_load_ms += load_ms
+            if on_load:
+                on_load(f"Model ready in {load_ms:.0f} ms")
+            return model
+
+    def preload(self, model_name: str, compute_type: str) -> Dict[str, Any]:
+        self.get(model_name, compute_type)
+        with self._lock:
+            entry = self._entries.get((model_name, compute_type))
+            return entry.to_dict((model_name, compute_type)) if entry else {}
+
+    def unload(self, model_name: str, compute_type: Optional[str] = None) -> List[CacheKey]:
+        """Drop matching models; returns the keys that were resident.
+
+        Models that are in use are dropped as soon as their last lease is released.
+        """
+
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if key[0] == model_name and (compute_type is None or key[1] == compute_type)
+            ]
+            self._drop_locked(keys)
+        return keys
+
+    def warm_up(self, model_names: List[str], compute_type: str) -> List[Dict[str, Any]]:
+        """Load the given models ahead of traffic; failures are reported, not raised."""
+
+        report: List[Dict[str, Any]] = []
+        for model_name in model_names:
+            try:
+                report.append({"status": "ok", **self.preload(model_name, compute_type)})
+            except Exception as exc:  # noqa: BLE001
+                report.append({"status": "error", "model": model_name, "compute_type": compute_type, "error": str(exc)})
+        return report
+
+    def clear(self) -> None:
+        """Drop every model; models that are in use go as soon as their last lease is released."""
+
+        with self._lock:
+            self._drop_locked(list(self._entries))
+
+    def _drop_locked(self, keys: List[CacheKey]) -> None:
+        for key in keys:
+            entry = self._entries[key]
+            if entry.refcount:
+                entry.evict_on_release = True
+            else:
+                self._evict_locked(key)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            resident = [entry.to_dict(key) for key, entry in self._entries.items()]
+            resident_mb = self._resident_mb_locked()
+            return {
+                "budget_mb": self.budget_mb,
+                "resident_mb": round(resident_mb, 1),
+                "resident": resident,
+                "loads": self.loads,
+                "load_failures": self.load_failures,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "avg_load_ms": round(self.total_load_ms / self.loads, 2) if self.loads else None,
+            }
+
+
+def load_whisper_model(model_name: str, compute_type: str, settings: Optional[Settings] = None) -> Any:
+    """Construct a CPU faster-whisper model using the shared threading configuration."""
+
+    settings = settings or get_settings()
+    try:
+        from faster_whisper import WhisperModel
+    except ModuleNotFoundError as exc:  # pragma: no cover - dependency may be absent
+        raise ModelDependencyError(
+            "faster-whisper is not installed. Install it (Python 3.11/3.12 recommended) to use local Whisper."
+        ) from exc
+
+    return WhisperModel(
+        model_name,
+        device="cpu",
+        compute_type=compute_type,
+        cpu_threads=settings.stt_whisper_cpu_threads,
+        num_workers=settings.stt_whisper_num_workers,
+    )
+
+
+@lru_cache
+def get_model_cache() -> ModelCache:
+    """Return the process-wide Whisper model cache."""
+
+    settings = get_settings()
+    return ModelCache(
+        lambda model_name, compute_type: load_whisper_model(model_name, compute_type, settings),
+        budget_mb=settings.stt_model_cache_budget_mb,
+    )
@@ -2,24 +2,27 @@
 
 This module intentionally keeps everything CPU-only and manages lazy-loaded
 Whisper models so the playground can spin up without heavy upfront costs.
+With ``STT_SIDECAR_SOCKET`` set, inference runs in the sidecar instead, so
+API workers never load Whisper weights.
 """
 
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
 import io
 import json
 import time
-from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-import numpy as np
-import soundfile as sf
-import soxr
+from ..settings import get_settings
+from .model_cache import get_model_cache
 
-if TYPE_CHECKING:  # pragma: no cover - type hints only
-    from faster_whisper import WhisperModel
-else:  # pragma: no cover - allow import without dependency installed
-    WhisperModel = object
+if TYPE_CHECKING:
+    import numpy as np
+
+    from ..speech.inference_sidecar import SidecarClient
 
 DEFAULT_SETTINGS = {
     "model": "small",
@@ -30,32 +33,34 @@ DEFAULT_SETTINGS = {
     "vad_filter": True,
 }
 
-_MODEL_CACHE: Dict[Tuple[str, str], WhisperModel] = {}
-
 
 def _timestamp() -> str:
     return dt.datetime.now().strftime("%H:%M:%S")
 
 
-def _load_model(model_name: str, compute_type: str, logs: List[str]) -> WhisperModel:
-    cache_key = (model_name, compute_type)
-    if cache_key in _MODEL_CACHE:
-        return _MODEL_CACHE[cache_key]
+def _lease_model(model_name: str, compute_type: str, logs: List[str]):
+    return get_model_cache().lease(
+        model_name, compute_type, on_load=lambda line: logs.append(f"[{_timestamp()}] {line}")
+    )
 
-    try:
-        from faster_whisper import WhisperModel as WhisperModelType
-    except ModuleNotFoundError as exc:  # pragma: no cover - dependency may be absent
-        raise RuntimeError(
-            "faster-whisper is not installed. Install it (Python 3.11/3.12 recommended) to use local Whisper."
-        ) from exc
 
-    logs.append(
-        f"[{_timestamp()}] Loading model '{model_name}' on CPU (compute_type={compute_type})"
-    )
-    model = WhisperModelType(model_name, device="cpu", compute_type=compute_type)
-    _MODEL_CACHE[cache_key] = model
-    logs.append(f"[{_timestamp()}] Model ready")
-    return model
+@lru_cache
+def _sidecar_client() -> Optional[SidecarClient]:
+    settings = get_settings()
+    if not settings.stt_sidecar_socket:
+        return None
+    from ..speech.inference_sidecar import SidecarClient
+
+    return SidecarClient(settings.stt_sidecar_socket, timeout_seconds=settings.stt_sidecar_timeout_seconds)
+
+
+async def aclose() -> None:
+    """Close the sidecar client's pooled connections, if one was created."""
+
+    if _sidecar_client.cache_info().currsize:
+        client = _sidecar_client()
+        if client is not None:
+            await client.aclose()
 
 
 def _decode_audio(audio_bytes: bytes, logs: List[str]) -> Tuple[np.ndarray, int, float, float]:
@@ -64,6 +69,10 @@ def _decode_audio(audio_bytes: bytes, logs: List[str]) -> Tuple[np.ndarray, int,
     Returns tuple of (audio_array, sample_rate, decode_ms, resample_ms).
     """
 
+    import numpy as np
+    import soundfile as sf
+    import soxr
+
     decode_start = time.perf_counter()
     with io.BytesIO(audio_bytes) as buffer:
         audio_array, sample_rate = sf.read(buffer, always_2d=False)
@@ -85,10 +94,7 @@ def _decode_audio(audio_bytes: bytes, logs: List[str]) -> Tuple[np.ndarray, int,
     return audio_array.astype(np.float32), sample_rate, decode_ms, resample_ms
 
 
-def transcribe_audio(audio_bytes: bytes, raw_settings: Dict[str, Any]) -> Dict[str, Any]:
-    """Transcribe audio bytes using faster-whisper with timing details."""
-
-    logs: List[str] = []
+def _resolve_settings(raw_settings: Dict[str, Any], logs: List[str]) -> Dict[str, Any]:
     settings = {**DEFAULT_SETTINGS, **{k: v for k, v in raw_settings.items() if v is not None}}
     logs.append(
         "[{}] Config: model={} beam={} lang={} vad={} chunk={}s".format(
@@ -100,50 +106,110 @@ def transcribe_audio(audio_bytes: bytes, raw_settings: Dict[str, Any]) -> Dict[s
             settings.get("chunk_length"),
         )
     )
+    return settings
+
+
+def _result(
+    settings: Dict[str, Any],
+    logs: List[str],
+    collected_segments: List[Dict[str, Any]],
+    timing: Dict[str, float],
+    total_start: float,
+) -> Dict[str, Any]:
+    text = " ".join([segment["text"].strip() for segment in collected_segments]).strip()
+    timing["total_ms"] = (time.perf_counter() - total_start) * 1000
+
+    logs.append(f"[{_timestamp()}] thinking...")
+    logs.append(
+        f"[{_timestamp()}] RESULT ({timing['audio_seconds']:.2f}s audio in {timing['transcribe_ms']:.1f} ms)"
+    )
+    logs.append(f"[{_timestamp()}] {text}")
+
+    return {
+        "text": text,
+        "segments": collected_segments,
+        "timing": timing,
+        "logs": logs,
+        "settings_used": settings,
+    }
+
+
+def transcribe_audio(audio_bytes: bytes, raw_settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Transcribe audio bytes using faster-whisper with timing details."""
+
+    logs: List[str] = []
+    settings = _resolve_settings(raw_settings, logs)
 
     total_start = time.perf_counter()
     audio_array, sample_rate, decode_ms, resample_ms = _decode_audio(audio_bytes, logs)
     audio_seconds = float(len(audio_array) / sample_rate)
     logs.append(f"[{_timestamp()}] Audio decoded ({audio_seconds:.2f}s)")
 
-    model = _load_model(settings["model"], settings["compute_type"], logs)
+    collected_segments: List[Dict[str, Any]] = []
+    with _lease_model(settings["model"], settings["compute_type"], logs) as model:
+        transcribe_start = time.perf_counter()
+        segments, _ = model.transcribe(
+            audio_array,
+            language=settings.get("language") or None,
+            beam_size=int(settings.get("beam_size", 1)),
+            vad_filter=bool(settings.get("vad_filter", True)),
+            chunk_length=int(settings.get("chunk_length", 4)),
+        )
+        # Segments are generated lazily; keep the model leased until decoding finishes.
+        for segment in segments:
+            collected_segments.append(
+                {"start": float(segment.start), "end": float(segment.end), "text": segment.text}
+            )
+        transcribe_ms = (time.perf_counter() - transcribe_start) * 1000
+
+    timing = {
+        "audio_seconds": audio_seconds,
+        "decode_ms": decode_ms,
+        "resample_ms": resample_ms,
+        "transcribe_ms": transcribe_ms,
+    }
+    return _result(settings, logs, collected_segments, timing, total_start)
+
+
+async def transcribe_audio_async(audio_bytes: bytes, raw_settings: Dict[str, Any]) -> Dict[str, Any]:
+    """:func:`transcribe_audio` off the event loop, with inference in the sidecar when one is configured."""
+
+    client = _sidecar_client()
+    if client is None:
+        return await asyncio.to_thread(transcribe_audio, audio_bytes, raw_settings)
+
+    logs: List[str] = []
+    settings = _resolve_settings(raw_settings, logs)
+
+    total_start = time.perf_counter()
+    audio_array, sample_rate, decode_ms, resample_ms = await asyncio.to_thread(_decode_audio, audio_bytes, logs)
+    audio_seconds = float(len(audio_array) / sample_rate)
+    logs.append(f"[{_timestamp()}] Audio decoded ({audio_seconds:.2f}s)")
 
     transcribe_start = time.perf_counter()
-    segments, _ = model.transcribe(
+    reply = await client.transcribe(
         audio_array,
+        model=settings["model"],
+        compute_type=settings["compute_type"],
         language=settings.get("language") or None,
         beam_size=int(settings.get("beam_size", 1)),
         vad_filter=bool(settings.get("vad_filter", True)),
         chunk_length=int(settings.get("chunk_length", 4)),
     )
     transcribe_ms = (time.perf_counter() - transcribe_start) * 1000
-
-    collected_segments: List[Dict[str, Any]] = []
-    for segment in segments:
-        collected_segments.append(
-            {"start": float(segment.start), "end": float(segment.end), "text": segment.text}
-        )
-
-    text = " ".join([segment["text"].strip() for segment in collected_segments]).strip()
-    total_ms = (time.perf_counter() - total_start) * 1000
-
-    logs.append(f"[{_timestamp()}] thinking...")
-    logs.append(f"[{_timestamp()}] RESULT ({audio_seconds:.2f}s audio in {transcribe_ms:.1f} ms)")
-    logs.append(f"[{_timestamp()}] {text}")
-
-    return {
-        "text": text,
-        "segments": collected_segments,
-        "timing": {
-            "audio_seconds": audio_seconds,
-            "decode_ms": decode_ms,
-            "resample_ms": resample_ms,
-            "transcribe_ms": transcribe_ms,
-            "total_ms": total_ms,
-        },
-        "logs": logs,
-        "settings_used": settings,
+    logs.append(f"[{_timestamp()}] Inference sidecar queued the request for {reply['queued_ms']:.1f} ms")
+    collected_segments = [
+        {"start": float(segment["start"]), "end": float(segment["end"]), "text": segment["text"]}
+        for segment in reply["segments"]
+    ]
+
+    timing = {
+        "audio_seconds": audio_seconds,
+        "decode_ms": decode_ms,
+        "resample_ms": resample_ms,
+        "transcribe_ms": transcribe_ms,
     }
+    return _result(settings, logs, collected_segments, timing, total_start)
 
 
 def parse_settings(settings_str: str | None) -> Dict[str, Any]:
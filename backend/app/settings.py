@@ -14,10 +14,158 @@ class Settings(BaseSettings):
     stt_default_model: str = Field("tiny", alias="STT_DEFAULT_MODEL")
     stt_default_language: str = Field("fi", alias="STT_DEFAULT_LANGUAGE")
     stt_whisper_compute_type: str = Field("int8", alias="STT_WHISPER_COMPUTE_TYPE")
+    stt_model_cache_budget_mb: float = Field(
+        3072,
+        alias="STT_MODEL_CACHE_BUDGET_MB",
+        description="Approximate memory budget for resident Whisper models; LRU models are evicted beyond it",
+    )
+    stt_whisper_cpu_threads: int = Field(
+        0, alias="STT_WHISPER_CPU_THREADS", description="CTranslate2 intra-op threads per model (0 = library default)"
+    )
+    stt_whisper_num_workers: int = Field(
+        1, alias="STT_WHISPER_NUM_WORKERS", description="Concurrent transcriptions a single model instance may run"
+    )
+    stt_preload_models: str = Field(
+        "", alias="STT_PRELOAD_MODELS", description="Comma-separated Whisper models to warm up at startup"
+    )
+    stt_sidecar_socket: Optional[str] = Field(
+        None,
+        alias="STT_SIDECAR_SOCKET",
+        description="Unix socket of the Whisper inference sidecar; unset runs inference in the API process",
+    )
+    stt_sidecar_timeout_seconds: float = Field(
+        120.0, alias="STT_SIDECAR_TIMEOUT_SECONDS", description="Limit for one transcription sent to the sidecar"
+    )
+    stt_sidecar_max_concurrency: int = Field(
+        1,
+        alias="STT_SIDECAR_MAX_CONCURRENCY",
+        description="Transcriptions the sidecar runs at once; further requests queue in the sidecar",
+    )
+    stt_adaptive_enabled: bool = Field(
+        False, alias="STT_ADAPTIVE_ENABLED", description="Downgrade local Whisper settings under load to protect p95"
+    )
+    stt_adaptive_queue_depth: int = Field(
+        2,
+        alias="STT_ADAPTIVE_QUEUE_DEPTH",
+        description="Local transcriptions in flight per downgrade level (2 = one level at 2, two at 4, ...)",
+    )
+    stt_adaptive_target_rtf: float = Field(
+        0.5,
+        alias="STT_ADAPTIVE_TARGET_RTF",
+        description="Compute seconds per audio second above which local transcriptions are downgraded",
+    )
+    stt_adaptive_tenant_limits: str = Field(
+        "",
+        alias="STT_ADAPTIVE_TENANT_LIMITS",
+        description="Cheapest settings per tenant as tenant=model:beam_size:compute_type pairs, e.g. acme=small:2:",
+    )
+    stt_adaptive_tenant_header: str = Field(
+        "",
+        alias="STT_ADAPTIVE_TENANT_HEADER",
+        description="Header naming the tenant, set by the authenticating proxy; empty applies the * limits to everyone",
+    )
+    stt_max_upload_mb: float = Field(
+        200, alias="STT_MAX_UPLOAD_MB", description="Audio request bodies above this size are rejected with 413"
+    )
+    stt_max_audio_seconds: float = Field(
+        3600, alias="STT_MAX_AUDIO_SECONDS", description="Longest audio decoded for local Whisper"
+    )
+    stt_breaker_error_rate: float = Field(
+        0.5, alias="STT_BREAKER_ERROR_RATE", description="Failure ratio in the rolling window that opens a breaker"
+    )
+    stt_breaker_slow_call_ms: float = Field(
+        15000, alias="STT_BREAKER_SLOW_CALL_MS", description="Calls slower than this count towards the slow-call rate"
+    )
+    stt_breaker_min_calls: int = Field(
+        5, alias="STT_BREAKER_MIN_CALLS", description="Calls required in the window before a breaker may open"
+    )
+    stt_breaker_window_seconds: float = Field(60, alias="STT_BREAKER_WINDOW_SECONDS")
+    stt_breaker_open_seconds: float = Field(
+        30, alias="STT_BREAKER_OPEN_SECONDS", description="How long an open breaker rejects calls before probing"
+    )
+    stt_credit_cooldown_seconds: float = Field(
+        600, alias="STT_CREDIT_COOLDOWN_SECONDS", description="Breaker open time after an ElevenLabs credit/auth error"
+    )
+    stt_hedge_enabled: bool = Field(
+        False, alias="STT_HEDGE_ENABLED", description="Start local Whisper when the cloud provider exceeds its p95"
+    )
+    stt_hedge_default_delay_ms: float = Field(
+        4000, alias="STT_HEDGE_DEFAULT_DELAY_MS", description="Hedge delay used until enough latencies are observed"
+    )
+    stt_hedge_min_delay_ms: float = Field(250, alias="STT_HEDGE_MIN_DELAY_MS")
     hardware_hint: str = Field("Lenovo T480 (CPU)", alias="HARDWARE_HINT")
     dev_mode: bool = Field(True, description="Expose debug data and unconfigured providers")
     correlation_id_header: str = Field("X-Correlation-ID", description="Header used for correlation IDs")
+    log_sample_rates: str = Field(
+        "",
+        alias="LOG_SAMPLE_RATES",
+        description="Comma-separated event=keep-ratio pairs for INFO/WARNING events, e.g. stt.upload.received=0.1",
+    )
+    log_rate_limit_per_second: float = Field(
+        0.0, alias="LOG_RATE_LIMIT_PER_SECOND", description="Per-event token refill rate; 0 disables rate limiting"
+    )
+    log_rate_limit_burst: float = Field(50.0, alias="LOG_RATE_LIMIT_BURST", description="Per-event token bucket size")
+    log_suppressed_report_seconds: float = Field(
+        60.0, alias="LOG_SUPPRESSED_REPORT_SECONDS", description="Interval between log.suppressed summaries"
+    )
+    tracing_exporter: str = Field(
+        "none", alias="TRACING_EXPORTER", description="Span exporter: none | file (OTLP/JSON lines) | otlp (collector)"
+    )
+    tracing_sample_ratio: float = Field(
+        0.05, alias="TRACING_SAMPLE_RATIO", description="Fraction of new traces recorded and exported"
+    )
+    tracing_file_path: str = Field("traces/spans.otlp.jsonl", alias="TRACING_FILE_PATH")
+    tracing_otlp_endpoint: str = Field(
+        "http://localhost:4318", alias="TRACING_OTLP_ENDPOINT", description="OTLP/HTTP collector base URL"
+    )
     enable_debug_stream: bool = Field(True, alias="ENABLE_DEBUG_STREAM", description="Enable SSE debug stream")
+    shared_state_path: Optional[str] = Field(
+        None,
+        alias="SHARED_STATE_PATH",
+        description="SQLite file shared by uvicorn workers for sessions and metrics; unset keeps state in-process",
+    )
+    shared_state_publish_interval_seconds: float = Field(
+        1.0,
+        alias="SHARED_STATE_PUBLISH_INTERVAL_SECONDS",
+        description="How often each worker publishes its metrics and request stats to SHARED_STATE_PATH",
+    )
+    readiness_check_timeout_seconds: float = Field(
+        30.0,
+        alias="READINESS_CHECK_TIMEOUT_SECONDS",
+        description="Limit for the connector warm-up and validation checks behind /readyz",
+    )
+    readiness_require_connectors: bool = Field(
+        False,
+        alias="READINESS_REQUIRE_CONNECTORS",
+        description="Keep /readyz failing while a configured connector fails validation",
+    )
+    connector_validation_interval_seconds: float = Field(
+        60.0, alias="CONNECTOR_VALIDATION_INTERVAL_SECONDS", description="How often connectors are re-validated"
+    )
+    connector_validation_timeout_seconds: float = Field(
+        5.0, alias="CONNECTOR_VALIDATION_TIMEOUT_SECONDS", description="Limit for one connector's validate() call"
+    )
+    connector_unhealthy_after: int = Field(
+        2,
+        alias="CONNECTOR_UNHEALTHY_AFTER",
+        description="Consecutive failed validations before a provider is treated as unhealthy",
+    )
+    connector_warm_up: bool = Field(
+        False,
+        alias="CONNECTOR_WARM_UP",
+        description="Import provider SDKs and build connectors at startup and on reload instead of on first use",
+    )
+    config_file: Optional[str] = Field(
+        None, alias="CONFIG_FILE", description="JSON file of provider setting overrides, reloaded when it changes"
+    )
+    config_watch_interval_seconds: float = Field(
+        5.0, alias="CONFIG_WATCH_INTERVAL_SECONDS", description="How often CONFIG_FILE is checked for changes"
+    )
+    config_drain_timeout_seconds: float = Field(
+        30.0,
+        alias="CONFIG_DRAIN_TIMEOUT_SECONDS",
+        description="Longest wait for in-flight requests before replaced connectors are closed",
+    )
 
     # Feature flags
     use_azure_openai: bool = Field(False, alias="USE_AZURE_OPENAI")
@@ -32,6 +180,46 @@ class Settings(BaseSettings):
     azure_openai_api_key: Optional[str] = Field(None, alias="AZURE_OPENAI_API_KEY")
     azure_openai_api_version: Optional[str] = Field("2024-02-15-preview", alias="AZURE_OPENAI_API_VERSION")
     azure_openai_deployments: List[str] = Field(default_factory=list, alias="AZURE_OPENAI_DEPLOYMENTS")
+    use_azure_openai_pool: bool = Field(False, alias="USE_AZURE_OPENAI_POOL")
+    azure_openai_pool: str = Field(
+        "",
+        alias="AZURE_OPENAI_POOL",
+        description="JSON list of {name, endpoint, api_key, deployment, model, tpm} deployments to load-balance",
+    )
+    azure_openai_pool_max_attempts: int = Field(
+        3, alias="AZURE_OPENAI_POOL_MAX_ATTEMPTS", description="Deployments tried per request before giving up"
+    )
+    azure_openai_pool_timeout_seconds: float = Field(60.0, alias="AZURE_OPENAI_POOL_TIMEOUT_SECONDS")
+    mock_llm_profile: str = Field(
+        "",
+        alias="MOCK_LLM_PROFILE",
+        description="Latency/fault profile for mock-llm, e.g. latency=lognormal:800:0.6,tokens_per_second=40",
+    )
+    mock_search_profile: str = Field("", alias="MOCK_SEARCH_PROFILE", description="Profile for mock-search")
+    mock_speech_profile: str = Field("", alias="MOCK_SPEECH_PROFILE", description="Profile for mock-stt/mock-tts")
+    mock_servicedesk_profile: str = Field(
+        "", alias="MOCK_SERVICEDESK_PROFILE", description="Profile for mock-servicedesk"
+    )
+    mock_seed: Optional[int] = Field(None, alias="MOCK_SEED", description="Seed for reproducible mock latencies/faults")
+    chat_coalesce_window_seconds: float = Field(
+        2.0,
+        alias="CHAT_COALESCE_WINDOW_SECONDS",
+        description="Reuse an identical prompt's LLM result for this long after it finishes (0 disables coalescing)",
+    )
+    ticket_dedup_window_seconds: float = Field(
+        600.0, alias="TICKET_DEDUP_WINDOW_SECONDS", description="Link near-duplicate tickets created within this window"
+    )
+    ticket_dedup_similarity: float = Field(
+        0.8, alias="TICKET_DEDUP_SIMILARITY", description="Word-set similarity at which two tickets count as one"
+    )
+    llm_rate_limits: str = Field(
+        "",
+        alias="LLM_RATE_LIMITS",
+        description="Client-side budgets as provider=tpm:rpm pairs, e.g. azure-openai=30000:180",
+    )
+    llm_queue_max_wait_seconds: float = Field(
+        10.0, alias="LLM_QUEUE_MAX_WAIT_SECONDS", description="Shed LLM calls whose queue wait would exceed this"
+    )
 
     # Azure Speech
     azure_speech_key: Optional[str] = Field(None, alias="AZURE_SPEECH_KEY")
@@ -70,6 +258,16 @@ class Settings(BaseSettings):
     # ElevenLabs
     elevenlabs_api_key: Optional[str] = Field(None, alias="ELEVENLABS_API_KEY")
     elevenlabs_model_id: str = Field("eleven_multilingual_v2", alias="ELEVENLABS_MODEL_ID")
+    elevenlabs_base_url: str = Field("https://api.elevenlabs.io", alias="ELEVENLABS_BASE_URL")
+    elevenlabs_max_connections: int = Field(
+        10, alias="ELEVENLABS_MAX_CONNECTIONS", description="Pooled connections kept to ElevenLabs"
+    )
+    elevenlabs_keepalive_seconds: float = Field(
+        60.0, alias="ELEVENLABS_KEEPALIVE_SECONDS", description="Idle time before a pooled connection is closed"
+    )
+    elevenlabs_timeout_seconds: float = Field(
+        20.0, alias="ELEVENLABS_TIMEOUT_SECONDS", description="Total request timeout for ElevenLabs transcription"
+    )
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, extra="ignore")
 
@@ -1,4 +1,5 @@
 from .providers import (
+    AudioStream,
     ElevenLabsProvider,
     LocalWhisperProvider,
     SpeechProvider,
@@ -10,6 +11,7 @@ from .providers import (
 )
 
 __all__ = [
+    "AudioStream",
     "SpeechProvider",
     "SpeechProviderError",
     "TranscriptionOptions",
@@ -0,0 +1,202 @@
+"""Incremental decoding of uploaded audio into 16 kHz mono float32 PCM.
+
+Uploads are read block by block from their :class:`AudioStream` (usually the
+spooled temp file Starlette wrote while parsing the multipart body), down-mixed,
+resampled with a streaming resampler and appended to a bounded
+:class:`PcmBuffer`. The buffer's final view is handed to Whisper directly, so a
+request holds one PCM array instead of several full copies of the upload.
+"""
+
+from __future__ import annotations
+
+import io
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import soundfile as sf
+import soxr
+
+from .providers.base import AudioStream, SpeechProviderError
+
+TARGET_RATE = 16000
+BLOCK_FRAMES = 64 * 1024
+
+
+class PcmBuffer:
+    """Bounded float32 sample buffer filled in place by the decoders.
+
+    Capacity is reserved up front when the decoder knows the frame count and
+    otherwise grows geometrically, but never beyond ``max_samples``; longer
+    audio is rejected as soon as it crosses the limit instead of after the
+    whole file has been decoded.
+    """
+
+    def __init__(self, max_samples: int, initial_samples: int = TARGET_RATE * 30) -> None:
+        self.max_samples = max_samples
+        self._data = np.empty(min(initial_samples, max_samples), dtype=np.float32)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def reserve(self, samples: int) -> None:
+        samples = min(samples, self.max_samples)
+        if samples > len(self._data):
+            grown = np.empty(samples, dtype=np.float32)
+            grown[: self._length] = self._data[: self._length]
+            self._data = grown
+
+    def append(self, block: np.ndarray) -> None:
+        needed = self._length + len(block)
+        if needed > self.max_samples:
+            raise SpeechProviderError(
+                "audio_too_long",
+                f"Audio exceeds the {self.max_samples / TARGET_RATE:.0f} s limit",
+                hint="Trim the recording or raise STT_MAX_AUDIO_SECONDS",
+            )
+        if needed > len(self._data):
+            self.reserve(max(needed, len(self._data) * 2))
+        self._data[self._length : needed] = block
+        self._length = needed
+
+    def view(self) -> np.ndarray:
+        return self._data[: self._length]
+
+
+@dataclass
+class DecodedAudio:
+    samples: np.ndarray
+    decoder: str
+    source_rate: int
+    decode_ms: float
+    resample_ms: float
+
+    @property
+    def seconds(self) -> float:
+        return len(self.samples) / TARGET_RATE
+
+
+class _StreamReader(io.RawIOBase):
+    """Seekable file-like view over an :class:`AudioStream` with a private offset."""
+
+    def __init__(self, audio: AudioStream) -> None:
+        self._audio = audio
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._offset
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._offset, io.SEEK_END: self._audio.size}[whence]
+        self._offset = max(0, base + offset)
+        return self._offset
+
+    def readinto(self, buffer) -> int:
+        chunk = self._audio.read_at(self._offset, min(len(buffer), max(0, self._audio.size - self._offset)))
+        buffer[: len(chunk)] = chunk
+        self._offset += len(chunk)
+        return len(chunk)
+
+
+class _Resampler:
+    def __init__(self, source_rate: int, sink: Callable[[np.ndarray], None]) -> None:
+        self._sink = sink
+        self._stream = None
+        if source_rate != TARGET_RATE:
+            self._stream = soxr.ResampleStream(source_rate, TARGET_RATE, 1, dtype="float32")
+        self.elapsed_ms = 0.0
+
+    def feed(self, mono: np.ndarray, last: bool = False) -> None:
+        if self._stream is None:
+            if len(mono):
+                self._sink(mono)
+            return
+        started = time.perf_counter()
+        out = self._stream.resample_chunk(np.ascontiguousarray(mono, dtype=np.float32), last=last)
+        self.elapsed_ms += (time.perf_counter() - started) * 1000
+        if len(out):
+            self._sink(out)
+
+
+def _decode_soundfile(audio: AudioStream, buffer: PcmBuffer) -> tuple[int, float]:
+    with sf.SoundFile(_StreamReader(audio)) as sound:
+        source_rate = sound.samplerate
+        if sound.frames > 0:
+            buffer.reserve(int(sound.frames * TARGET_RATE / source_rate) + TARGET_RATE)
+        resampler = _Resampler(source_rate, buffer.append)
+        for block in sound.blocks(blocksize=BLOCK_FRAMES, dtype="float32", always_2d=True):
+            resampler.feed(block[:, 0] if block.shape[1] == 1 else block.mean(axis=1))
+        resampler.feed(np.empty(0, dtype=np.float32), last=True)
+    return source_rate, resampler.elapsed_ms
+
+
+def _decode_av(audio: AudioStream, buffer: PcmBuffer) -> tuple[int, float]:
+    try:
+        import av
+    except ModuleNotFoundError as exc:  # pragma: no cover - PyAV ships with faster-whisper
+        raise SpeechProviderError(
+            "dependency_missing",
+            f"Decoding {audio.content_type} requires PyAV",
+            hint="Install faster-whisper (which bundles PyAV) or upload WAV audio.",
+        ) from exc
+
+    resample_ms = 0.0
+    with av.open(_StreamReader(audio), mode="r", metadata_errors="ignore") as container:
+        if not container.streams.audio:
+            raise SpeechProviderError("decode_failed", "Upload contains no audio stream")
+        stream = container.streams.audio[0]
+        source_rate = stream.rate or 0
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=TARGET_RATE)
+        for frame in container.decode(stream):
+            started = time.perf_counter()
+            resampled = resampler.resample(frame)
+            resample_ms += (time.perf_counter() - started) * 1000
+            for out in resampled:
+                buffer.append(out.to_ndarray().reshape(-1))
+        for out in resampler.resample(None):
+            buffer.append(out.to_ndarray().reshape(-1))
+    return source_rate, resample_ms
+
+
+def decode_to_pcm(audio: AudioStream, *, max_seconds: float) -> DecodedAudio:
+    """Decode ``audio`` block by block into 16 kHz mono PCM.
+
+    WAV/FLAC/OGG-Vorbis go through libsndfile; anything it cannot open (webm,
+    opus, mp3, ...) falls back to PyAV. Blocking; run it in a worker thread.
+    """
+
+    started = time.perf_counter()
+    decoder = "soundfile"
+    buffer = PcmBuffer(int(max_seconds * TARGET_RATE))
+    try:
+        source_rate, resample_ms = _decode_soundfile(audio, buffer)
+    except sf.LibsndfileError:
+        decoder = "av"
+        buffer = PcmBuffer(buffer.max_samples)
+        try:
+            source_rate, resample_ms = _decode_av(audio, buffer)
+        except SpeechProviderError:
+            raise
+        except Exception as exc:  # noqa: BLE001 - PyAV raises a family of FFmpeg errors
+            raise SpeechProviderError(
+                "decode_failed",
+                f"Could not decode {audio.content_type} audio: {exc}",
+                hint="Upload WAV, OGG or WebM audio.",
+            ) from exc
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return DecodedAudio(
+        samples=buffer.view(),
+        decoder=decoder,
+        source_rate=source_rate,
+        decode_ms=elapsed_ms - resample_ms,
+        resample_ms=resample_ms,
+    )
@@ -0,0 +1,430 @@
+"""Whisper inference in a separate process, served over a Unix socket.
+
+With ``STT_SIDECAR_SOCKET`` set, ``LocalWhisperProvider`` still decodes
+uploads in the API process but sends the 16 kHz PCM to this server for
+inference. Models are then resident once per pod, in the sidecar, however
+many API workers or replicas of the API container run next to it.
+
+    python -m app.speech.inference_sidecar --socket /run/whisper/sidecar.sock
+
+Each message on a connection is one frame:
+
+    header   !4sBII   magic b"WSP1", kind, metadata length, payload length
+    metadata UTF-8 JSON (model, language, options / result, error)
+    payload  raw little-endian float32 PCM samples (requests only)
+
+The client sends the payload straight from the decoded numpy buffer, and the
+server receives it with ``recv_into`` into the array handed to the model. So
+the samples are never encoded, and never copied in user space on either
+side. A connection carries one request at a time. The client keeps idle
+connections open for reuse.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from ..common.logging import configure_logging, get_logger, log_event
+from ..services.model_cache import ModelCache, ModelDependencyError, get_model_cache
+from ..settings import get_settings
+from .providers.base import SpeechProviderError
+
+if TYPE_CHECKING:  # pragma: no cover - hints only
+    import numpy as np
+
+MAGIC = b"WSP1"
+HEADER = struct.Struct("!4sBII")
+TRANSCRIBE = 1
+STATUS = 2
+RESULT = 3
+ERROR = 4
+MAX_METADATA_BYTES = 1024 * 1024
+# The longest audio the API decodes, as 16 kHz float32; larger frames are malformed.
+MAX_PAYLOAD_BYTES = math.ceil(get_settings().stt_max_audio_seconds * 16000) * 4
+
+
+def transcribe_samples(
+    model: Any,
+    samples: np.ndarray,
+    *,
+    language: Optional[str],
+    beam_size: int,
+    vad_filter: bool,
+    chunk_length: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Run a faster-whisper model and flatten its segments; shared by in-process and sidecar inference."""
+
+    # The playground tunes chunk_length; everyone else keeps the model's default.
+    extra = {"chunk_length": chunk_length} if chunk_length else {}
+    segments, info = model.transcribe(
+        samples,
+        language=None if not language or language == "auto" else language,
+        beam_size=beam_size,
+        vad_filter=vad_filter,
+        **extra,
+    )
+    output_segments = [
+        {"text": seg.text.strip(), "start": round(seg.start, 2), "end": round(seg.end, 2), "prob": seg.avg_logprob}
+        for seg in segments
+    ]
+    return output_segments, {"language": info.language, "duration": info.duration}
+
+
+def encode_header(kind: int, metadata: Dict[str, Any], payload_bytes: int = 0) -> bytes:
+    meta = json.dumps(metadata, separators=(",", ":")).encode()
+    return HEADER.pack(MAGIC, kind, len(meta), payload_bytes) + meta
+
+
+def _parse_header(raw: bytes, max_payload_bytes: int = MAX_PAYLOAD_BYTES) -> Tuple[int, int, int]:
+    magic, kind, meta_len, payload_len = HEADER.unpack(raw)
+    if magic != MAGIC or meta_len > MAX_METADATA_BYTES:
+        raise SpeechProviderError("protocol_error", "Not a sidecar frame")
+    if payload_len > max_payload_bytes:
+        raise SpeechProviderError(
+            "protocol_error", f"Payload of {payload_len} bytes exceeds the {max_payload_bytes}-byte limit"
+        )
+    return kind, meta_len, payload_len
+
+
+# --- server ---------------------------------------------------------------------------------------------------------
+
+
+def _recv_exactly(sock: socket.socket, view: memoryview) -> bool:
+    """Fill ``view`` from ``sock``; False on a clean EOF before the first byte."""
+
+    received = 0
+    while received < len(view):
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            if received == 0:
+                return False
+            raise ConnectionError("Connection closed mid-frame")
+        received += count
+    return True
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "SidecarServer"
+
+    def handle(self) -> None:
+        import numpy as np
+
+        sock: socket.socket = self.request
+        header = bytearray(HEADER.size)
+        while _recv_exactly(sock, memoryview(header)):
+            try:
+                kind, meta_len, payload_len = _parse_header(bytes(header), self.server.max_payload_bytes)
+                if payload_len % 4:
+                    raise SpeechProviderError("protocol_error", "PCM payload is not whole float32 samples")
+            except SpeechProviderError as exc:
+                sock.sendall(encode_header(ERROR, {"code": exc.code, "message": str(exc)}))
+                return
+            meta = bytearray(meta_len)
+            if meta_len and not _recv_exactly(sock, memoryview(meta)):
+                return
+            # The payload lands directly in the array the model reads.
+            samples = np.empty(payload_len // 4, dtype="<f4")
+            if payload_len and not _recv_exactly(sock, memoryview(samples).cast("B")):
+                return
+            sock.sendall(self.server.dispatch(kind, json.loads(meta or b"{}"), samples))
+
+
+class SidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str,
+        model_cache: ModelCache,
+        *,
+        max_concurrency: int = 1,
+        max_payload_bytes: int = MAX_PAYLOAD_BYTES,
+    ) -> None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # left behind by a previous run that was killed
+        super().__init__(socket_path, _Handler)
+        self.socket_path = socket_path
+        self.model_cache = model_cache
+        self.max_concurrency = max_concurrency
+        self.max_payload_bytes = max_payload_bytes
+        # Requests beyond this queue here instead of oversubscribing the cores.
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.served = 0
+        self.logger = get_logger("inference_sidecar")
+
+    def dispatch(self, kind: int, meta: Dict[str, Any], samples: np.ndarray) -> bytes:
+        try:
+            if kind == TRANSCRIBE:
+                return encode_header(RESULT, self._transcribe(meta, samples))
+            if kind == STATUS:
+                return encode_header(RESULT, self.status())
+            raise SpeechProviderError("protocol_error", f"Unknown frame kind {kind}")
+        except SpeechProviderError as exc:
+            error = {"code": exc.code, "message": str(exc), "hint": exc.hint, "retryable": exc.retryable}
+        except ModelDependencyError as exc:
+            error = {
+                "code": "dependency_missing",
+                "message": str(exc),
+                "hint": "Install faster-whisper in the sidecar's environment.",
+                "retryable": False,
+            }
+        except Exception as exc:  # noqa: BLE001 - reported to the client, the connection stays usable
+            log_event(self.logger, logging.ERROR, "sidecar.inference.failed", "Inference failed", exc_info=exc)
+            error = {"code": "inference_failed", "message": str(exc), "retryable": True}
+        return encode_header(ERROR, error)
+
+    def _transcribe(self, meta: Dict[str, Any], samples: np.ndarray) -> Dict[str, Any]:
+        model_name, compute_type = meta["model"], meta["compute_type"]
+        started = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+        with self._slots:
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                queued_ms = (time.perf_counter() - started) * 1000
+                with self.model_cache.lease(model_name, compute_type) as model:
+                    inference_started = time.perf_counter()
+                    segments, info = transcribe_samples(
+                        model,
+                        samples,
+                        language=meta.get("language"),
+                        beam_size=meta.get("beam_size", 1),
+                        vad_filter=meta.get("vad_filter", False),
+                        chunk_length=meta.get("chunk_length"),
+                    )
+                inference_ms = (time.perf_counter() - inference_started) * 1000
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.served += 1
+        return {
+            "segments": segments,
+            "info": info,
+            "queued_ms": round(queued_ms, 2),
+            "inference_ms": round(inference_ms, 2),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            load = {"queued": self.queued, "running": self.running, "served": self.served}
+        return {"pid": os.getpid(), "max_concurrency": self.max_concurrency, **load, **self.model_cache.stats()}
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+# --- client ---------------------------------------------------------------------------------------------------------
+
+
+async def _arecv_exactly(loop: asyncio.AbstractEventLoop, sock: socket.socket, view: memoryview) -> None:
+    received = 0
+    while received < len(view):
+        count = await loop.sock_recv_into(sock, view[received:])
+        if count == 0:
+            raise ConnectionError("Sidecar closed the connection")
+        received += count
+
+
+class _StaleConnection(ConnectionError):
+    """The connection failed before any reply byte arrived, so the request can be sent again."""
+
+
+class SidecarClient:
+    """Async client for :class:`SidecarServer`, keeping up to ``max_idle`` connections open."""
+
+    def __init__(self, socket_path: str, *, timeout_seconds: float = 120.0, max_idle: int = 8) -> None:
+        self.socket_path = socket_path
+        self.timeout_seconds = timeout_seconds
+        self.max_idle = max_idle
+        self._idle: List[socket.socket] = []
+
+    async def _connect(self, *, fresh: bool = False) -> socket.socket:
+        if self._idle and not fresh:
+            return self._idle.pop()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await asyncio.get_running_loop().sock_connect(sock, self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    async def _exchange(self, sock: socket.socket, frame: bytes, payload: Optional[memoryview]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        header = bytearray(HEADER.size)
+        try:
+            await loop.sock_sendall(sock, frame)
+            if payload is not None and len(payload):
+                await loop.sock_sendall(sock, payload)
+            first = await loop.sock_recv_into(sock, memoryview(header))
+        except OSError as exc:
+            raise _StaleConnection(str(exc)) from exc
+        if first == 0:
+            raise _StaleConnection("Sidecar closed the connection")
+        await _arecv_exactly(loop, sock, memoryview(header)[first:])
+        kind, meta_len, payload_len = _parse_header(bytes(header))
+        body = bytearray(meta_len + payload_len)
+        await _arecv_exactly(loop, sock, memoryview(body))
+        meta = json.loads(body[:meta_len] or b"{}")
+        if kind == ERROR:
+            raise SpeechProviderError(
+                meta.get("code", "inference_failed"),
+                meta.get("message", "Sidecar error"),
+                hint=meta.get("hint"),
+                retryable=meta.get("retryable", False),
+            )
+        return meta
+
+    async def request(
+        self, kind: int, metadata: Dict[str, Any], payload: Optional[memoryview] = None
+    ) -> Dict[str, Any]:
+        frame = encode_header(kind, metadata, len(payload) if payload is not None else 0)
+        fresh = False
+        while True:
+            reused = bool(self._idle) and not fresh
+            try:
+                sock = await self._connect(fresh=fresh)
+            except OSError as exc:
+                raise SpeechProviderError(
+                    "sidecar_unavailable",
+                    f"Inference sidecar at {self.socket_path} is not reachable: {exc}",
+                    hint="Start python -m app.speech.inference_sidecar or unset STT_SIDECAR_SOCKET",
+                    retryable=True,
+                ) from exc
+            try:
+                result = await asyncio.wait_for(self._exchange(sock, frame, payload), self.timeout_seconds)
+            except _StaleConnection as exc:
+                sock.close()
+                if reused:
+                    # Pooled sockets go stale together when the sidecar restarts; retry once on a new one.
+                    await self.aclose()
+                    fresh = True
+                    continue
+                raise SpeechProviderError(
+                    "sidecar_unavailable", f"Inference sidecar failed: {exc}", retryable=True
+                ) from exc
+            except SpeechProviderError as exc:
+                # An error frame leaves the stream at a frame boundary; a malformed frame does not.
+                if exc.code == "protocol_error":
+                    sock.close()
+                else:
+                    self._release(sock)
+                raise
+            except asyncio.TimeoutError as exc:
+                sock.close()
+                raise SpeechProviderError(
+                    "sidecar_timeout",
+                    f"No answer from the inference sidecar in {self.timeout_seconds:g}s",
+                    retryable=True,
+                ) from exc
+            except BaseException as exc:
+                # Cancelled or broken mid-frame: the stream position is unknown, so the connection cannot be reused.
+                sock.close()
+                if isinstance(exc, OSError):
+                    raise SpeechProviderError(
+                        "sidecar_unavailable", f"Inference sidecar failed: {exc}", retryable=True
+                    ) from exc
+                raise
+            self._release(sock)
+            return result
+
+    def _release(self, sock: socket.socket) -> None:
+        if len(self._idle) < self.max_idle:
+            self._idle.append(sock)
+        else:
+            sock.close()
+
+    async def transcribe(
+        self,
+        samples: np.ndarray,
+        *,
+        model: str,
+        compute_type: str,
+        language: Optional[str],
+        beam_size: int,
+        vad_filter: bool,
+        chunk_length: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        import numpy as np
+
+        pcm = np.ascontiguousarray(samples, dtype="<f4")
+        metadata = {
+            "model": model,
+            "compute_type": compute_type,
+            "language": language,
+            "beam_size": beam_size,
+            "vad_filter": vad_filter,
+        }
+        if chunk_length:
+            metadata["chunk_length"] = chunk_length
+        return await self.request(TRANSCRIBE, metadata, memoryview(pcm).cast("B"))
+
+    async def status(self) -> Dict[str, Any]:
+        return await self.request(STATUS, {})
+
+    async def aclose(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Serve Whisper inference over a Unix socket.")
+    parser.add_argument("--socket", default=settings.stt_sidecar_socket, help="defaults to STT_SIDECAR_SOCKET")
+    parser.add_argument("--preload", default=settings.stt_preload_models, help="comma separated models to load first")
+    parser.add_argument("--compute-type", default=settings.stt_whisper_compute_type)
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=settings.stt_sidecar_max_concurrency,
+        help="transcriptions run at once; more requests queue",
+    )
+    args = parser.parse_args(argv)
+    if not args.socket:
+        parser.error("--socket or STT_SIDECAR_SOCKET is required")
+
+    configure_logging()
+    logger = get_logger("inference_sidecar")
+    model_cache = get_model_cache()
+    preload = [name.strip() for name in args.preload.split(",") if name.strip()]
+    if preload:
+        log_event(
+            logger,
+            logging.INFO,
+            "sidecar.warm_up",
+            "Models loaded",
+            models=model_cache.warm_up(preload, args.compute_type),
+        )
+    server = SidecarServer(args.socket, model_cache, max_concurrency=args.max_concurrency)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    log_event(logger, logging.INFO, "sidecar.listening", "Inference sidecar listening", socket=args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
-from .base import SpeechProvider, SpeechProviderError, TranscriptionOptions, TranscriptionResult
+from .base import AudioStream, SpeechProvider, SpeechProviderError, TranscriptionOptions, TranscriptionResult
 from .elevenlabs_stt import ElevenLabsProvider
 from .local_whisper_stt import LocalWhisperProvider
 from .router import SpeechRouter, SpeechRouterStatus
 
 __all__ = [
+    "AudioStream",
     "SpeechProvider",
     "SpeechProviderError",
     "TranscriptionOptions",
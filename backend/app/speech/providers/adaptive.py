@@ -0,0 +1,172 @@
+"""Load-adaptive Whisper settings for local transcription.
+
+Clients choose the model, ``beam_size`` and (implicitly) the compute type, and
+local Whisper honours them however busy the CPU is. With
+``STT_ADAPTIVE_ENABLED`` the router asks ``AdaptivePolicy`` for cheaper
+settings before each local call. Two signals set the pressure level:
+
+- queue depth: local transcriptions already in flight. Every
+  ``STT_ADAPTIVE_QUEUE_DEPTH`` of them adds a level.
+- real-time factor (RTF): compute seconds per audio second, as an EWMA over
+  recent calls. One level once it exceeds ``STT_ADAPTIVE_TARGET_RTF``, and one
+  more each time it doubles. Samples older than ``stale_after_seconds`` are
+  forgotten, so a spike does not keep degrading requests after it has passed.
+
+Each level applies the next downgrade that changes something, cheapest
+first: ``beam_size`` to 1, the compute type to ``int8``, then the model one
+size smaller per remaining level. ``STT_ADAPTIVE_TENANT_LIMITS`` sets floors
+per tenant, so a tenant that pays for ``small`` never gets ``tiny``. The policy
+never upgrades a request.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ...common.metrics import STT_ADAPTATIONS
+from .base import TranscriptionOptions
+
+# Cheapest first. Models outside the ladder (distil-*, *.en) are never swapped.
+MODEL_LADDER = ("tiny", "base", "small", "medium", "large-v2", "large-v3")
+# Cheapest last; int8 is the fastest CTranslate2 type on CPU.
+COMPUTE_LADDER = ("float32", "float16", "int8_float16", "int8")
+
+
+@dataclass(frozen=True)
+class TenantLimits:
+    """The cheapest settings the policy may move a tenant's request to."""
+
+    model: Optional[str] = None
+    beam_size: int = 1
+    compute_type: Optional[str] = None
+
+
+def parse_tenant_limits(raw: str) -> Dict[str, TenantLimits]:
+    """Parse ``tenant=model:beam_size:compute_type`` floors (comma separated); ``*`` applies to unlisted tenants."""
+
+    limits: Dict[str, TenantLimits] = {}
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        tenant, sep, spec = item.partition("=")
+        model, _, rest = spec.partition(":")
+        beam, _, compute_type = rest.partition(":")
+        try:
+            if not sep or not tenant.strip():
+                raise ValueError
+            if model and model not in MODEL_LADDER:
+                raise ValueError
+            if compute_type and compute_type not in COMPUTE_LADDER:
+                raise ValueError
+            limits[tenant.strip()] = TenantLimits(model or None, int(beam or 1), compute_type or None)
+        except ValueError:
+            raise ValueError(
+                f"Invalid STT tenant limit {item!r}; expected tenant=model:beam_size:compute_type"
+            ) from None
+    return limits
+
+
+class AdaptivePolicy:
+    def __init__(
+        self,
+        *,
+        queue_depth: int = 2,
+        target_rtf: float = 0.5,
+        tenant_limits: Optional[Dict[str, TenantLimits]] = None,
+        default_compute_type: str = "int8",
+        alpha: float = 0.3,
+        stale_after_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.queue_depth = max(1, queue_depth)
+        self.target_rtf = target_rtf
+        self.tenant_limits = tenant_limits or {}
+        self.default_compute_type = default_compute_type
+        self.alpha = alpha
+        self.stale_after_seconds = stale_after_seconds
+        self._clock = clock
+        self.in_flight = 0
+        self._rtf: Optional[float] = None
+        self._rtf_at = 0.0
+
+    def limits_for(self, tenant: Optional[str]) -> TenantLimits:
+        if tenant and tenant in self.tenant_limits:
+            return self.tenant_limits[tenant]
+        return self.tenant_limits.get("*", TenantLimits())
+
+    def rtf(self) -> Optional[float]:
+        if self._rtf is None or self._clock() - self._rtf_at > self.stale_after_seconds:
+            return None
+        return self._rtf
+
+    def record(self, compute_ms: float, audio_seconds: float) -> None:
+        """Feed one finished local transcription into the RTF average."""
+
+        if audio_seconds <= 0:
+            return
+        sample = compute_ms / 1000 / audio_seconds
+        current = self.rtf()
+        self._rtf = sample if current is None else current + self.alpha * (sample - current)
+        self._rtf_at = self._clock()
+
+    def level(self) -> int:
+        queue_level = self.in_flight // self.queue_depth
+        rtf = self.rtf()
+        rtf_level = 0
+        if rtf is not None and self.target_rtf > 0 and rtf > self.target_rtf:
+            rtf_level = 1 + int(math.log2(rtf / self.target_rtf))
+        return max(queue_level, rtf_level)
+
+    def adapt(
+        self, options: TranscriptionOptions, tenant: Optional[str]
+    ) -> Tuple[TranscriptionOptions, List[str]]:
+        """Return the settings to run with and the names of the settings that were downgraded."""
+
+        level = self.level()
+        if not level:
+            return options, []
+        limits = self.limits_for(tenant)
+        adapted = options
+        changed: List[str] = []
+
+        if level and adapted.beam_size > max(1, limits.beam_size):
+            adapted = replace(adapted, beam_size=max(1, limits.beam_size))
+            changed.append("beam_size")
+            level -= 1
+
+        compute_type = adapted.compute_type or self.default_compute_type
+        cheapest = limits.compute_type or COMPUTE_LADDER[-1]
+        if (
+            level
+            and compute_type in COMPUTE_LADDER
+            and COMPUTE_LADDER.index(compute_type) < COMPUTE_LADDER.index(cheapest)
+        ):
+            adapted = replace(adapted, compute_type=cheapest)
+            changed.append("compute_type")
+            level -= 1
+
+        model = adapted.model
+        if level and model in MODEL_LADDER:
+            current = MODEL_LADDER.index(model)
+            lowest = MODEL_LADDER.index(limits.model) if limits.model else 0
+            target = max(lowest, current - level)
+            if target < current:
+                adapted = replace(adapted, model=MODEL_LADDER[target])
+                changed.append("model")
+
+        for setting in changed:
+            STT_ADAPTATIONS.inc(setting)
+        return adapted, changed
+
+    def snapshot(self) -> Dict[str, Any]:
+        rtf = self.rtf()
+        return {
+            "in_flight": self.in_flight,
+            "rtf": round(rtf, 3) if rtf is not None else None,
+            "target_rtf": self.target_rtf,
+            "level": self.level(),
+        }
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
+import asyncio
+import io
+import os
+import threading
 import time
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Union
+
+DEFAULT_CHUNK_BYTES = 256 * 1024
 
 
 class SpeechProviderError(Exception):
     """Error raised by speech providers to convey actionable hints."""
 
-    def __init__(self, code: str, message: str, *, hint: Optional[str] = None, credit_issue: bool = False):
+    def __init__(
+        self,
+        code: str,
+        message: str,
+        *,
+        hint: Optional[str] = None,
+        credit_issue: bool = False,
+        retryable: bool = False,
+    ):
         super().__init__(message)
         self.code = code
         self.hint = hint
         self.credit_issue = credit_issue
+        # Transient failures (timeouts, transport errors, 5xx) that another provider may absorb.
+        self.retryable = retryable
 
     def to_dict(self) -> Dict[str, Any]:  # pragma: no cover - simple mapper
         payload = {"code": self.code, "message": str(self)}
@@ -21,12 +37,98 @@ class SpeechProviderError(Exception):
         return payload
 
 
+class AudioStream:
+    """Re-readable audio payload backed by bytes or a (spooled) upload file.
+
+    Every :meth:`iter_chunks` call keeps its own offset, so one upload can feed
+    a cloud request and a local fallback at the same time without buffering
+    the whole file in memory.
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        size: int,
+        *,
+        content_type: str = "audio/wav",
+        filename: str = "audio.wav",
+    ) -> None:
+        self._file = fileobj
+        self.size = size
+        self.content_type = content_type
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, *, content_type: str = "audio/wav", filename: str = "audio.wav") -> "AudioStream":
+        return cls(io.BytesIO(data), len(data), content_type=content_type, filename=filename)
+
+    @classmethod
+    def from_upload(cls, upload: Any) -> "AudioStream":
+        """Wrap a Starlette ``UploadFile`` without reading it into memory."""
+
+        fileobj = upload.file
+        size = upload.size
+        if size is None:
+            fileobj.seek(0, os.SEEK_END)
+            size = fileobj.tell()
+        return cls(
+            fileobj,
+            size,
+            content_type=upload.content_type or "application/octet-stream",
+            filename=upload.filename or "audio",
+        )
+
+    @property
+    def in_memory(self) -> bool:
+        return isinstance(self._file, io.BytesIO)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def read_all(self) -> bytes:
+        return self.read_at(0, self.size)
+
+    async def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_BYTES) -> AsyncIterator[bytes]:
+        offset = 0
+        while offset < self.size:
+            length = min(chunk_size, self.size - offset)
+            # Spooled uploads above the in-memory threshold live on disk; keep that I/O off the loop.
+            if self.in_memory:
+                chunk = self.read_at(offset, length)
+            else:
+                chunk = await asyncio.to_thread(self.read_at, offset, length)
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+
+AudioInput = Union[bytes, AudioStream]
+
+
+def as_audio_stream(audio: AudioInput) -> AudioStream:
+    return audio if isinstance(audio, AudioStream) else AudioStream.from_bytes(audio)
+
+
+async def read_audio(audio: AudioInput) -> bytes:
+    """Materialise an audio payload for consumers that need the whole buffer."""
+
+    if isinstance(audio, AudioStream):
+        return audio.read_all() if audio.in_memory else await asyncio.to_thread(audio.read_all)
+    return audio
+
+
 @dataclass
 class TranscriptionOptions:
     language: Optional[str] = None
     model: Optional[str] = None
     beam_size: int = 1
     vad_filter: bool = False
+    # Local Whisper only; None uses STT_WHISPER_COMPUTE_TYPE.
+    compute_type: Optional[str] = None
 
 
 @dataclass
@@ -36,12 +138,15 @@ class TranscriptionResult:
     provider: str
     timing_ms: Dict[str, float]
     mode: str = "primary"
+    # The settings the provider actually ran with, when the router changed the requested ones.
+    options: Optional[TranscriptionOptions] = None
+    adapted: list[str] = field(default_factory=list)
 
 
 class SpeechProvider:
     name: str = "base"
 
-    async def transcribe(self, audio_bytes: bytes, options: TranscriptionOptions) -> TranscriptionResult:
+    async def transcribe(self, audio: AudioInput, options: TranscriptionOptions) -> TranscriptionResult:
         raise NotImplementedError
 
     def info(self) -> Dict[str, Any]:  # pragma: no cover - trivial metadata
@@ -1,42 +1,124 @@
 from __future__ import annotations
 
+import asyncio
+import importlib.util
 import json
+import secrets
+from typing import AsyncIterator, Dict, Optional, Tuple
 
 import httpx
 
 from ...common.logging import get_logger
+from ...common.tracing import inject_headers
 from ...settings import Settings
-from .base import SpeechProvider, SpeechProviderError, Stopwatch, TranscriptionOptions, TranscriptionResult
+from .base import (
+    AudioInput,
+    AudioStream,
+    SpeechProvider,
+    SpeechProviderError,
+    Stopwatch,
+    TranscriptionOptions,
+    TranscriptionResult,
+    as_audio_stream,
+)
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+TRANSCRIPTIONS_PATH = "/v1/audio/transcriptions"
+
+
+def stream_multipart(audio: AudioStream, fields: Dict[str, str]) -> Tuple[str, int, AsyncIterator[bytes]]:
+    """Build a ``multipart/form-data`` body that streams the audio part chunk by chunk.
+
+    Returns the content type, the exact body length (so the upload is not sent
+    chunked) and the async body iterator.
+    """
+
+    boundary = secrets.token_hex(16)
+    head = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    )
+    filename = audio.filename.replace('"', "")
+    head += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {audio.content_type}\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    async def _body() -> AsyncIterator[bytes]:
+        yield head
+        async for chunk in audio.iter_chunks():
+            yield chunk
+        yield tail
+
+    return f"multipart/form-data; boundary={boundary}", len(head) + audio.size + len(tail), _body()
 
 
 class ElevenLabsProvider(SpeechProvider):
     name = "elevenlabs"
 
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, *, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.settings = settings
         self.logger = get_logger(__name__)
         self._api_key = settings.elevenlabs_api_key
         self._model_id = settings.elevenlabs_model_id
+        self._transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
 
     def _client(self) -> httpx.AsyncClient:
-        headers = {"xi-api-key": self._api_key or ""}
-        return httpx.AsyncClient(timeout=30.0, headers=headers)
+        """Return the pooled client, recreating it if it belongs to another event loop."""
 
-    async def transcribe(self, audio_bytes: bytes, options: TranscriptionOptions) -> TranscriptionResult:
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(
+                base_url=self.settings.elevenlabs_base_url,
+                timeout=self.settings.elevenlabs_timeout_seconds,
+                headers={"xi-api-key": self._api_key or ""},
+                limits=httpx.Limits(
+                    max_connections=self.settings.elevenlabs_max_connections,
+                    max_keepalive_connections=self.settings.elevenlabs_max_connections,
+                    keepalive_expiry=self.settings.elevenlabs_keepalive_seconds,
+                ),
+                http2=_HTTP2_AVAILABLE and self._transport is None,
+                transport=self._transport,
+            )
+            self._http_loop = loop
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
+    async def transcribe(self, audio: AudioInput, options: TranscriptionOptions) -> TranscriptionResult:
         if not self._api_key:
             raise SpeechProviderError(
                 "not_configured", "ElevenLabs API key missing", hint="Set ELEVENLABS_API_KEY to enable ElevenLabs"
             )
 
         stopwatch = Stopwatch()
-        async with self._client() as client:
-            files = {"file": ("audio.wav", audio_bytes, "audio/wav")}
-            data = {
-                "model_id": options.model or self._model_id,
-            }
-            if options.language and options.language != "auto":
-                data["language_code"] = options.language
-            response = await client.post("https://api.elevenlabs.io/v1/audio/transcriptions", files=files, data=data)
+        data = {
+            "model_id": options.model or self._model_id,
+        }
+        if options.language and options.language != "auto":
+            data["language_code"] = options.language
+        content_type, content_length, body = stream_multipart(as_audio_stream(audio), data)
+        try:
+            response = await self._client().post(
+                TRANSCRIPTIONS_PATH,
+                content=body,
+                headers=inject_headers({"Content-Type": content_type, "Content-Length": str(content_length)}),
+            )
+        except httpx.TimeoutException as exc:
+            raise SpeechProviderError(
+                "timeout",
+                f"ElevenLabs did not answer within {self.settings.elevenlabs_timeout_seconds:.0f} s",
+                hint="Raise ELEVENLABS_TIMEOUT_SECONDS or check network latency",
+                retryable=True,
+            ) from exc
+        except httpx.TransportError as exc:
+            raise SpeechProviderError("network_error", f"ElevenLabs request failed: {exc}", retryable=True) from exc
 
         elapsed = stopwatch.elapsed_ms()
         if response.status_code >= 400:
@@ -47,6 +129,7 @@ class ElevenLabsProvider(SpeechProvider):
                 message,
                 hint="Check ElevenLabs credits or API key",
                 credit_issue=credit_issue,
+                retryable=response.status_code >= 500,
             )
 
         payload = response.json()
@@ -59,6 +142,9 @@ class ElevenLabsProvider(SpeechProvider):
             timing_ms={"transcribe": elapsed},
         )
 
+    def info(self) -> Dict[str, object]:  # pragma: no cover - simple metadata
+        return {"name": self.name, "http2": _HTTP2_AVAILABLE, "base_url": self.settings.elevenlabs_base_url}
+
     def _extract_error(self, response: httpx.Response) -> str:
         try:
             data = response.json()
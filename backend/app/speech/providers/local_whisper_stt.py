@@ -2,16 +2,27 @@ from __future__ import annotations
 
 import asyncio
 import logging
-import tempfile
-from pathlib import Path
 from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from ...common.logging import get_logger, log_event
+from ...common.tracing import get_tracer
+from ...services.model_cache import ModelCache, ModelDependencyError, get_model_cache
 from ...settings import Settings
-from .base import SpeechProvider, SpeechProviderError, Stopwatch, TranscriptionOptions, TranscriptionResult
+from .base import (
+    AudioInput,
+    SpeechProvider,
+    SpeechProviderError,
+    Stopwatch,
+    TranscriptionOptions,
+    TranscriptionResult,
+    as_audio_stream,
+)
 
 if TYPE_CHECKING:  # pragma: no cover - hints only
+    import numpy as np
     from faster_whisper import WhisperModel
+
+    from ..inference_sidecar import SidecarClient
 else:  # pragma: no cover - runtime fallback when dependency is absent
     WhisperModel = object
 
@@ -19,84 +30,124 @@ else:  # pragma: no cover - runtime fallback when dependency is absent
 class LocalWhisperProvider(SpeechProvider):
     name = "local_whisper"
 
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, model_cache: Optional[ModelCache] = None):
         self.settings = settings
         self.logger = get_logger(__name__)
-        self._model: Optional[WhisperModel] = None
+        self.model_cache = model_cache or get_model_cache()
         self._model_name = settings.stt_default_model
         self._compute_type = settings.stt_whisper_compute_type
+        self.tracer = get_tracer()
+        # With a sidecar, models live in its process and this one only decodes audio.
+        self.sidecar: Optional[SidecarClient] = None
+        if settings.stt_sidecar_socket:
+            from ..inference_sidecar import SidecarClient
+
+            self.sidecar = SidecarClient(
+                settings.stt_sidecar_socket, timeout_seconds=settings.stt_sidecar_timeout_seconds
+            )
+
+    async def aclose(self) -> None:
+        if self.sidecar is not None:
+            await self.sidecar.aclose()
+
+    def _acquire_model(self, model_name: str, compute_type: str) -> WhisperModel:
+        def _on_load(line: str) -> None:
+            log_event(
+                self.logger,
+                logging.INFO,
+                "stt.model.load",
+                line,
+                model=model_name,
+                compute_type=compute_type,
+            )
 
-    def _load_model(self, model_name: str) -> WhisperModel:
-        if self._model and self._model_name == model_name:
-            return self._model
         try:
-            from faster_whisper import WhisperModel as WhisperModelType
-        except ModuleNotFoundError as exc:  # pragma: no cover - dependency missing on some runners
+            model = self.model_cache.acquire(model_name, compute_type, on_load=_on_load)
+        except ModelDependencyError as exc:  # pragma: no cover - dependency missing on some runners
             raise SpeechProviderError(
                 "dependency_missing",
                 "faster-whisper is not installed; install it to use local transcription.",
                 hint="Use Python 3.11 or 3.12 with faster-whisper wheels available.",
             ) from exc
-        log_event(
-            self.logger,
-            logging.INFO,
-            "stt.model.load",
-            "Loading faster-whisper model",
-            model=model_name,
-            compute_type=self._compute_type,
-        )
-        self._model = WhisperModelType(model_name, compute_type=self._compute_type)
         self._model_name = model_name
-        return self._model
-
-    async def _transcribe_path(
-        self, model: WhisperModel, file_path: Path, *, language: Optional[str], beam_size: int, vad_filter: bool
-    ) -> tuple[list[Dict[str, Any]], Dict[str, Any]]:
-        def _run():
-            segments, info = model.transcribe(
-                str(file_path),
-                language=None if not language or language == "auto" else language,
-                beam_size=beam_size,
-                vad_filter=vad_filter,
-            )
-            output_segments = []
-            for seg in segments:
-                output_segments.append(
-                    {
-                        "text": seg.text.strip(),
-                        "start": round(seg.start, 2),
-                        "end": round(seg.end, 2),
-                        "prob": seg.avg_logprob,
-                    }
-                )
-            return output_segments, {"language": info.language, "duration": info.duration}
+        return model
 
-        return await asyncio.to_thread(_run)
+    def _run_inference(
+        self, model_name: str, compute_type: str, samples: np.ndarray, options: TranscriptionOptions
+    ) -> tuple[list[Dict[str, Any]], float]:
+        """Acquire, run and release the model in one worker-thread call.
 
-    async def transcribe(self, audio_bytes: bytes, options: TranscriptionOptions) -> TranscriptionResult:
-        model_name = options.model or self.settings.stt_default_model
-        model = self._load_model(model_name)
+        Cancelling the awaiting coroutine (a lost hedge, a client disconnect)
+        does not stop the thread, so the release must happen in the thread too.
+        """
 
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as tmp_file:
-            tmp_path = Path(tmp_file.name)
-            tmp_path.write_bytes(audio_bytes)
+        from ..inference_sidecar import transcribe_samples
 
+        with self.tracer.span("stt.model_acquire", model=model_name):
+            model = self._acquire_model(model_name, compute_type)
+        try:
             stopwatch = Stopwatch()
-            segments, _info = await self._transcribe_path(
-                model,
-                tmp_path,
-                language=options.language,
-                beam_size=options.beam_size,
-                vad_filter=options.vad_filter,
+            with self.tracer.span("stt.inference", model=model_name, compute_type=compute_type):
+                segments, _info = transcribe_samples(
+                    model,
+                    samples,
+                    language=options.language,
+                    beam_size=options.beam_size,
+                    vad_filter=options.vad_filter,
+                )
+            return segments, stopwatch.elapsed_ms()
+        finally:
+            self.model_cache.release(model_name, compute_type)
+
+    async def transcribe(self, audio: AudioInput, options: TranscriptionOptions) -> TranscriptionResult:
+        # numpy, soundfile and soxr load with the first transcription rather than at app start.
+        from ..audio_ingest import decode_to_pcm
+
+        tracer = self.tracer
+        # Decode block by block straight from the upload; no temp file or intermediate WAV copy.
+        with tracer.span("stt.decode") as span:
+            decoded = await asyncio.to_thread(
+                decode_to_pcm, as_audio_stream(audio), max_seconds=self.settings.stt_max_audio_seconds
+            )
+            span.set_attributes(decoder=decoded.decoder, source_rate=decoded.source_rate, audio_seconds=decoded.seconds)
+            # Resampling is interleaved with decoding, so its accumulated time is recorded as a child span.
+            tracer.record("stt.convert", decoded.resample_ms, target_rate=16000)
+        model_name = options.model or self.settings.stt_default_model
+        compute_type = options.compute_type or self._compute_type
+        timing: Dict[str, float] = {}
+        if self.sidecar is not None:
+            stopwatch = Stopwatch()
+            with tracer.span("stt.sidecar", model=model_name, compute_type=compute_type) as span:
+                reply = await self.sidecar.transcribe(
+                    decoded.samples,
+                    model=model_name,
+                    compute_type=compute_type,
+                    language=options.language,
+                    beam_size=options.beam_size,
+                    vad_filter=options.vad_filter,
+                )
+                span.set_attributes(queued_ms=reply["queued_ms"], inference_ms=reply["inference_ms"])
+            segments, inference_ms = reply["segments"], stopwatch.elapsed_ms()
+            self._model_name = model_name
+            timing = {"sidecar_queue": reply["queued_ms"], "sidecar_inference": reply["inference_ms"]}
+        else:
+            # Loading can take seconds; keep it and inference off the event loop.
+            segments, inference_ms = await asyncio.to_thread(
+                self._run_inference, model_name, compute_type, decoded.samples, options
             )
-            timing_ms = {"transcribe": stopwatch.elapsed_ms(), "decode": stopwatch.elapsed_ms()}
 
         full_text = " ".join([seg.get("text", "") for seg in segments]).strip()
         return TranscriptionResult(
             text=full_text,
             segments=segments,
             provider=self.name,
-            timing_ms=timing_ms,
+            timing_ms={
+                "decode": round(decoded.decode_ms, 2),
+                "convert": round(decoded.resample_ms, 2),
+                "transcribe": inference_ms,
+                "audio_seconds": round(decoded.seconds, 2),
+                **timing,
+            },
         )
 
     def info(self) -> Dict[str, Any]:  # pragma: no cover - simple metadata
@@ -104,4 +155,5 @@ class LocalWhisperProvider(SpeechProvider):
             "name": self.name,
             "model": self._model_name,
             "compute_type": self._compute_type,
+            "sidecar": self.settings.stt_sidecar_socket,
         }
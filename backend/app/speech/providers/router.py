@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
 
+from ...common.circuit_breaker import OPEN, CircuitBreaker
 from ...common.logging import bind_correlation_id, get_logger, log_event
+from ...common.metrics import OTHER_LABEL, track_call
+from ...common.tracing import get_tracer
+from ...services.model_cache import KNOWN_MODELS
 from ...settings import Settings
-from .base import SpeechProviderError, TranscriptionOptions, TranscriptionResult
+from .adaptive import AdaptivePolicy, parse_tenant_limits
+from .base import AudioInput, SpeechProviderError, TranscriptionOptions, TranscriptionResult
 from .elevenlabs_stt import ElevenLabsProvider
 from .local_whisper_stt import LocalWhisperProvider
 
@@ -19,6 +26,8 @@ class SpeechRouterStatus:
     last_error: Optional[str]
     last_error_at: Optional[datetime]
     mode: str
+    breakers: List[Dict[str, Any]] = field(default_factory=list)
+    adaptive: Optional[Dict[str, Any]] = None
     timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
 
     def to_dict(self) -> Dict[str, object]:  # pragma: no cover - serialization helper
@@ -28,6 +37,8 @@ class SpeechRouterStatus:
             "last_error": self.last_error,
             "last_error_at": self.last_error_at.isoformat() if self.last_error_at else None,
             "mode": self.mode,
+            "breakers": self.breakers,
+            "adaptive": self.adaptive,
             "timestamp": self.timestamp.isoformat(),
         }
 
@@ -35,20 +46,47 @@ class SpeechRouterStatus:
 class SpeechRouter:
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.logger = bind_correlation_id(get_logger(__name__), None)
+        self.logger = get_logger(__name__)
+        self.tracer = get_tracer()
         self.providers: Dict[str, object] = {
             "local_whisper": LocalWhisperProvider(settings),
         }
         if settings.elevenlabs_api_key:
             self.providers["elevenlabs"] = ElevenLabsProvider(settings)
+        self.breakers: Dict[str, CircuitBreaker] = {
+            name: self._build_breaker(name) for name in ("local_whisper", "elevenlabs")
+        }
         self.last_elevenlabs_failure: Optional[datetime] = None
         self.last_error: Optional[str] = None
         self.last_provider_used: str = settings.stt_provider
+        self.adaptive: Optional[AdaptivePolicy] = None
+        if settings.stt_adaptive_enabled:
+            self.adaptive = AdaptivePolicy(
+                queue_depth=settings.stt_adaptive_queue_depth,
+                target_rtf=settings.stt_adaptive_target_rtf,
+                tenant_limits=parse_tenant_limits(settings.stt_adaptive_tenant_limits),
+                default_compute_type=settings.stt_whisper_compute_type,
+            )
+
+    async def aclose(self) -> None:
+        for instance in self.providers.values():
+            close = getattr(instance, "aclose", None)
+            if close is not None:
+                await close()
+
+    def _build_breaker(self, name: str) -> CircuitBreaker:
+        settings = self.settings
+        return CircuitBreaker(
+            name,
+            window_seconds=settings.stt_breaker_window_seconds,
+            min_calls=settings.stt_breaker_min_calls,
+            error_rate_threshold=settings.stt_breaker_error_rate,
+            slow_call_ms=settings.stt_breaker_slow_call_ms,
+            open_seconds=settings.stt_breaker_open_seconds,
+        )
 
     def _elevenlabs_in_cooldown(self) -> bool:
-        if not self.last_elevenlabs_failure:
-            return False
-        return datetime.now(timezone.utc) - self.last_elevenlabs_failure < timedelta(minutes=10)
+        return self.breakers["elevenlabs"].state == OPEN
 
     def _mark_elevenlabs_failure(self, message: str) -> None:
         self.last_elevenlabs_failure = datetime.now(timezone.utc)
@@ -59,13 +97,18 @@ class SpeechRouter:
             "stt.provider.unavailable",
             "ElevenLabs marked unavailable",
             reason=message,
+            breaker=self.breakers["elevenlabs"].state,
         )
 
     def _select_primary(self, requested: str) -> str:
-        if requested == "auto":
-            if "elevenlabs" in self.providers and not self._elevenlabs_in_cooldown():
+        """Pick the provider to call first; admitting a call consumes a half-open probe slot."""
+
+        if requested in ("auto", "elevenlabs") and "elevenlabs" in self.providers:
+            if self.breakers["elevenlabs"].allow_request():
                 return "elevenlabs"
             return "local_whisper"
+        if requested == "auto":
+            return "local_whisper"
         return requested
 
     def _build_options(
@@ -81,11 +124,133 @@ class SpeechRouter:
             last_error=self.last_error,
             last_error_at=self.last_elevenlabs_failure,
             mode="fallback" if self._elevenlabs_in_cooldown() else "primary",
+            breakers=[breaker.snapshot() for breaker in self.breakers.values()],
+            adaptive=self.adaptive.snapshot() if self.adaptive else None,
         )
 
+    def _hedge_delay_ms(self) -> float:
+        observed = self.breakers["elevenlabs"].latency_quantile(0.95, min_samples=self.settings.stt_breaker_min_calls)
+        if observed is None:
+            return self.settings.stt_hedge_default_delay_ms
+        return max(self.settings.stt_hedge_min_delay_ms, observed)
+
+    async def _call(
+        self, name: str, audio: AudioInput, options: TranscriptionOptions, tenant: Optional[str] = None
+    ) -> TranscriptionResult:
+        """Invoke one provider and feed the outcome into its circuit breaker."""
+
+        adapted: List[str] = []
+        adaptive = self.adaptive if name == "local_whisper" else None
+        if name == "local_whisper" and options.compute_type is None:
+            options = replace(options, compute_type=self.settings.stt_whisper_compute_type)
+        if adaptive is not None:
+            options, adapted = adaptive.adapt(options, tenant)
+            if adapted:
+                log_event(
+                    self.logger,
+                    logging.INFO,
+                    "stt.adaptive.downgrade",
+                    "Local transcription settings lowered for load",
+                    tenant=tenant,
+                    adapted=adapted,
+                    model=options.model,
+                    beam_size=options.beam_size,
+                    compute_type=options.compute_type,
+                    in_flight=adaptive.in_flight,
+                    rtf=adaptive.rtf(),
+                )
+            adaptive.in_flight += 1
+        breaker = self.breakers[name]
+        started = time.perf_counter()
+        try:
+            model = options.model or self.settings.stt_default_model
+            # The model name comes from the request; unknown names share one metric label.
+            label = model if model in KNOWN_MODELS else OTHER_LABEL
+            with self.tracer.span("stt.provider", provider=name, model=model), track_call("stt", name, label):
+                result: TranscriptionResult = await self.providers[name].transcribe(audio, options)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except SpeechProviderError as exc:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if exc.credit_issue:
+                breaker.trip(f"{exc.code}: {exc}", seconds=self.settings.stt_credit_cooldown_seconds)
+            elif exc.retryable:
+                breaker.record_failure(elapsed_ms, reason=exc.code)
+            else:
+                # The provider answered; a client-side error says nothing about its health.
+                breaker.record_success(elapsed_ms)
+            raise
+        except Exception:
+            breaker.record_failure((time.perf_counter() - started) * 1000, reason="unexpected")
+            raise
+        finally:
+            if adaptive is not None:
+                adaptive.in_flight -= 1
+        breaker.record_success((time.perf_counter() - started) * 1000)
+        if adaptive is not None:
+            adaptive.record(result.timing_ms.get("transcribe", 0.0), result.timing_ms.get("audio_seconds", 0.0))
+        result.options = options
+        result.adapted = adapted
+        return result
+
+    async def _transcribe_hedged(
+        self,
+        audio: AudioInput,
+        options: TranscriptionOptions,
+        logger: logging.LoggerAdapter,
+        tenant: Optional[str] = None,
+        attempted: Optional[Set[str]] = None,
+    ) -> TranscriptionResult:
+        """Call ElevenLabs and, if it is slower than its observed p95, race local Whisper against it.
+
+        When both fail, the cloud error is raised so only ElevenLabs' own failures count against it.
+        ``attempted`` gains ``local_whisper`` once the hedge has started it.
+        """
+
+        delay_ms = self._hedge_delay_ms()
+        cloud = asyncio.create_task(self._call("elevenlabs", audio, options))
+        tasks = {cloud}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay_ms / 1000)
+            if done or not self.breakers["local_whisper"].allow_request():
+                return await cloud
+
+            log_event(
+                logger,
+                logging.INFO,
+                "stt.hedge.start",
+                "Cloud transcription slow, starting local Whisper in parallel",
+                delay_ms=round(delay_ms, 1),
+            )
+            local = asyncio.create_task(self._call("local_whisper", audio, options, tenant))
+            tasks.add(local)
+            if attempted is not None:
+                attempted.add("local_whisper")
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        result = task.result()
+                        result.mode = "hedged" if task is local else "primary"
+                        log_event(
+                            logger,
+                            logging.INFO,
+                            "stt.hedge.winner",
+                            "Hedged transcription finished",
+                            provider=result.provider,
+                        )
+                        return result
+            raise cloud.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
     async def transcribe(
         self,
-        audio_bytes: bytes,
+        audio: AudioInput,
         *,
         provider: str,
         language: Optional[str],
@@ -93,29 +258,50 @@ class SpeechRouter:
         vad: bool,
         model: Optional[str],
         correlation_id: Optional[str],
+        tenant: Optional[str] = None,
     ) -> TranscriptionResult:
         provider = provider or "auto"
         options = self._build_options(language=language, beam_size=beam_size, vad=vad, model=model)
         primary = self._select_primary(provider)
-        mode = "primary"
+        # An explicit ElevenLabs request that was rerouted because its breaker is open.
+        mode = "fallback" if provider == "elevenlabs" and primary != "elevenlabs" else "primary"
         logger = bind_correlation_id(self.logger, correlation_id)
-        provider_instance = self.providers.get(primary)
 
-        if not provider_instance:
+        if primary not in self.providers:
             raise SpeechProviderError("provider_unavailable", f"Provider {primary} is not available")
+        if primary == "local_whisper" and not self.breakers["local_whisper"].allow_request():
+            raise SpeechProviderError(
+                "provider_unavailable",
+                "Local Whisper is unavailable while its circuit breaker is open",
+                retryable=True,
+            )
 
+        hedge = (
+            self.settings.stt_hedge_enabled
+            and provider == "auto"
+            and primary == "elevenlabs"
+            and "local_whisper" in self.providers
+        )
+        attempted: Set[str] = set()
         try:
             log_event(
                 logger,
                 logging.INFO,
                 "stt.transcribe.start",
                 "Transcription starting",
+                requested=provider,
                 provider=primary,
                 language=options.language or "auto",
                 model=options.model,
+                beam_size=options.beam_size,
+                vad=options.vad_filter,
+                hedged=hedge,
             )
-            result: TranscriptionResult = await provider_instance.transcribe(audio_bytes, options)
-            result.mode = mode
+            if hedge:
+                result = await self._transcribe_hedged(audio, options, logger, tenant, attempted)
+            else:
+                result = await self._call(primary, audio, options, tenant)
+                result.mode = mode
             self.last_provider_used = result.provider
             return result
         except SpeechProviderError as exc:
@@ -127,13 +313,13 @@ class SpeechRouter:
                 provider=primary,
                 code=exc.code,
             )
-            if primary == "elevenlabs" and exc.credit_issue:
+            if primary == "elevenlabs" and (exc.credit_issue or exc.retryable):
                 self._mark_elevenlabs_failure(str(exc))
-                fallback = self.providers.get("local_whisper")
-                if provider == "elevenlabs" and not fallback:
-                    raise
-                if fallback:
-                    mode = "fallback"
+                if (
+                    "local_whisper" in self.providers
+                    and "local_whisper" not in attempted
+                    and self.breakers["local_whisper"].allow_request()
+                ):
                     log_event(
                         logger,
                         logging.INFO,
@@ -141,8 +327,8 @@ class SpeechRouter:
                         "Falling back to local whisper",
                         reason=exc.code,
                     )
-                    result = await fallback.transcribe(audio_bytes, options)
-                    result.mode = mode
+                    result = await self._call("local_whisper", audio, options, tenant)
+                    result.mode = "fallback"
                     self.last_provider_used = result.provider
                     return result
             raise
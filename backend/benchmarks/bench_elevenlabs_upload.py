@@ -0,0 +1,172 @@
+"""Upload large audio files to a local ElevenLabs stub and compare client strategies.
+
+``buffered`` reproduces the previous provider: the whole file is read into
+memory, sent as an in-memory multipart ``files`` payload, and every request
+opens a fresh ``httpx.AsyncClient``. ``streamed`` uses the current
+``ElevenLabsProvider``: one pooled client and a multipart body streamed from
+the spooled upload on disk. The stub counts TCP connections so connection
+reuse is visible; each scenario runs in a fresh interpreter for clean RSS.
+
+    python -m benchmarks.bench_elevenlabs_upload --size-mb 100 --requests 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import emit, peak_rss_mb, rss_mb, run_isolated
+
+_RESPONSE_BODY = b'{"text": "stub transcript", "segments": []}'
+
+
+class StubServer:
+    """Minimal HTTP/1.1 keep-alive server that drains request bodies without buffering them."""
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.requests = 0
+        self.bytes_received = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _drain(self, reader: asyncio.StreamReader, length: int) -> None:
+        while length:
+            chunk = await reader.read(min(length, 1024 * 1024))
+            if not chunk:
+                raise ConnectionError("client closed mid-body")
+            length -= len(chunk)
+            self.bytes_received += len(chunk)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = {
+                    key.strip().lower(): value.strip()
+                    for key, _, value in (line.partition(":") for line in head.decode("latin-1").split("\r\n")[1:])
+                    if key
+                }
+                if "content-length" in headers:
+                    await self._drain(reader, int(headers["content-length"]))
+                elif headers.get("transfer-encoding") == "chunked":
+                    while True:
+                        size = int((await reader.readline()).split(b";")[0], 16)
+                        await self._drain(reader, size + 2)
+                        if size == 0:
+                            break
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(_RESPONSE_BODY)}\r\n\r\n".encode()
+                    + _RESPONSE_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _buffered(base_url: str, path: str, requests: int) -> None:
+    import httpx
+
+    for _ in range(requests):
+        with open(path, "rb") as handle:
+            audio_bytes = handle.read()
+        async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+            response = await client.post(
+                "/v1/audio/transcriptions",
+                files={"file": ("audio.wav", audio_bytes, "audio/wav")},
+                data={"model_id": "scribe_v1"},
+            )
+            response.raise_for_status()
+        del audio_bytes
+
+
+async def _streamed(base_url: str, path: str, requests: int) -> None:
+    from app.settings import Settings
+    from app.speech.providers.base import AudioStream, TranscriptionOptions
+    from app.speech.providers.elevenlabs_stt import ElevenLabsProvider
+
+    provider = ElevenLabsProvider(
+        Settings(ELEVENLABS_API_KEY="bench", ELEVENLABS_BASE_URL=base_url, ELEVENLABS_TIMEOUT_SECONDS=120)
+    )
+    try:
+        for _ in range(requests):
+            with open(path, "rb") as handle:
+                audio = AudioStream(handle, os.path.getsize(path), filename="audio.wav")
+                await provider.transcribe(audio, TranscriptionOptions(model="scribe_v1"))
+    finally:
+        await provider.aclose()
+
+
+async def _scenario(name: str, size_mb: int, requests: int) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".wav") as tmp:
+        block = os.urandom(1024 * 1024)
+        for _ in range(size_mb):
+            tmp.write(block)
+        tmp.flush()
+
+        server = StubServer()
+        port = await server.start()
+        baseline = rss_mb()
+        started = time.perf_counter()
+        runner = _buffered if name == "buffered" else _streamed
+        await runner(f"http://127.0.0.1:{port}", tmp.name, requests)
+        elapsed = time.perf_counter() - started
+        await server.stop()
+
+    return {
+        "scenario": name,
+        "size_mb": size_mb,
+        "requests": requests,
+        "connections_opened": server.connections,
+        "bytes_received": server.bytes_received,
+        "elapsed_s": round(elapsed, 3),
+        "mb_per_s": round(size_mb * requests / elapsed, 1),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_delta_mb": round(peak_rss_mb() - baseline, 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=3)
+    parser.add_argument("--scenario", choices=["buffered", "streamed"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        emit(asyncio.run(_scenario(args.scenario, args.size_mb, args.requests)))
+        return
+
+    common = ["--size-mb", str(args.size_mb), "--requests", str(args.requests)]
+    buffered = run_isolated("benchmarks.bench_elevenlabs_upload", "--scenario", "buffered", *common)
+    streamed = run_isolated("benchmarks.bench_elevenlabs_upload", "--scenario", "streamed", *common)
+    emit(
+        {
+            "benchmark": "elevenlabs_upload",
+            "buffered": buffered,
+            "streamed": streamed,
+            "peak_rss_saved_mb": round(buffered["peak_delta_mb"] - streamed["peak_delta_mb"], 1),
+        }
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
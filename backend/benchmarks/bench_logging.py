@@ -0,0 +1,143 @@
+"""Caller-side cost of one ``log_event`` call with many threads logging at once.
+
+``sync`` reproduces the previous setup: the stream and broadcast handlers sit
+directly on the root logger and each one JSON-encodes the record on the
+calling thread, rebuilding the standard attribute set on every call. ``queued``
+is the current pipeline from ``configure_logging``: the caller only enqueues
+and a listener thread formats once and writes. Output goes to ``/dev/null`` so
+the numbers measure the logging code, not the terminal. Each scenario runs in
+a fresh interpreter.
+
+    python -m benchmarks.bench_logging --threads 16 --calls 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from benchmarks.common import emit, percentiles, run_isolated
+
+
+class _LegacyJsonFormatter(logging.Formatter):
+    """The formatter as it was before the queue pipeline (per-call attribute set, stdlib json)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        base = {
+            "ts": datetime.datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname.upper(),
+            "event": getattr(record, "event", "log"),
+            "message": record.getMessage(),
+            "logger": record.name,
+            "correlation_id": getattr(record, "correlation_id", "-"),
+        }
+        standard_attrs = set(logging.LogRecord(None, None, "", 0, "", (), None).__dict__.keys())
+        for key, value in record.__dict__.items():
+            if key not in standard_attrs and key not in base:
+                base[key] = value
+        return json.dumps(base, default=str)
+
+
+def _configure(name: str) -> None:
+    from app.common.logging import BroadcastLogHandler, LogStreamBroadcaster, configure_logging
+
+    sys.stderr = open(os.devnull, "w")  # noqa: SIM115 - lives for the whole process
+    if name == "queued":
+        configure_logging(max_queue=1_000_000)
+        return
+    formatter = _LegacyJsonFormatter()
+    broadcast = BroadcastLogHandler(LogStreamBroadcaster())
+    stream = logging.StreamHandler()
+    for handler in (broadcast, stream):
+        handler.setFormatter(formatter)
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.setLevel(logging.INFO)
+    root.addHandler(broadcast)
+    root.addHandler(stream)
+
+
+def _scenario(name: str, threads: int, calls: int) -> dict:
+    from app.common.logging import get_log_pipeline, get_logger, log_event
+
+    _configure(name)
+    logger = get_logger("bench.logging")
+    samples: list[list[float]] = [[] for _ in range(threads)]
+    start_barrier = threading.Barrier(threads + 1)
+
+    def _worker(index: int) -> None:
+        timings = samples[index]
+        start_barrier.wait()
+        for call in range(calls):
+            started = time.perf_counter_ns()
+            log_event(
+                logger,
+                logging.INFO,
+                "stt.transcribe.completed",
+                "Transcription completed",
+                provider="local_whisper",
+                total_ms=123.45,
+                call=call,
+            )
+            timings.append((time.perf_counter_ns() - started) / 1000)
+
+    workers = [threading.Thread(target=_worker, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    started = time.perf_counter()
+    start_barrier.wait()
+    for worker in workers:
+        worker.join()
+    callers_done = time.perf_counter() - started
+
+    pipeline = get_log_pipeline() if name == "queued" else None
+    if pipeline is not None:
+        pipeline.stop()  # drains the queue
+    drained = time.perf_counter() - started
+
+    total = threads * calls
+    caller_us = [value for timings in samples for value in timings]
+    return {
+        "scenario": name,
+        "threads": threads,
+        "events": total,
+        "caller_us": {"mean": round(sum(caller_us) / len(caller_us), 2), **percentiles(caller_us)},
+        "callers_done_s": round(callers_done, 3),
+        "drained_s": round(drained, 3),
+        "events_per_s": round(total / drained),
+        "dropped": pipeline.dropped if pipeline is not None else 0,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=5000, help="log_event calls per thread")
+    parser.add_argument("--scenario", choices=["sync", "queued"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        emit(_scenario(args.scenario, args.threads, args.calls))
+        return
+
+    common = ["--threads", str(args.threads), "--calls", str(args.calls)]
+    sync = run_isolated("benchmarks.bench_logging", "--scenario", "sync", *common)
+    queued = run_isolated("benchmarks.bench_logging", "--scenario", "queued", *common)
+    emit(
+        {
+            "benchmark": "logging",
+            "sync": sync,
+            "queued": queued,
+            "caller_mean_speedup": round(sync["caller_us"]["mean"] / queued["caller_us"]["mean"], 2),
+        }
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,80 @@
+"""Compare RSS when the SpeechRouter and whisper_service load the same Whisper model.
+
+``separate`` reproduces the previous layout (one private cache per code path);
+``shared`` uses the process-wide model cache both paths now go through. Each
+scenario runs in a fresh interpreter so RSS numbers do not bleed into each other.
+
+    python -m benchmarks.bench_model_memory            # fake weights sized like the real model
+    python -m benchmarks.bench_model_memory --real     # real faster-whisper weights (downloads on first use)
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+
+from benchmarks.common import emit, rss_mb, run_isolated
+
+
+def _fake_loader(model_name: str, compute_type: str):
+    import numpy as np
+    from app.services.model_cache import estimate_model_mb
+
+    # Touch every page so the allocation shows up in RSS like real weights would.
+    return np.ones(int(estimate_model_mb(model_name, compute_type) * 1024 * 1024), dtype=np.uint8)
+
+
+def _scenario(name: str, model: str, compute_type: str, real: bool) -> dict:
+    from app.services.model_cache import ModelCache, load_whisper_model
+
+    loader = load_whisper_model if real else _fake_loader
+    gc.collect()
+    baseline = rss_mb()
+    if name == "separate":
+        router_cache = ModelCache(loader, budget_mb=1e9)
+        service_cache = ModelCache(loader, budget_mb=1e9)
+        models = [router_cache.get(model, compute_type), service_cache.get(model, compute_type)]
+    else:
+        shared = ModelCache(loader, budget_mb=1e9)
+        models = [shared.get(model, compute_type), shared.get(model, compute_type)]
+    loaded = rss_mb()
+    del models
+    return {
+        "scenario": name,
+        "model": model,
+        "compute_type": compute_type,
+        "weights": "real" if real else "fake",
+        "baseline_rss_mb": round(baseline, 1),
+        "loaded_rss_mb": round(loaded, 1),
+        "delta_rss_mb": round(loaded - baseline, 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--real", action="store_true", help="load real faster-whisper weights")
+    parser.add_argument("--scenario", choices=["separate", "shared"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        emit(_scenario(args.scenario, args.model, args.compute_type, args.real))
+        return
+
+    common = ["--model", args.model, "--compute-type", args.compute_type] + (["--real"] if args.real else [])
+    separate = run_isolated("benchmarks.bench_model_memory", "--scenario", "separate", *common)
+    shared = run_isolated("benchmarks.bench_model_memory", "--scenario", "shared", *common)
+    emit(
+        {
+            "benchmark": "model_memory",
+            "separate": separate,
+            "shared": shared,
+            "rss_saved_mb": round(separate["delta_rss_mb"] - shared["delta_rss_mb"], 1),
+        }
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,176 @@
+"""Local Whisper throughput and latency with inference in-process vs in the sidecar.
+
+Both modes drive ``LocalWhisperProvider.transcribe`` with the same WAV at a
+fixed concurrency, so the numbers include decoding. ``inprocess`` runs the
+model in this process. ``sidecar`` starts ``app.speech.inference_sidecar`` in
+a subprocess and sends it the PCM over the Unix socket. The difference is
+the cost of the socket hop. The report also gives this process's RSS after
+each mode. With ``--real-model``, that is the memory the sidecar moves out
+of the API process.
+
+By default the model is loadgen's ``FakeWhisperModel``, which sleeps for
+``--whisper-latency-ms`` plus ``--whisper-ms-per-audio-second`` per audio
+second. ``--real-model tiny`` uses faster-whisper instead.
+
+    python -m benchmarks.bench_sidecar --concurrency 8 --duration 10
+    python -m benchmarks.bench_sidecar --real-model tiny --audio-seconds 10 --concurrency 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.common import BACKEND_DIR, emit, percentiles, rss_mb
+from benchmarks.loadgen import FakeWhisperModel, _wav_bytes, install_fake_whisper
+
+
+def _serve(args: argparse.Namespace) -> None:
+    """Child process: the sidecar, with the fake model unless ``--real-model`` is given."""
+
+    if not args.real_model:
+        install_fake_whisper(args.whisper_latency_ms, args.whisper_ms_per_audio_second)
+    from app.speech import inference_sidecar
+
+    inference_sidecar.main(["--socket", args.child_serve, "--max-concurrency", str(args.sidecar_concurrency)])
+
+
+def _start_sidecar(args: argparse.Namespace, socket_path: str) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.bench_sidecar", "--child-serve", socket_path]
+    command += ["--sidecar-concurrency", str(args.sidecar_concurrency)]
+    command += ["--whisper-latency-ms", str(args.whisper_latency_ms)]
+    command += ["--whisper-ms-per-audio-second", str(args.whisper_ms_per_audio_second)]
+    if args.real_model:
+        command += ["--real-model", args.real_model]
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while not os.path.exists(socket_path):
+        if process.poll() is not None:
+            raise RuntimeError(f"sidecar exited with code {process.returncode}")
+        if time.monotonic() > deadline:
+            process.terminate()
+            raise RuntimeError("sidecar did not start within 120s")
+        time.sleep(0.05)
+    return process
+
+
+async def _drive(provider, wav: bytes, model: str, args: argparse.Namespace) -> Dict[str, Any]:
+    from app.speech import AudioStream, TranscriptionOptions
+
+    options = TranscriptionOptions(language="en", beam_size=1, vad_filter=False, model=model)
+    latencies: List[float] = []
+    errors = 0
+
+    async def _one() -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            await provider.transcribe(AudioStream.from_bytes(wav), options)
+        except Exception:  # noqa: BLE001 - counted, the run goes on
+            errors += 1
+            return
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    async def _worker(until: float) -> None:
+        while time.perf_counter() < until:
+            await _one()
+
+    await asyncio.gather(*(_one() for _ in range(args.concurrency)))  # warm up: model load, connections
+    latencies.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker(started + args.duration) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": percentiles(latencies),
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+def _provider(args: argparse.Namespace, socket_path: str | None):
+    from app.services.model_cache import ModelCache, get_model_cache
+    from app.settings import Settings
+    from app.speech import LocalWhisperProvider
+
+    overrides: Dict[str, Any] = {"STT_SIDECAR_TIMEOUT_SECONDS": 600}
+    if socket_path:
+        overrides["STT_SIDECAR_SOCKET"] = socket_path
+    settings = Settings(**overrides)
+    if args.real_model:
+        cache = get_model_cache()
+    else:
+        model = FakeWhisperModel(args.whisper_latency_ms, args.whisper_ms_per_audio_second)
+        cache = ModelCache(lambda *_: model, budget_mb=settings.stt_model_cache_budget_mb)
+    return LocalWhisperProvider(settings, model_cache=cache)
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    wav = _wav_bytes(args.audio_seconds)
+    model = args.real_model or "tiny"
+    results: Dict[str, Any] = {}
+    if "inprocess" in args.modes:
+        provider = _provider(args, None)
+        results["inprocess"] = await _drive(provider, wav, model, args)
+        provider.model_cache.clear()
+    if "sidecar" in args.modes:
+        with tempfile.TemporaryDirectory(prefix="sidecar-") as directory:
+            socket_path = os.path.join(directory, "whisper.sock")
+            process = _start_sidecar(args, socket_path)
+            provider = _provider(args, socket_path)
+            try:
+                results["sidecar"] = await _drive(provider, wav, model, args)
+                results["sidecar"]["server"] = await provider.sidecar.status()
+            finally:
+                await provider.aclose()
+                process.terminate()
+                process.wait(timeout=10)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="inprocess,sidecar", help="comma separated: inprocess,sidecar")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per mode")
+    parser.add_argument("--audio-seconds", type=float, default=5.0)
+    parser.add_argument("--whisper-latency-ms", type=float, default=100.0)
+    parser.add_argument("--whisper-ms-per-audio-second", type=float, default=0.0)
+    parser.add_argument("--real-model", help="faster-whisper model name instead of the fake model")
+    parser.add_argument(
+        "--sidecar-concurrency", type=int, help="transcriptions the sidecar runs at once (default: --concurrency)"
+    )
+    parser.add_argument("--child-serve", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.sidecar_concurrency = args.sidecar_concurrency or args.concurrency
+
+    if args.child_serve:
+        _serve(args)
+        return
+
+    args.modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    results = asyncio.run(_run(args))
+    report: Dict[str, Any] = {
+        "benchmark": "sidecar",
+        "model": args.real_model or f"fake ({args.whisper_latency_ms:g} ms)",
+        "concurrency": args.concurrency,
+        "audio_seconds": args.audio_seconds,
+        "modes": results,
+    }
+    if "inprocess" in results and "sidecar" in results:
+        inprocess, sidecar = results["inprocess"]["latency_ms"]["p95"], results["sidecar"]["latency_ms"]["p95"]
+        if inprocess and sidecar:
+            report["sidecar_p95_overhead_ms"] = round(sidecar - inprocess, 2)
+    emit(report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,128 @@
+"""Cold-start cost of a gateway process: ``import app.main`` and time to first ``/healthz``.
+
+Pod scale-out waits on both, so this doubles as a regression guard. Each
+import sample runs in a fresh interpreter and also lists which heavy optional
+modules (provider SDKs, numpy/soundfile/soxr, faster-whisper) the import
+pulled in; with only mock providers enabled that list should be empty.
+``ready`` samples start ``uvicorn app.main:app`` and poll ``/healthz`` until
+the first 200.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --max-import-ms 1500 --max-ready-ms 3000   # exits 1 when exceeded
+
+Set ``CONNECTOR_WARM_UP=true`` (or any other setting) in the environment to
+measure that configuration instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, emit, percentiles, rss_mb, run_isolated
+
+HEAVY_MODULES = (
+    "openai",
+    "azure.search.documents",
+    "azure.cognitiveservices.speech",
+    "numpy",
+    "soundfile",
+    "soxr",
+    "faster_whisper",
+)
+
+
+def _import_sample() -> dict:
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return {
+        "import_ms": round(elapsed_ms, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _ready_sample(timeout: float) -> float:
+    """Milliseconds from spawning uvicorn to the first successful ``/healthz``."""
+
+    port = _free_port()
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)]
+    command += ["--log-level", "warning", "--no-access-log"]
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - started < timeout:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/healthz").status_code == 200:
+                        return (time.perf_counter() - started) * 1000
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+        raise RuntimeError(f"/healthz did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="samples per measurement")
+    parser.add_argument("--skip-ready", action="store_true", help="only measure the import")
+    parser.add_argument("--ready-timeout", type=float, default=60.0)
+    parser.add_argument("--max-import-ms", type=float, help="fail when the median import exceeds this")
+    parser.add_argument("--max-ready-ms", type=float, help="fail when the median time to /healthz exceeds this")
+    parser.add_argument("--child-import", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child_import:
+        emit(_import_sample())
+        return
+
+    imports = [run_isolated("benchmarks.bench_startup", "--child-import") for _ in range(args.runs)]
+    import_ms = [sample["import_ms"] for sample in imports]
+    report = {
+        "benchmark": "startup",
+        "runs": args.runs,
+        "import_ms": {**percentiles(import_ms, (0.5,)), "min": min(import_ms), "max": max(import_ms)},
+        "import_rss_mb": imports[-1]["rss_mb"],
+        "heavy_modules_at_import": sorted({name for sample in imports for name in sample["heavy_modules"]}),
+    }
+    if not args.skip_ready:
+        ready_ms = [_ready_sample(args.ready_timeout) for _ in range(args.runs)]
+        report["ready_ms"] = {
+            **percentiles(ready_ms, (0.5,)),
+            "min": round(min(ready_ms), 1),
+            "max": round(max(ready_ms), 1),
+        }
+
+    failures = []
+    if args.max_import_ms is not None and report["import_ms"]["p50"] > args.max_import_ms:
+        failures.append(f"import p50 {report['import_ms']['p50']}ms > {args.max_import_ms}ms")
+    if args.max_ready_ms is not None and "ready_ms" in report and report["ready_ms"]["p50"] > args.max_ready_ms:
+        failures.append(f"/healthz p50 {report['ready_ms']['p50']}ms > {args.max_ready_ms}ms")
+    report["failures"] = failures
+    emit(report)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,129 @@
+"""Peak RSS of one /v1/audio/transcribe-file request up to the point Whisper gets PCM.
+
+``buffered`` reproduces the previous path: ``await file.read()`` pulls the
+whole upload into memory, the bytes are written to a temp ``.wav`` and
+faster-whisper decodes that file in one go (falling back to soundfile +
+soxr when faster-whisper is absent). ``streamed`` is the current path: the
+spooled upload is wrapped in an ``AudioStream`` and decoded block by block
+into a bounded PCM buffer. Each scenario runs in a fresh interpreter so the
+peak RSS belongs to a single request.
+
+    python -m benchmarks.bench_upload_ingest --minutes 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import emit, peak_rss_mb, rss_mb, run_isolated
+
+
+def _write_wav(path: str, minutes: float, rate: int, channels: int) -> None:
+    import numpy as np
+    import soundfile as sf
+
+    block = int(rate * 10)
+    tone = (np.sin(np.arange(block, dtype=np.float32) * 2 * np.pi * 440 / rate) * 0.2).astype(np.float32)
+    frames = np.repeat(tone[:, None], channels, axis=1)
+    with sf.SoundFile(path, "w", samplerate=rate, channels=channels, subtype="PCM_16", format="WAV") as sound:
+        for _ in range(int(minutes * 6)):
+            sound.write(frames)
+
+
+def _buffered(path: str) -> int:
+    with open(path, "rb") as upload:
+        raw_bytes = upload.read()
+    with tempfile.NamedTemporaryFile(suffix=".wav") as tmp_file:
+        tmp_file.write(raw_bytes)
+        tmp_file.flush()
+        try:
+            from faster_whisper import decode_audio
+
+            samples = decode_audio(tmp_file.name, sampling_rate=16000)
+        except ModuleNotFoundError:  # pragma: no cover - dependency may be absent
+            import numpy as np
+            import soundfile as sf
+            import soxr
+
+            audio, rate = sf.read(tmp_file.name, always_2d=True)
+            samples = soxr.resample(np.mean(audio, axis=1), rate, 16000).astype(np.float32)
+    return len(samples)
+
+
+def _streamed(path: str) -> int:
+    from app.speech.audio_ingest import decode_to_pcm
+    from app.speech.providers.base import AudioStream
+
+    with open(path, "rb") as upload:
+        decoded = decode_to_pcm(AudioStream(upload, os.path.getsize(path)), max_seconds=4 * 3600)
+    return len(decoded.samples)
+
+
+def _scenario(name: str, minutes: float, rate: int, channels: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "upload.wav")
+        _write_wav(path, minutes, rate, channels)
+        upload_mb = os.path.getsize(path) / (1024 * 1024)
+        # Import the decoders before the baseline so library code is not counted as request memory.
+        import numpy  # noqa: F401
+        import soundfile  # noqa: F401
+        import soxr  # noqa: F401
+
+        if name == "streamed":
+            import app.speech.audio_ingest  # noqa: F401
+        else:
+            try:
+                import faster_whisper  # noqa: F401
+            except ModuleNotFoundError:  # pragma: no cover
+                pass
+
+        baseline = rss_mb()
+        baseline_peak = peak_rss_mb()
+        started = time.perf_counter()
+        samples = _buffered(path) if name == "buffered" else _streamed(path)
+        elapsed = time.perf_counter() - started
+
+    peak = peak_rss_mb()
+    return {
+        "scenario": name,
+        "upload_mb": round(upload_mb, 1),
+        "audio_seconds": round(samples / 16000, 1),
+        "pcm_mb": round(samples * 4 / (1024 * 1024), 1),
+        "elapsed_s": round(elapsed, 3),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak, 1),
+        "request_peak_mb": round(peak - max(baseline, baseline_peak), 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--rate", type=int, default=44_100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--scenario", choices=["buffered", "streamed"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        emit(_scenario(args.scenario, args.minutes, args.rate, args.channels))
+        return
+
+    common = ["--minutes", str(args.minutes), "--rate", str(args.rate), "--channels", str(args.channels)]
+    buffered = run_isolated("benchmarks.bench_upload_ingest", "--scenario", "buffered", *common)
+    streamed = run_isolated("benchmarks.bench_upload_ingest", "--scenario", "streamed", *common)
+    emit(
+        {
+            "benchmark": "upload_ingest",
+            "buffered": buffered,
+            "streamed": streamed,
+            "request_peak_saved_mb": round(buffered["request_peak_mb"] - streamed["request_peak_mb"], 1),
+        }
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,64 @@
+"""Shared helpers for the benchmark scripts."""
+
+from __future__ import annotations
+
+import json
+import os
+import resource
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            pages = int(handle.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):  # pragma: no cover - non-Linux fallback
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+
+def percentiles(values: Iterable[float], quantiles: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict[str, Optional[float]]:
+    ordered: List[float] = sorted(values)
+    result: Dict[str, Optional[float]] = {}
+    for quantile in quantiles:
+        label = f"p{quantile * 100:g}".replace(".", "")
+        if not ordered:
+            result[label] = None
+            continue
+        index = min(len(ordered) - 1, max(0, int(round(quantile * (len(ordered) - 1)))))
+        result[label] = round(ordered[index], 3)
+    return result
+
+
+def run_isolated(module: str, *args: str) -> Dict[str, Any]:
+    """Run ``python -m <module> <args>`` in a fresh interpreter and parse its JSON output."""
+
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    completed = subprocess.run(
+        [sys.executable, "-m", module, *args],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def emit(payload: Dict[str, Any]) -> None:
+    print(json.dumps(payload, indent=None, default=str))
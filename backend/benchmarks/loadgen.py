@@ -0,0 +1,405 @@
+"""Drive the gateway with mock providers and report throughput and latency percentiles.
+
+The app runs with its default mock connectors (``MockLLMConnector``,
+``MockSearchConnector``, the ServiceNow ``MockIncidentStore``). faster-whisper
+is replaced by a fake model that sleeps for ``--whisper-latency-ms`` plus
+``--whisper-ms-per-audio-second`` per second of audio, so
+``/v1/audio/transcribe-file`` exercises upload handling, decoding, the model
+cache and the speech router without real inference.
+
+Each target gets its own load phase:
+
+- ``chat``: ``POST /v1/chat`` with RAG from the mock search connector. Every prompt is distinct so request coalescing
+  does not hide the work.
+- ``transcribe``: ``POST /v1/audio/transcribe-file`` with a generated WAV.
+- ``servicenow``: ``/v1/tools/servicenow/*``, rotating search, ticket get, work notes and capabilities.
+
+``--concurrency N`` keeps N requests in flight (closed loop). ``--rps R``
+sends at a fixed rate (open loop). In open-loop mode latency is measured from
+the scheduled send time, so a stalled server shows up as latency instead of
+quietly lowering the offered rate. ``--server inprocess`` (default) calls the
+ASGI app directly. ``--server uvicorn`` starts a real server in a subprocess,
+which includes HTTP parsing and keeps the client off the server's event loop.
+``--workers N`` (uvicorn only) runs N worker processes sharing sessions and
+metrics through a temporary ``SHARED_STATE_PATH``.
+Set ``MOCK_LLM_PROFILE`` and the other ``MOCK_*_PROFILE`` variables to give
+the mock providers production-like latency and faults (see the backend README).
+
+    python -m benchmarks.loadgen --targets chat --concurrency 32 --duration 20
+    python -m benchmarks.loadgen --targets transcribe --rps 20 --whisper-latency-ms 150 --server uvicorn
+    python -m benchmarks.loadgen --targets chat --server uvicorn --workers 4
+    python -m benchmarks.loadgen --output head.json --baseline main.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import array
+import asyncio
+import io
+import itertools
+import json
+import logging
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, emit, percentiles
+
+TARGETS = ("chat", "transcribe", "servicenow")
+
+
+@dataclass
+class _Segment:
+    text: str
+    start: float
+    end: float
+    avg_logprob: float = -0.1
+
+
+@dataclass
+class _Info:
+    language: str
+    duration: float
+
+
+class FakeWhisperModel:
+    """Stands in for ``faster_whisper.WhisperModel``; blocks like CPU inference would."""
+
+    def __init__(self, latency_ms: float, ms_per_audio_second: float) -> None:
+        self.latency_ms = latency_ms
+        self.ms_per_audio_second = ms_per_audio_second
+
+    def transcribe(self, samples, language=None, beam_size=1, vad_filter=False):
+        duration = len(samples) / 16000
+        time.sleep((self.latency_ms + self.ms_per_audio_second * duration) / 1000)
+        return iter([_Segment("load test transcript", 0.0, round(duration, 2))]), _Info(language or "en", duration)
+
+
+def install_fake_whisper(latency_ms: float, ms_per_audio_second: float) -> None:
+    from app.services import model_cache
+
+    model_cache.load_whisper_model = lambda *args, **kwargs: FakeWhisperModel(latency_ms, ms_per_audio_second)
+
+
+def _gateway_app(whisper_latency_ms: float, whisper_ms_per_audio_second: float):
+    install_fake_whisper(whisper_latency_ms, whisper_ms_per_audio_second)
+    from app.main import app
+
+    logging.disable(logging.INFO)  # keep per-request INFO logs out of the measurement
+    return app
+
+
+def create_app():
+    """App factory for ``uvicorn --factory``; the fake Whisper timing comes from ``LOADGEN_*`` variables."""
+
+    return _gateway_app(
+        float(os.environ.get("LOADGEN_WHISPER_LATENCY_MS", "100")),
+        float(os.environ.get("LOADGEN_WHISPER_MS_PER_AUDIO_SECOND", "0")),
+    )
+
+
+def _wav_bytes(seconds: float, rate: int = 16000) -> bytes:
+    frames = int(seconds * rate)
+    period = [int(8000 * math.sin(index * 2 * math.pi / 40)) for index in range(40)]
+    samples = array.array("h", period * (frames // len(period) + 1))[:frames]
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as sound:
+        sound.setnchannels(1)
+        sound.setsampwidth(2)
+        sound.setframerate(rate)
+        sound.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+RequestFactory = Callable[[int], Dict[str, Any]]
+
+
+def _request_factories(audio_seconds: float) -> Dict[str, RequestFactory]:
+    wav = _wav_bytes(audio_seconds)
+
+    def _chat(index: int) -> Dict[str, Any]:
+        return {
+            "method": "POST",
+            "url": "/v1/chat",
+            "json": {
+                "channel": "loadgen",
+                "message": f"How do I reset my VPN token? (request {index})",
+                "use_rag": True,
+                "provider_selection": {
+                    "llm_provider": "mock-llm",
+                    "llm_model": "gpt-4o-mini",
+                    "rag_provider": "mock-search",
+                },
+            },
+        }
+
+    def _transcribe(index: int) -> Dict[str, Any]:
+        return {
+            "method": "POST",
+            "url": "/v1/audio/transcribe-file",
+            "params": {"provider": "local_whisper", "model": "tiny", "language": "en"},
+            "files": {"file": (f"load-{index}.wav", wav, "audio/wav")},
+        }
+
+    ticket = {"number": "INC0012345"}
+    servicenow_calls = [
+        {"method": "POST", "url": "/v1/tools/servicenow/search", "json": {"query": "email outage", "limit": 5}},
+        {"method": "POST", "url": "/v1/tools/servicenow/ticket/get", "json": {"ticket": ticket}},
+        {
+            "method": "POST",
+            "url": "/v1/tools/servicenow/ticket/add_work_note",
+            "json": {"ticket": ticket, "note": "load test note"},
+        },
+        {"method": "GET", "url": "/v1/tools/servicenow/capabilities"},
+    ]
+
+    def _servicenow(index: int) -> Dict[str, Any]:
+        return servicenow_calls[index % len(servicenow_calls)]
+
+    return {"chat": _chat, "transcribe": _transcribe, "servicenow": _servicenow}
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.latencies_ms: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors = 0
+        self.recording = False
+
+    def add(self, latency_ms: float, status: Optional[int]) -> None:
+        if not self.recording:
+            return
+        self.latencies_ms.append(latency_ms)
+        self.statuses[str(status) if status is not None else "transport_error"] += 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+
+async def _send(client: httpx.AsyncClient, request: Dict[str, Any], recorder: _Recorder, started: float) -> None:
+    status: Optional[int] = None
+    try:
+        response = await client.request(**request)
+        status = response.status_code
+    except httpx.HTTPError:
+        pass
+    recorder.add((time.perf_counter() - started) * 1000, status)
+
+
+async def _closed_loop(client, factory: RequestFactory, recorder: _Recorder, concurrency: int, until: float) -> None:
+    counter = itertools.count()
+
+    async def _worker() -> None:
+        while time.perf_counter() < until:
+            await _send(client, factory(next(counter)), recorder, time.perf_counter())
+
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+
+
+async def _open_loop(
+    client, factory: RequestFactory, recorder: _Recorder, rps: float, until: float, max_in_flight: int
+) -> int:
+    """Send at a fixed rate; returns how many sends were skipped because ``max_in_flight`` was reached."""
+
+    in_flight: set[asyncio.Task] = set()
+    interval = 1.0 / rps
+    next_send = time.perf_counter()
+    skipped = 0
+    for index in itertools.count():
+        if next_send >= until:
+            break
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            skipped += 1
+        else:
+            task = asyncio.create_task(_send(client, factory(index), recorder, next_send))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_send += interval
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    return skipped
+
+
+async def _run_target(client, name: str, factory: RequestFactory, args: argparse.Namespace) -> Dict[str, Any]:
+    recorder = _Recorder()
+
+    async def _phase(seconds: float) -> int:
+        until = time.perf_counter() + seconds
+        if args.rps:
+            return await _open_loop(client, factory, recorder, args.rps, until, args.max_in_flight)
+        await _closed_loop(client, factory, recorder, args.concurrency, until)
+        return 0
+
+    if args.warmup > 0:
+        await _phase(args.warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    skipped = await _phase(args.duration)
+    elapsed = time.perf_counter() - started
+
+    latencies = recorder.latencies_ms
+    return {
+        "target": name,
+        "requests": len(latencies),
+        "errors": recorder.errors,
+        "status": dict(sorted(recorder.statuses.items())),
+        "skipped_sends": skipped,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            **percentiles(latencies, (0.5, 0.95, 0.99)),
+            "max": round(max(latencies), 3) if latencies else None,
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_uvicorn(args: argparse.Namespace, state_dir: Optional[str]) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(BACKEND_DIR),
+        "LOADGEN_WHISPER_LATENCY_MS": str(args.whisper_latency_ms),
+        "LOADGEN_WHISPER_MS_PER_AUDIO_SECOND": str(args.whisper_ms_per_audio_second),
+    }
+    command = [sys.executable, "-m", "uvicorn", "benchmarks.loadgen:create_app", "--factory"]
+    command += ["--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log"]
+    if args.workers > 1:
+        command += ["--workers", str(args.workers)]
+        env.setdefault("SHARED_STATE_PATH", os.path.join(state_dir, "gateway-state.db"))
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/healthz", timeout=1.0).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 30s")
+
+
+async def _run(args: argparse.Namespace, targets: List[str]) -> List[Dict[str, Any]]:
+    factories = _request_factories(args.audio_seconds)
+    limits = httpx.Limits(max_connections=max(args.concurrency, args.max_in_flight if args.rps else 0))
+    timeout = httpx.Timeout(args.timeout)
+    process = None
+    state_dir = tempfile.TemporaryDirectory(prefix="loadgen-") if args.workers > 1 else None
+    if args.server == "uvicorn":
+        process, base_url = _start_uvicorn(args, state_dir.name if state_dir else None)
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout)
+    else:
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=_gateway_app(args.whisper_latency_ms, args.whisper_ms_per_audio_second)),
+            base_url="http://loadgen",
+            timeout=timeout,
+        )
+    try:
+        return [await _run_target(client, name, factories[name], args) for name in targets]
+    finally:
+        await client.aclose()
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if state_dir is not None:
+            state_dir.cleanup()
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any]) -> Dict[str, Dict[str, Optional[float]]]:
+    """p95 and throughput of each target relative to a previous run (``1.10`` = 10% higher)."""
+
+    previous = {entry["target"]: entry for entry in baseline.get("targets", [])}
+    comparison: Dict[str, Dict[str, Optional[float]]] = {}
+    for entry in results:
+        before = previous.get(entry["target"])
+        if before is None:
+            continue
+        p95, p95_before = entry["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        comparison[entry["target"]] = {
+            "p95_ratio": round(p95 / p95_before, 3) if p95 and p95_before else None,
+            "throughput_ratio": (
+                round(entry["throughput_rps"] / before["throughput_rps"], 3) if before["throughput_rps"] else None
+            ),
+        }
+    return comparison
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default=",".join(TARGETS), help="comma separated: chat,transcribe,servicenow")
+    parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes sharing state")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=16, help="requests kept in flight (closed loop)")
+    load.add_argument("--rps", type=float, help="fixed send rate (open loop)")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="open loop: skip sends beyond this")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per target")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds per target")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--audio-seconds", type=float, default=5.0)
+    parser.add_argument("--whisper-latency-ms", type=float, default=100.0)
+    parser.add_argument("--whisper-ms-per-audio-second", type=float, default=0.0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report from an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    targets = [name.strip() for name in args.targets.split(",") if name.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+    if args.workers > 1 and args.server != "uvicorn":
+        parser.error("--workers needs --server uvicorn")
+    results = asyncio.run(_run(args, targets))
+    report: Dict[str, Any] = {
+        "benchmark": "loadgen",
+        "commit": _git_commit(),
+        "server": args.server,
+        "workers": args.workers,
+        "mode": {"rps": args.rps} if args.rps else {"concurrency": args.concurrency},
+        "duration_s": args.duration,
+        "whisper_latency_ms": args.whisper_latency_ms,
+        "targets": results,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            report["comparison"] = compare(results, json.load(handle))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, default=str)
+    emit(report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
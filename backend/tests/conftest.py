@@ -19,9 +19,17 @@ if str(STUBS_DIR) not in sys.path:
 def app_instance():
     """Reset runtime memory and return the FastAPI app for tests."""
     from app.main import app
+    from app.runtime.coalescing import SingleFlight, TicketDeduplicator
+    from app.runtime.connector_health import ConnectorHealth
     from app.runtime.memory_store import MemoryStore
     from app.runtime.stats import StatsTracker
 
     app.state.runtime.memory = MemoryStore()
+    app.state.runtime.llm_flights = SingleFlight(app.state.settings.chat_coalesce_window_seconds)
+    app.state.runtime.ticket_dedup = TicketDeduplicator(app.state.settings.ticket_dedup_window_seconds)
+    app.state.runtime.connector_health = ConnectorHealth(
+        timeout_seconds=app.state.settings.connector_validation_timeout_seconds,
+        unhealthy_after=app.state.settings.connector_unhealthy_after,
+    )
     app.state.stats_tracker = StatsTracker()
     return app
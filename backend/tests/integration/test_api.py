@@ -8,6 +8,7 @@ import pytest
 from app.api import routes_admin, routes_audio, routes_chat
 from app.common.errors import GatewayException
 from app.models import ChatRequest, ProviderSelection
+from app.speech import SpeechProviderError
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.datastructures import Headers, UploadFile
@@ -54,9 +55,10 @@ def test_healthcheck(app_instance):
 
 def test_registry_returns_connectors(app_instance):
     request = _basic_request(app_instance)
-    payload = asyncio.run(routes_admin.registry(request, app_instance.state.runtime))
+    response = asyncio.run(routes_admin.registry(request, app_instance.state.runtime))
 
-    data = payload.model_dump()
+    data = json.loads(response.body)
+    assert response.headers["ETag"]
     assert set(data.keys()) == {"llm", "rag", "stt", "tts", "servicedesk"}
     assert any(item["id"] == "mock-llm" for item in data["llm"])
 
@@ -109,6 +111,17 @@ def test_chat_rejects_unconfigured_provider(app_instance):
     methods = _route_methods(app_instance, "/healthz")
     assert "POST" not in methods
 
+
+def test_chat_groups_unknown_providers_in_stats(app_instance):
+    client = TestClient(app_instance, raise_server_exceptions=False)
+    for index in range(5):
+        selection = {"llm_provider": f"bogus-{index}", "llm_model": "echo"}
+        client.post("/v1/chat", json={"channel": "web", "message": "hi", "provider_selection": selection})
+    providers = app_instance.state.stats_tracker.providers
+    assert not any(name.startswith("bogus-") for name in providers)
+    assert providers["unknown"].window("5m").count >= 5
+
+
 def test_audio_transcribe_and_negative_provider(app_instance):
     runtime = app_instance.state.runtime
     audio_bytes = base64.b64decode(base64.b64encode(b"test audio"))
@@ -149,6 +162,24 @@ def test_transcribe_file_defaults(app_instance):
         assert "error" in transcript
 
 
+def test_adaptive_tenant_comes_only_from_the_trusted_header(app_instance, monkeypatch):
+    speech_router = app_instance.state.speech_router
+    seen = []
+
+    async def _transcribe(audio, **kwargs):
+        seen.append(kwargs["tenant"])
+        raise SpeechProviderError("provider_unavailable", "stubbed")
+
+    monkeypatch.setattr(speech_router, "transcribe", _transcribe)
+    client = TestClient(app_instance, raise_server_exceptions=False)
+    headers = {"X-Gateway-Tenant": "acme"}
+    client.post("/v1/audio/transcribe", json={"audio_base64": "", "tenant_id": "premium"}, headers=headers)
+    monkeypatch.setattr(speech_router.settings, "stt_adaptive_tenant_header", "X-Gateway-Tenant")
+    client.post("/v1/audio/transcribe", json={"audio_base64": "", "tenant_id": "premium"}, headers=headers)
+    client.post("/v1/audio/transcribe", json={"audio_base64": "", "tenant_id": "premium"})
+    assert seen == [None, "acme", None]
+
+
 def test_runtime_stats_endpoint(app_instance):
     client = TestClient(app_instance)
     response = client.get("/v1/runtime")
@@ -156,7 +187,10 @@ def test_runtime_stats_endpoint(app_instance):
     data = response.json()
     assert data.get("backend_ready") is True
     assert data.get("runtime", {}).get("stt_provider")
-    assert data.get("stats", {}).get("rolling_window_size") == 50
+    stats = data.get("stats", {})
+    assert stats.get("window") == "5m"
+    assert set(stats.get("windows", {})) == {"1m", "5m", "1h", "lifetime"}
+    assert "p999_latency_ms" in stats
 
 
 def test_transcribe_file_rejects_bad_settings(app_instance):
@@ -201,6 +235,33 @@ def test_validate_connectors(app_instance):
     assert len(payload.results) > 0
 
 
+def test_validate_endpoint_serves_cached_health_and_chat_skips_unhealthy_rag(app_instance, monkeypatch):
+    runtime = app_instance.state.runtime
+    client = TestClient(app_instance)
+
+    async def _down():
+        raise ConnectionError("search backend unreachable")
+
+    monkeypatch.setattr(runtime.rag_connectors["mock-search"], "validate", _down)
+    assert client.get("/v1/admin/config/validate").json()["status"] == "pending"
+    for _ in range(runtime.connector_health.unhealthy_after):
+        refreshed = client.get("/v1/admin/config/validate", params={"refresh": "true"}).json()
+    search = next(item for item in refreshed["results"] if item["provider"] == "mock-search")
+    assert search["status"] == "error" and search["score"] == 0.25 and refreshed["checked_at"]
+    assert client.get("/v1/admin/config/validate").json() == refreshed
+
+    chat_payload = ChatRequest(
+        channel="web",
+        message="how do I reset my password?",
+        provider_selection=ProviderSelection(llm_provider="mock-llm", llm_model="echo", rag_provider="mock-search"),
+        use_rag=True,
+        include_debug=True,
+    )
+    response = asyncio.run(runtime.handle_chat(chat_payload, correlation_id=None))
+    assert response.reply and response.debug["rag_skipped"] == "provider_unhealthy"
+    assert response.debug["rag_results"] == []
+
+
 def test_validate_connectors_invalid_method(app_instance):
     methods = _route_methods(app_instance, "/v1/admin/config/validate")
     assert "POST" not in methods
@@ -209,3 +270,297 @@ def test_validate_connectors_invalid_method(app_instance):
 def test_create_session_invalid_method(app_instance):
     methods = _route_methods(app_instance, "/v1/sessions")
     assert "GET" not in methods
+
+
+def test_admin_model_cache_preload_and_unload(app_instance, monkeypatch):
+    from app.services.model_cache import ModelCache
+
+    cache = ModelCache(lambda name, compute: object(), budget_mb=1000, estimator=lambda name, compute: 200)
+    monkeypatch.setattr(app_instance.state, "model_cache", cache)
+    client = TestClient(app_instance)
+
+    response = client.post("/v1/admin/models/preload", json={"model": "tiny", "compute_type": "int8"})
+    assert response.status_code == 200
+    assert response.json()["loaded"]["model"] == "tiny"
+    assert client.get("/v1/admin/models").json()["resident_mb"] == 200
+
+    response = client.post("/v1/admin/models/unload", json={"model": "tiny"})
+    assert response.json()["unloaded"] == [{"model": "tiny", "compute_type": "int8"}]
+    assert response.json()["cache"]["resident"] == []
+
+
+def test_metrics_endpoint_exposes_openmetrics(app_instance):
+    client = TestClient(app_instance)
+    session_id = client.post("/v1/sessions").json()["session_id"]
+    chat = client.post(
+        "/v1/chat",
+        json={
+            "session_id": session_id,
+            "channel": "web",
+            "message": "hello metrics",
+            "provider_selection": {"llm_provider": "mock-llm", "llm_model": "echo"},
+        },
+    )
+    assert chat.status_code == 200
+    for index in range(3):  # client-chosen model names must not become label values
+        selection = {"llm_provider": "mock-llm", "llm_model": f"made-up-{index}"}
+        payload = {"session_id": session_id, "channel": "web", "message": "hi", "provider_selection": selection}
+        client.post("/v1/chat", json=payload)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/openmetrics-text")
+    body = response.text
+    assert body.endswith("# EOF\n")
+    assert 'gateway_http_request_duration_seconds_count{method="POST",route="/v1/chat",status="200"}' in body
+    llm_bucket = 'gateway_provider_call_duration_seconds_bucket{kind="llm",provider="mock-llm",model="echo",le="+Inf"}'
+    assert llm_bucket in body
+    assert 'gateway_llm_tokens_total{provider="mock-llm",model="echo",type="prompt"}' in body
+    assert "made-up-" not in body
+    assert 'gateway_provider_call_duration_seconds_count{kind="llm",provider="mock-llm",model="other"}' in body
+    assert "gateway_sessions 1" in body
+    assert 'gateway_model_cache{stat="budget_bytes"}' in body
+
+
+def test_tracing_propagates_traceparent_and_exports_chat_stages(app_instance, monkeypatch):
+    from app.common.tracing import get_tracer
+
+    payloads = []
+    tracer = get_tracer()
+    monkeypatch.setattr(tracer, "sink", payloads.append)
+    client = TestClient(app_instance)
+    session_id = client.post("/v1/sessions").json()["session_id"]
+    upstream_trace = "4bf92f3577b34da6a3ce929d0e0e4736"
+    response = client.post(
+        "/v1/chat",
+        headers={"traceparent": f"00-{upstream_trace}-00f067aa0ba902b7-01"},
+        json={
+            "session_id": session_id,
+            "channel": "web",
+            "message": "please create a ticket",
+            "provider_selection": {
+                "llm_provider": "mock-llm",
+                "llm_model": "echo",
+                "servicedesk_provider": "mock-servicedesk",
+            },
+        },
+    )
+    tracer.shutdown()
+
+    assert response.status_code == 200
+    assert response.headers["traceparent"].startswith(f"00-{upstream_trace}-")
+    assert response.json()["debug"]["trace_id"] == upstream_trace
+    spans = [span for payload in payloads for span in payload["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    names = {span["name"] for span in spans}
+    assert {"POST /v1/chat", "chat.policy", "chat.context_build", "chat.llm", "chat.servicedesk"} <= names
+    assert all(span["traceId"] == upstream_trace for span in spans)
+    root = next(span for span in spans if span["name"] == "POST /v1/chat")
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+    assert {"key": "gateway.correlation_id", "value": {"stringValue": response.headers["X-Correlation-ID"]}} in (
+        root["attributes"]
+    )
+
+
+def test_concurrent_requests_keep_their_own_correlation_ids(app_instance, monkeypatch):
+    import asyncio
+    import logging
+    import random
+
+    import httpx
+    from app.common.logging import CorrelationIdFilter
+
+    class _SlowLLM:
+        async def generate(self, messages, model, temperature=0.2, max_tokens=256):
+            # Yield so the requests interleave on the shared runtime logger.
+            await asyncio.sleep(random.uniform(0, 0.02))
+            return {"text": messages[-1]["content"], "usage": {}, "latency_ms": 1}
+
+    monkeypatch.setitem(app_instance.state.runtime.llm_connectors, "mock-llm", _SlowLLM())
+    records = []
+
+    class _Capture(logging.Handler):
+        def emit(self, record):
+            if getattr(record, "event", None) == "runtime.chat.completed":
+                records.append(record)
+
+    capture = _Capture()
+    capture.addFilter(CorrelationIdFilter())
+    runtime_logger = logging.getLogger("agent_runtime")
+    runtime_logger.addHandler(capture)
+
+    async def _run():
+        transport = httpx.ASGITransport(app=app_instance)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+            async def _chat(index):
+                response = await client.post(
+                    "/v1/chat",
+                    headers={"X-Correlation-ID": f"req-{index}"},
+                    json={
+                        "channel": "web",
+                        "message": f"message {index}",
+                        "provider_selection": {"llm_provider": "mock-llm", "llm_model": "echo"},
+                    },
+                )
+                return index, response
+
+            return await asyncio.gather(*(_chat(index) for index in range(20)))
+
+    try:
+        results = asyncio.run(_run())
+    finally:
+        runtime_logger.removeHandler(capture)
+
+    for index, response in results:
+        assert response.status_code == 200
+        assert response.headers["X-Correlation-ID"] == f"req-{index}"
+        assert response.json()["debug"]["correlation_id"] == f"req-{index}"
+    assert sorted(record.correlation_id for record in records) == sorted(f"req-{index}" for index in range(20))
+    assert all(record.used_rag is False for record in records)
+
+
+def test_identical_incident_questions_share_one_llm_call_and_one_ticket(app_instance, monkeypatch):
+    import asyncio
+
+    import httpx
+
+    calls = {"llm": 0, "tickets": 0}
+
+    class _SlowLLM:
+        async def generate(self, messages, model, temperature=0.2, max_tokens=256):
+            calls["llm"] += 1
+            await asyncio.sleep(0.05)
+            return {"text": "Email is degraded; engineers are on it.", "usage": {}, "latency_ms": 50}
+
+    class _ServiceDesk:
+        async def create_ticket(self, title, body, severity, requester=None):
+            calls["tickets"] += 1
+            await asyncio.sleep(0.05)
+            return {"id": f"INC-{calls['tickets']}", "summary": title, "body": body}
+
+    monkeypatch.setitem(app_instance.state.runtime.llm_connectors, "mock-llm", _SlowLLM())
+    monkeypatch.setitem(app_instance.state.runtime.servicedesk_connectors, "mock-servicedesk", _ServiceDesk())
+    messages = ["Is email down? Please open a ticket", "is email down?  please open a ticket!"] * 10
+    messages.append("Is email down again? Please open a ticket")  # near duplicate: different prompt
+
+    async def _run():
+        transport = httpx.ASGITransport(app=app_instance)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(
+                    client.post(
+                        "/v1/chat",
+                        json={
+                            "channel": "teams",
+                            "message": message,
+                            "include_debug": True,
+                            "provider_selection": {
+                                "llm_provider": "mock-llm",
+                                "llm_model": "echo",
+                                "servicedesk_provider": "mock-servicedesk",
+                            },
+                        },
+                    )
+                    for message in messages
+                )
+            )
+
+    responses = [response.json() for response in asyncio.run(_run())]
+    assert calls == {"llm": 2, "tickets": 1}
+    assert sum(body["debug"]["coalesced"] for body in responses) == 19
+    assert {body["reply"] for body in responses} == {"Email is degraded; engineers are on it."}
+    tickets = [body["debug"]["servicedesk"] for body in responses]
+    assert {ticket["id"] for ticket in tickets} == {"INC-1"}
+    assert sum(not ticket["deduplicated"] for ticket in tickets) == 1
+    assert max(ticket["linked_count"] for ticket in tickets) == len(messages)
+    assert len({body["session_id"] for body in responses}) == len(messages)
+    for body in responses:
+        others = {other["session_id"] for other in responses} - {body["session_id"]}
+        assert not any(session_id in json.dumps(body) for session_id in others)
+
+
+def test_registry_serves_cached_snapshot_with_etag(app_instance):
+    from app.registry.models import ServiceProvider
+
+    client = TestClient(app_instance)
+    registry = app_instance.state.runtime.registry
+
+    first = client.get("/v1/registry")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+    assert any(item["id"] == "mock-llm" for item in first.json()["llm"])
+
+    not_modified = client.get("/v1/registry", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+    extra = ServiceProvider(id="bench-llm", display_name="Bench", capabilities=["chat"], supported=["x"])
+    registry.register("llm", extra)
+    try:
+        changed = client.get("/v1/registry", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["ETag"] != etag
+        assert any(item["id"] == "bench-llm" for item in changed.json()["llm"])
+    finally:
+        registry.unregister("llm", "bench-llm")
+    assert client.get("/v1/registry", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_admin_config_reload_publishes_new_providers(app_instance, monkeypatch, tmp_path):
+    from app.runtime.config_reload import ConfigReloader
+
+    runtime = app_instance.state.runtime
+    client = TestClient(app_instance)
+    monkeypatch.setattr(app_instance.state, "config_reloader", None)
+    assert client.post("/v1/admin/config/reload").status_code == 400
+
+    # Restore the shared runtime's providers after the test.
+    monkeypatch.setattr(runtime, "generation", runtime.generation)
+    config = tmp_path / "providers.json"
+    config.write_text(
+        json.dumps(
+            {
+                "USE_AZURE_OPENAI": True,
+                "AZURE_OPENAI_ENDPOINT": "https://example.openai.azure.com",
+                "AZURE_OPENAI_API_KEY": "key",
+                "AZURE_OPENAI_API_VERSION": "2024-06-01",
+                "AZURE_OPENAI_DEPLOYMENTS": ["gpt-4o"],
+            }
+        )
+    )
+    monkeypatch.setattr(app_instance.state, "config_reloader", ConfigReloader(runtime, str(config)))
+    etag = client.get("/v1/registry").headers["ETag"]
+
+    response = client.post("/v1/admin/config/reload")
+    assert response.status_code == 200
+    assert "llm/azure-openai" in response.json()["rebuilt"] and "llm/mock-llm" in response.json()["reused"]
+    registry = client.get("/v1/registry", headers={"If-None-Match": etag})
+    assert registry.status_code == 200
+    assert any(item["id"] == "azure-openai" and item["configured"] for item in registry.json()["llm"])
+
+    config.write_text("{not json")
+    assert client.post("/v1/admin/config/reload").status_code == 422
+    assert "azure-openai" in runtime.llm_connectors
+
+
+def test_readyz_waits_for_warm_up_while_livez_stays_up(app_instance, monkeypatch):
+    from app import main
+    from app.runtime.readiness import Readiness
+
+    readiness = Readiness()
+    for name in ("models", "connectors", "connector_validation"):
+        readiness.add(name)
+    monkeypatch.setattr(app_instance.state, "readiness", readiness)
+    client = TestClient(app_instance)
+
+    assert client.get("/livez").status_code == 200
+    warming = client.get("/readyz")
+    assert warming.status_code == 503 and warming.json()["status"] == "warming_up"
+    assert client.get("/v1/runtime").json()["backend_ready"] is False
+    assert client.get("/healthz").json()["ready"] is False
+
+    asyncio.run(main._warm_up(app_instance))
+    ready = client.get("/readyz")
+    assert ready.status_code == 200 and ready.json()["status"] == "ready"
+    assert ready.json()["checks"]["models"]["detail"] == "no models to preload"
+    assert ready.json()["checks"]["connector_validation"]["status"] == "ready"
+    assert client.get("/v1/runtime").json()["stt_ready"] is True
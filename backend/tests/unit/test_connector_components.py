@@ -0,0 +1,294 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from app.common.errors import GatewayException, UpstreamThrottled
+from app.connectors.llm.azure_openai_pool import (
+    ERROR_COOLDOWN_SECONDS,
+    AzureOpenAIPoolConnector,
+    parse_pool_config,
+    parse_retry_after,
+)
+from app.connectors.llm.mock_llm import MockLLMConnector
+from app.connectors.mock_profile import InjectedFault, MockBehavior, MockProfile, parse_latency
+from app.connectors.rag.mock_search import MockSearchConnector
+from app.registry.service_registry import ServiceRegistry
+from app.settings import Settings
+
+
+class _StubDeployment:
+    """Minimal ASGI stand-in for one Azure OpenAI region."""
+
+    def __init__(self, name, *, delay=0.0, status=200, headers=None, total_tokens=30, body=None):
+        self.name = name
+        self.body = body
+        self.delay = delay
+        self.status = status
+        self.headers = headers or {}
+        self.total_tokens = total_tokens
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.status == 200:
+                body = {
+                    "choices": [{"message": {"content": f"hello from {self.name}"}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": self.total_tokens},
+                }
+            else:
+                body = {"error": {"code": str(self.status)}}
+            headers = [(b"content-type", b"application/json")]
+            headers += [(key.encode(), value.encode()) for key, value in self.headers.items()]
+            await send({"type": "http.response.start", "status": self.status, "headers": headers})
+            raw = self.body if self.body is not None else json.dumps(body).encode()
+            await send({"type": "http.response.body", "body": raw})
+        finally:
+            self.in_flight -= 1
+
+
+def _pool(stubs, *, tpm=None, clock=None):
+    """Route each stub by host, the way separate regional endpoints would be reached."""
+
+    by_host = {f"{name}.openai.test": stub for name, stub in stubs.items()}
+
+    async def _router(scope, receive, send):
+        host = dict(scope["headers"])[b"host"].decode()
+        await by_host[host](scope, receive, send)
+
+    config = json.dumps(
+        [
+            {
+                "name": name,
+                "endpoint": f"https://{name}.openai.test",
+                "api_key": "key",
+                "deployment": f"gpt-4o-mini-{name}",
+                "model": "gpt-4o-mini",
+                "tpm": (tpm or {}).get(name, 0),
+            }
+            for name in stubs
+        ]
+    )
+    kwargs = {"clock": clock} if clock else {}
+    return AzureOpenAIPoolConnector(parse_pool_config(config), transport=httpx.ASGITransport(app=_router), **kwargs)
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_pool_prefers_fast_idle_deployments():
+    fast = _StubDeployment("fast", delay=0.005)
+    slow = _StubDeployment("slow", delay=0.08)
+    pool = _pool({"fast": fast, "slow": slow})
+    # Seed the latency history; an unmeasured deployment would score as well as the best measured one.
+    pool.states["fast"].ewma_ms = 5.0
+    pool.states["slow"].ewma_ms = 80.0
+
+    async def _run():
+        results = await asyncio.gather(*(pool.generate(MESSAGES, model="gpt-4o-mini") for _ in range(40)))
+        await pool.aclose()
+        return results
+
+    results = asyncio.run(_run())
+    assert all(result["text"].startswith("hello from") for result in results)
+    assert fast.calls > slow.calls > 0
+    # Least-outstanding still spreads a burst instead of piling everything on one region.
+    assert fast.max_in_flight < 40
+    snapshot = {entry["name"]: entry for entry in pool.snapshot()}
+    assert snapshot["fast"]["ewma_ms"] < snapshot["slow"]["ewma_ms"]
+    assert snapshot["fast"]["outstanding"] == snapshot["slow"]["outstanding"] == 0
+
+
+def test_pool_honours_retry_after_and_fails_over():
+    now = [100.0]
+    east = _StubDeployment("east", status=429, headers={"retry-after-ms": "30000"})
+    west = _StubDeployment("west")
+    pool = _pool({"east": east, "west": west}, clock=lambda: now[0])
+    pool.states["east"].ewma_ms = 1.0  # make east the preferred region
+    pool.states["west"].ewma_ms = 50.0
+
+    async def _run():
+        first = await pool.generate(MESSAGES, model="gpt-4o-mini")
+        second = await pool.generate(MESSAGES, model="gpt-4o-mini")
+        return first, second
+
+    first, second = asyncio.run(_run())
+    assert first["endpoint"] == second["endpoint"] == "west"
+    assert east.calls == 1  # cooling down after the 429; not retried for the second request
+    assert pool.snapshot()[0]["cooldown_seconds"] == 30.0
+
+    west.status = 429
+    west.headers = {"Retry-After": "5"}
+    now[0] += 31
+    with pytest.raises(UpstreamThrottled) as excinfo:
+        asyncio.run(pool.generate(MESSAGES, model="gpt-4o-mini"))
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.headers["Retry-After"] == "5"
+
+
+def test_pool_respects_token_budgets_and_reports_server_errors():
+    now = [0.0]
+    small = _StubDeployment("small", total_tokens=300)
+    large = _StubDeployment("large")
+    pool = _pool({"small": small, "large": large}, tpm={"small": 300, "large": 100_000}, clock=lambda: now[0])
+    pool.states["small"].ewma_ms = 1.0
+    pool.states["large"].ewma_ms = 50.0
+
+    async def _generate():
+        return await pool.generate(MESSAGES, model="gpt-4o-mini", max_tokens=256)
+
+    assert asyncio.run(_generate())["endpoint"] == "small"
+    # The 300-token budget is spent, so the next request goes to the large deployment.
+    assert asyncio.run(_generate())["endpoint"] == "large"
+    now[0] += 60  # budget refilled
+    assert asyncio.run(_generate())["endpoint"] == "small"
+
+    small.status = large.status = 503
+    now[0] += 60
+    with pytest.raises(GatewayException) as excinfo:
+        asyncio.run(_generate())
+    assert excinfo.value.status_code == 502
+    assert small.calls == 3 and large.calls == 2
+
+
+def test_pool_refunds_budget_on_cancellation_and_fails_over_on_bad_json():
+    now = [0.0]
+    slow = _StubDeployment("slow", delay=1.0)
+    pool = _pool({"slow": slow}, tpm={"slow": 1000}, clock=lambda: now[0])
+
+    async def _cancelled():
+        task = asyncio.create_task(pool.generate(MESSAGES, model="gpt-4o-mini", max_tokens=256))
+        await asyncio.sleep(0.05)
+        assert pool.states["slow"].tokens < 1000
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await pool.aclose()
+
+    asyncio.run(_cancelled())
+    assert pool.states["slow"].tokens == 1000 and pool.states["slow"].outstanding == 0
+
+    broken = _StubDeployment("broken", body=b"<html>gateway</html>")
+    healthy = _StubDeployment("healthy")
+    pool = _pool({"broken": broken, "healthy": healthy})
+    pool.states["broken"].ewma_ms = 1.0
+    pool.states["healthy"].ewma_ms = 50.0
+    assert asyncio.run(pool.generate(MESSAGES, model="gpt-4o-mini"))["endpoint"] == "healthy"
+    assert pool.states["broken"].last_error == "invalid JSON response"
+
+    healthy.body = b"not json"
+    now[0] += ERROR_COOLDOWN_SECONDS
+    pool.states["broken"].cooldown_until = 0.0
+    with pytest.raises(GatewayException) as excinfo:
+        asyncio.run(pool.generate(MESSAGES, model="gpt-4o-mini"))
+    assert excinfo.value.status_code == 502
+
+
+def test_pool_config_parsing_and_registry_entry():
+    http_date = httpx.Headers({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert parse_retry_after(http_date, now=lambda: 1445412470) == 10
+    with pytest.raises(ValueError):
+        parse_pool_config('[{"endpoint": "https://x"}]')
+
+    settings = Settings(
+        USE_AZURE_OPENAI_POOL=True,
+        AZURE_OPENAI_API_KEY="shared-key",
+        AZURE_OPENAI_POOL=json.dumps(
+            [
+                {"endpoint": "https://east.openai.test/", "deployment": "east-mini", "model": "gpt-4o-mini"},
+                {"endpoint": "https://west.openai.test", "deployment": "west-mini", "model": "gpt-4o-mini"},
+            ]
+        ),
+    )
+    endpoints = parse_pool_config(settings.azure_openai_pool, default_api_key="shared-key")
+    assert [endpoint.endpoint for endpoint in endpoints] == ["https://east.openai.test", "https://west.openai.test"]
+    assert all(endpoint.api_key == "shared-key" for endpoint in endpoints)
+
+    registry = ServiceRegistry(settings)
+    provider = registry.get_provider("llm", "azure-openai-pool")
+    assert provider.configured and provider.supported == ["gpt-4o-mini"]
+    assert not ServiceRegistry(Settings()).is_configured("llm", "azure-openai-pool")
+
+
+def test_mock_profiles_parse_and_sample_latency_distributions(tmp_path):
+    import random
+
+    profile = MockProfile.parse("latency=lognormal:200:0.5, error_rate=0.1,completion_tokens=40")
+    assert profile.latency == "lognormal:200:0.5" and profile.error_rate == 0.1 and profile.completion_tokens == 40
+    with pytest.raises(ValueError):
+        MockProfile.parse("latency_ms=5")
+
+    rng = random.Random(7)
+    samples = sorted(parse_latency("lognormal:200:0.5")(rng) for _ in range(2000))
+    assert 180 < samples[1000] < 220 and samples[1900] > 400
+    assert parse_latency("fixed:25")(rng) == 25 and parse_latency("") is None
+
+    trace = tmp_path / "spans.otlp.jsonl"
+    spans = [
+        {"name": "chat.llm", "startTimeUnixNano": "0", "endTimeUnixNano": str(ms * 1_000_000)} for ms in (120, 340)
+    ]
+    spans.append({"name": "chat.rag", "startTimeUnixNano": "0", "endTimeUnixNano": "5000000"})
+    trace.write_text(json.dumps({"resourceSpans": [{"scopeSpans": [{"spans": spans}]}]}) + "\n")
+    replay = parse_latency(f"replay:{trace}#chat.llm")
+    assert [replay(rng) for _ in range(3)] == [120.0, 340.0, 120.0]
+    numbers = tmp_path / "latencies.txt"
+    numbers.write_text("10\n20.5\n")
+    assert parse_latency(f"replay:{numbers}")(rng) == 10.0
+
+
+def test_mock_connectors_stream_tokens_inject_faults_and_size_payloads():
+    import time
+
+    streaming = MockLLMConnector(MockBehavior(MockProfile.parse("tokens_per_second=200,completion_tokens=9")))
+    failing = MockLLMConnector(MockBehavior(MockProfile(error_rate=1.0), name="mock-llm"))
+    hanging = MockLLMConnector(MockBehavior(MockProfile(timeout_rate=1.0, timeout_seconds=0.01), name="mock-llm"))
+    search = MockSearchConnector(MockBehavior(MockProfile.parse("latency=fixed:20,payload_bytes=512")))
+
+    async def _run():
+        started = time.perf_counter()
+        result = await streaming.generate(MESSAGES, model="gpt-4o-mini", max_tokens=256)
+        elapsed = time.perf_counter() - started
+        with pytest.raises(InjectedFault) as error:
+            await failing.generate(MESSAGES, model="gpt-4o-mini")
+        with pytest.raises(InjectedFault) as timeout:
+            await hanging.generate(MESSAGES, model="gpt-4o-mini")
+        started = time.perf_counter()
+        snippets = await search.search("vpn", top_k=2, index_name="kb")
+        return result, elapsed, error.value, timeout.value, snippets, time.perf_counter() - started
+
+    result, elapsed, error, timeout, snippets, search_elapsed = asyncio.run(_run())
+    assert len(result["text"].split()) == 9 and result["usage"]["completion_tokens"] == 9
+    assert elapsed >= 8 / 200  # eight pauses between nine tokens
+    assert (error.status_code, error.code) == (502, "injected_error")
+    assert (timeout.status_code, timeout.code) == (504, "injected_timeout")
+    assert [len(snippet["text"]) for snippet in snippets] == [512, 512] and search_elapsed >= 0.02
+
+
+def test_registry_index_and_snapshots_track_changes():
+    from app.registry.models import ServiceProvider
+
+    registry = ServiceRegistry(Settings())
+    assert registry.is_configured("llm", "mock-llm")
+    assert not registry.is_configured("llm", "missing") and registry.find_provider("llm", "missing") is None
+    with pytest.raises(ValueError):
+        registry.get_provider("rag", "mock-llm")
+
+    snapshot = registry.snapshot(include_unconfigured=True)
+    assert registry.snapshot(include_unconfigured=True) is snapshot  # cached until the registry changes
+    assert json.loads(snapshot.body)["llm"][0]["id"] == "mock-llm"
+    with pytest.raises(TypeError):
+        snapshot.providers["llm"][0]["configured"] = False
+
+    replacement = ServiceProvider(id="mock-llm", display_name="Mock", capabilities=[], supported=[], configured=False)
+    registry.register("llm", replacement)
+    assert registry.get_provider("llm", "mock-llm") is replacement
+    assert [provider.id for provider in registry.providers["llm"]].count("mock-llm") == 1
+    refreshed = registry.snapshot(include_unconfigured=False)
+    assert refreshed.version > snapshot.version and refreshed.etag != snapshot.etag
+    assert all(item["id"] != "mock-llm" for item in refreshed.providers["llm"])
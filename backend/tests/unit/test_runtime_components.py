@@ -1,20 +1,51 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+
 import pytest
-from app.common.errors import PolicyViolation
+from app.common.errors import PolicyViolation, QueueDeadlineExceeded
+from app.common.logging import (
+    CorrelationIdFilter,
+    EventSampler,
+    JsonLogFormatter,
+    LogFilter,
+    LogPipeline,
+    LogStreamBroadcaster,
+    bind_correlation_id,
+    get_logger,
+    log_event,
+    parse_sample_rates,
+    reset_correlation_id,
+    set_correlation_id,
+)
+from app.common.tracing import NOOP_SPAN, Tracer, inject_headers, parse_traceparent
 from app.models import ChatMessage
+from app.runtime.coalescing import SingleFlight, TicketDeduplicator, prompt_key
 from app.runtime.context_builder import ContextBuilder
+from app.runtime.latency_sketch import LatencyHistogram
+from app.runtime.llm_scheduler import LLMScheduler, estimate_prompt_tokens, parse_rate_limits
 from app.runtime.memory_store import MemoryStore
 from app.runtime.policy import PolicyEngine
 from app.runtime.router import RuntimeRouter
+from app.runtime.stats import StatsTracker
 
 
 def test_memory_store_tracks_sessions():
     store = MemoryStore()
-    store.create_session("session-1")
-    store.append_turn("session-1", ChatMessage(role="user", content="hello"))
 
-    assert len(store.history("session-1")) == 1
-    assert store.history("session-1")[0].content == "hello"
-    assert store.history("unknown") == []
+    async def _run():
+        await store.create_session("session-1")
+        await store.append_turn("session-1", ChatMessage(role="user", content="hello"))
+        return await store.history("session-1"), await store.history("unknown")
+
+    history, unknown = asyncio.run(_run())
+    assert len(history) == 1
+    assert history[0].content == "hello"
+    assert unknown == []
+    assert store.cached_session_count() == 1
 
 
 def test_policy_engine_redacts_and_limits():
@@ -31,7 +62,7 @@ def test_context_builder_appends_rag_snippets():
     history = [ChatMessage(role="user", content="Hello")]
     rag_results = [
         {"snippet": "Important context A"},
-        {"snippet": "Important context B"},
+        {"text": "Important context B", "score": 0.9},
     ]
 
     conversation = builder.build(history, rag_results)
@@ -39,6 +70,7 @@ def test_context_builder_appends_rag_snippets():
     assert conversation[0] == {"role": "user", "content": "Hello"}
     assert any(entry["role"] == "system" for entry in conversation)
     assert "Important context A" in conversation[-1]["content"]
+    assert "Important context B" in conversation[-1]["content"]
 
 
 def test_runtime_router_intents():
@@ -46,3 +78,583 @@ def test_runtime_router_intents():
     assert router.should_open_ticket("Please create an incident") == "create"
     assert router.should_open_ticket("status of existing request") == "status"
     assert router.should_open_ticket("no action needed") is None
+
+
+def test_latency_histogram_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(4, 1.2) for _ in range(20_000)]
+    left, right = LatencyHistogram(), LatencyHistogram()
+    for index, value in enumerate(values):
+        (left if index % 2 else right).add(value)
+    left.merge(right)
+
+    ordered = sorted(values)
+    for quantile in (0.5, 0.95, 0.99, 0.999):
+        exact = ordered[int(quantile * (len(ordered) - 1))]
+        assert abs(left.quantile(quantile) - exact) / exact < 0.03
+    assert left.count == len(values)
+    assert len(left.buckets) < 1000
+
+
+def test_stats_tracker_windows_expire_and_split_by_endpoint():
+    now = [1_000.0]
+    stats = StatsTracker(clock=lambda: now[0])
+    stats.record(100, endpoint="/v1/chat", provider="mock-llm")
+    stats.record(300, RuntimeError("boom"), endpoint="/v1/audio/transcribe", provider="local_whisper")
+
+    snapshot = stats.snapshot()
+    assert snapshot.windows["1m"]["count"] == 2
+    assert snapshot.windows["1m"]["failures"] == 1
+    assert stats.breakdown()["endpoints"]["/v1/chat"]["5m"]["count"] == 1
+    assert stats.breakdown()["providers"]["local_whisper"]["1h"]["failures"] == 1
+
+    now[0] += 120
+    snapshot = stats.snapshot()
+    assert snapshot.windows["1m"]["count"] == 0
+    assert snapshot.windows["5m"]["count"] == 2
+    assert snapshot.windows["lifetime"]["count"] == 2
+    assert stats.percentiles("1m") == (None, None)
+
+
+def test_tracer_nests_spans_and_exports_otlp_batches():
+    payloads = []
+    tracer = Tracer(service_name="gateway-test", sample_ratio=1.0, sink=payloads.append)
+
+    with tracer.start_request("POST /v1/chat") as root:
+        with tracer.span("chat.llm", provider="mock-llm") as llm:
+            headers = inject_headers({})
+            tracer.record("chat.llm.queue", 2.5)
+    tracer.shutdown()
+
+    assert parse_traceparent(headers["traceparent"]) == (root.trace_id, llm.span_id, True)
+    exported = [span for payload in payloads for span in payload["resourceSpans"][0]["scopeSpans"][0]["spans"]]
+    spans = {span["name"]: span for span in exported}
+    assert set(spans) == {"POST /v1/chat", "chat.llm", "chat.llm.queue"}
+    assert spans["chat.llm"]["parentSpanId"] == root.span_id
+    assert spans["chat.llm.queue"]["parentSpanId"] == llm.span_id
+    queued = spans["chat.llm.queue"]
+    assert int(queued["endTimeUnixNano"]) - int(queued["startTimeUnixNano"]) == 2_500_000
+    assert {"key": "provider", "value": {"stringValue": "mock-llm"}} in spans["chat.llm"]["attributes"]
+
+
+def test_tracer_unsampled_traces_propagate_without_recording():
+    payloads = []
+    tracer = Tracer(service_name="gateway-test", sample_ratio=0.0, sink=payloads.append)
+    upstream = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-00"
+
+    with tracer.start_request("GET /v1/runtime", traceparent=upstream) as root:
+        assert tracer.span("chat.policy") is NOOP_SPAN
+        assert inject_headers({})["traceparent"].startswith("00-0af7651916cd43dd8448eb211c80319c-")
+    tracer.shutdown()
+
+    assert root.parent_id == "b7ad6b7169203331"
+    assert payloads == []
+    assert parse_traceparent("00-00000000000000000000000000000000-b7ad6b7169203331-01") is None
+    assert parse_traceparent("garbage") is None
+
+
+def test_log_pipeline_formats_off_thread_and_counts_drops():
+    lines = []
+
+    class _Collect(logging.Handler):
+        def emit(self, record):
+            lines.append(self.format(record))
+
+    sink = _Collect()
+    sink.setFormatter(JsonLogFormatter())
+    pipeline = LogPipeline([sink], max_queue=2)
+    logger = logging.getLogger("tests.log_pipeline")
+    logger.propagate = False
+    logger.addHandler(pipeline.handler)
+    try:
+        args = ["first"]
+        logger.info("event %s", args, extra={"event": "test.event", "provider": "mock"})
+        args.append("mutated after logging")
+        logger.info("second")
+        logger.info("dropped while the listener is stopped")
+        assert pipeline.dropped == 1
+        pipeline.start()
+    finally:
+        pipeline.stop()
+        logger.removeHandler(pipeline.handler)
+
+    first = json.loads(lines[0])
+    assert first["message"] == "event ['first']"
+    assert first["event"] == "test.event"
+    assert first["provider"] == "mock"
+    assert first["correlation_id"] == "-"
+    assert first["ts"].endswith("Z")
+    assert "args" not in first and "_json_line" not in first
+    assert len(lines) == 2
+
+
+def test_correlation_ids_come_from_context_and_binding_never_mutates():
+    records = []
+
+    class _Capture(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    capture = _Capture()
+    capture.addFilter(CorrelationIdFilter())
+    shared = get_logger("tests.correlation")
+    shared.logger.addHandler(capture)
+    try:
+        token = set_correlation_id("request-a")
+        try:
+            log_event(shared, logging.INFO, "test.context", "from context", filename="clip.wav")
+            assert bind_correlation_id(shared, "request-a") is shared
+            background = bind_correlation_id(shared, "job-7")
+            log_event(background, logging.INFO, "test.bound", "explicitly bound")
+        finally:
+            reset_correlation_id(token)
+        log_event(shared, logging.INFO, "test.none", "outside any request")
+    finally:
+        shared.logger.removeHandler(capture)
+
+    assert shared.extra == {}
+    assert [(record.event, record.correlation_id) for record in records] == [
+        ("test.context", "request-a"),
+        ("test.bound", "job-7"),
+        ("test.none", "-"),
+    ]
+    assert records[0].filename_ == "clip.wav"
+
+
+def test_log_stream_filters_per_subscriber_and_bounds_slow_clients():
+    async def _run():
+        broadcaster = LogStreamBroadcaster(subscriber_maxlen=3)
+        broadcaster.publish("old-stt", level=logging.WARNING, event="stt.provider.error", correlation_id="a")
+        stt_warnings = await broadcaster.subscribe(
+            LogFilter(level=logging.WARNING, events=["stt.*", "runtime.chat.completed"])
+        )
+        request_b = await broadcaster.subscribe(LogFilter(correlation_id="b"))
+
+        def _publish_from_worker_thread():
+            broadcaster.publish("info-stt", level=logging.INFO, event="stt.upload.received", correlation_id="b")
+            for index in range(5):
+                broadcaster.publish(f"warn-{index}", level=logging.WARNING, event="stt.fallback", correlation_id="a")
+            broadcaster.publish("chat", level=logging.ERROR, event="runtime.chat.completed", correlation_id="b")
+
+        thread = threading.Thread(target=_publish_from_worker_thread)
+        thread.start()
+        thread.join()
+
+        lines, dropped = await asyncio.wait_for(stt_warnings.get_batch(), timeout=1)
+        assert lines == ["warn-3", "warn-4", "chat"]
+        assert dropped == 4  # the "old-stt" replay and warn-0..2 were pushed out of the 3-line ring
+        assert await asyncio.wait_for(request_b.get_batch(), timeout=1) == (["info-stt", "chat"], 0)
+        assert broadcaster.queue_depths() == [0, 0]
+        assert broadcaster.dropped_total() == 4
+
+        broadcaster.unsubscribe(stt_warnings)
+        broadcaster.unsubscribe(request_b)
+        assert broadcaster.dropped_total() == 4
+
+    asyncio.run(_run())
+
+
+def test_event_sampler_samples_rate_limits_and_reports_suppressed_counts():
+    now = [0.0]
+    rolls = iter([0.05, 0.5, 0.95] * 10)
+    sampler = EventSampler(
+        sample_rates=parse_sample_rates("stt.upload.received=0.1, stt.*=0.5"),
+        rate_per_second=1.0,
+        burst=2,
+        report_interval=60,
+        clock=lambda: now[0],
+        rng=lambda: next(rolls),
+    )
+
+    assert sampler.ratio("stt.upload.received") == 0.1
+    assert sampler.ratio("stt.fallback") == 0.5
+    assert sampler.ratio("runtime.chat.completed") == 1.0
+    # Exact ratio 0.1: only the 0.05 roll is kept.
+    assert [sampler.allow("stt.upload.received", logging.INFO) for _ in range(3)] == [True, False, False]
+    # Errors bypass sampling and rate limits.
+    assert all(sampler.allow("stt.upload.received", logging.ERROR) for _ in range(5))
+
+    # Unsampled event: burst of 2, then one token per second.
+    assert [sampler.allow("runtime.chat.completed", logging.INFO) for _ in range(3)] == [True, True, False]
+    now[0] = 1.0
+    assert sampler.allow("runtime.chat.completed", logging.INFO)
+
+    tracer = Tracer(service_name="gateway-test", sample_ratio=1.0, sink=lambda payload: None)
+    with tracer.start_request("POST /v1/chat"):
+        assert all(sampler.allow("runtime.chat.completed", logging.INFO) for _ in range(5))
+    tracer.shutdown()
+
+    assert sampler.take_report() is None
+    now[0] = 61.0
+    assert sampler.take_report() == ({"stt.upload.received": 2, "runtime.chat.completed": 1}, 61.0)
+    assert sampler.take_report() is None
+
+    with pytest.raises(ValueError):
+        parse_sample_rates("stt.upload.received=2")
+
+
+def test_llm_scheduler_serves_tenants_round_robin_and_sheds_past_deadline():
+    # 1200 requests/minute = one admission every 50ms once the burst is spent.
+    scheduler = LLMScheduler(parse_rate_limits("azure-openai=0:1200"), max_wait_seconds=0.28)
+    lane = scheduler.lanes["azure-openai"]
+    lane.requests.level = 0
+    messages = [{"role": "user", "content": "is email down?"}]
+    admitted = []
+
+    async def _call(tenant):
+        reservation = await scheduler.acquire("azure-openai", tenant, messages, max_tokens=16)
+        admitted.append(tenant)
+        return reservation
+
+    async def _run():
+        tasks = [asyncio.create_task(_call(tenant)) for tenant in ("a", "a", "a", "b", "b")]
+        await asyncio.sleep(0)
+        assert scheduler.snapshot()[0]["depth"] == 5
+        with pytest.raises(QueueDeadlineExceeded) as excinfo:
+            await _call("c")
+        unlimited = await scheduler.acquire("mock-llm", "c", messages)
+        return await asyncio.gather(*tasks), excinfo.value, unlimited
+
+    reservations, shed, unlimited = asyncio.run(_run())
+    assert admitted == ["a", "b", "a", "b", "a"]
+    assert shed.status_code == 503 and int(shed.headers["Retry-After"]) >= 1
+    assert unlimited.waited_ms == 0
+    assert reservations[-1].waited_ms > reservations[0].waited_ms > 0
+    snapshot = scheduler.snapshot()[0]
+    assert snapshot["depth"] == 0 and snapshot["shed"] == 1
+    assert snapshot["wait_p95_ms"] >= snapshot["wait_p50_ms"] > 0
+
+
+def test_llm_scheduler_keeps_a_grant_that_races_the_deadline(monkeypatch):
+    scheduler = LLMScheduler(parse_rate_limits("azure-openai=1000:60"), max_wait_seconds=5, clock=lambda: 0.0)
+    lane = scheduler.lanes["azure-openai"]
+    lane.requests.level = 0
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def _granted_as_deadline_passes(awaitable, timeout):
+        lane.requests.level = 1
+        lane._pump()  # admits the waiter and takes its budget...
+        awaitable.cancel()
+        raise asyncio.TimeoutError  # ...in the same tick wait_for gives up
+
+    monkeypatch.setattr(asyncio, "wait_for", _granted_as_deadline_passes)
+    reservation = asyncio.run(scheduler.acquire("azure-openai", "web", messages, max_tokens=16))
+    assert lane.tokens.level == 1000 - reservation.tokens
+    assert lane.shed == 0 and lane.queued == 0
+    reservation.settle({"total_tokens": 10})
+    assert lane.tokens.level == 1000 - 10
+
+
+def test_llm_scheduler_settles_token_reservations_against_usage():
+    messages = [{"role": "system", "content": "x" * 400}, {"role": "user", "content": "hi"}]
+    assert estimate_prompt_tokens(messages) == 108
+    scheduler = LLMScheduler(parse_rate_limits("azure-openai=1000:0"), clock=lambda: 0.0)
+    lane = scheduler.lanes["azure-openai"]
+
+    reservation = asyncio.run(scheduler.acquire("azure-openai", "web", messages, max_tokens=256))
+    assert reservation.tokens == 364 and lane.tokens.level == 636
+    reservation.settle({"total_tokens": 150})
+    reservation.settle({"total_tokens": 150})  # idempotent
+    assert lane.tokens.level == 850
+    assert scheduler.snapshot()[0]["requests_available"] is None
+
+    with pytest.raises(ValueError):
+        parse_rate_limits("azure-openai")
+
+
+def test_single_flight_shares_results_within_window_but_not_failures():
+    now = [0.0]
+    flights = SingleFlight(window_seconds=2.0, clock=lambda: now[0])
+    calls = []
+
+    async def _answer():
+        calls.append("answer")
+        await asyncio.sleep(0.01)
+        return {"text": "yes"}
+
+    async def _fail():
+        calls.append("fail")
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    key = prompt_key("mock-llm", "echo", [{"role": "user", "content": "Is email down?"}])
+    assert key == prompt_key("mock-llm", "echo", [{"role": "user", "content": "  is EMAIL down "}])
+    assert key != prompt_key("mock-llm", "other", [{"role": "user", "content": "Is email down?"}])
+
+    async def _run():
+        first = await asyncio.gather(*(flights.do(key, _answer) for _ in range(5)))
+        cached = await flights.do(key, _answer)
+        now[0] = 5.0
+        refreshed = await flights.do(key, _answer)
+        failed = await asyncio.gather(*(flights.do("other", _fail) for _ in range(3)), return_exceptions=True)
+        retried = await asyncio.gather(flights.do("other", _fail), return_exceptions=True)
+        return first, cached, refreshed, failed, retried
+
+    first, cached, refreshed, failed, retried = asyncio.run(_run())
+    assert [shared for _, shared in first] == [False, True, True, True, True]
+    assert cached == ({"text": "yes"}, True) and refreshed == ({"text": "yes"}, False)
+    assert all(isinstance(result, RuntimeError) for result in failed + retried)
+    assert calls == ["answer", "answer", "fail", "fail"]
+    assert flights.inflight() == 0
+
+
+def test_ticket_deduplicator_links_near_duplicates_per_provider():
+    now = [0.0]
+    dedup = TicketDeduplicator(window_seconds=60, threshold=0.6, clock=lambda: now[0])
+    created = []
+
+    async def _create(body):
+        created.append(body)
+        return {"id": f"INC-{len(created)}"}
+
+    async def _ticket(body, caller, provider="servicenow"):
+        return await dedup.create(provider, lambda: _create(body), body, caller=caller)
+
+    async def _run():
+        results = [await _ticket("VPN is down in Helsinki office", "s1")]
+        results.append(await _ticket("vpn down in the Helsinki office!", "s2"))
+        results.append(await _ticket("Printer jammed on floor 3", "s3"))
+        results.append(await _ticket("VPN is down in Helsinki office", "s4", provider="jira-sm"))
+        now[0] = 61
+        results.append(await _ticket("VPN is down in Helsinki office", "s5"))
+        return results
+
+    first, duplicate, unrelated, other_provider, expired = asyncio.run(_run())
+    assert duplicate["id"] == first["id"] == "INC-1"
+    assert duplicate["deduplicated"] and duplicate["linked_count"] == 2
+    assert "s1" not in json.dumps(duplicate)  # the second caller never sees the first caller's session
+    assert not unrelated["deduplicated"] and unrelated["id"] == "INC-2"
+    assert other_provider["id"] == "INC-3" and expired["id"] == "INC-4"
+
+
+def _agent_runtime(settings):
+    from app.registry.service_registry import ServiceRegistry
+    from app.runtime.agent_runtime import AgentRuntime
+
+    return AgentRuntime(
+        settings=settings,
+        registry=ServiceRegistry(settings),
+        memory=MemoryStore(),
+        context_builder=ContextBuilder(),
+        policy_engine=PolicyEngine(),
+        runtime_router=RuntimeRouter(),
+    )
+
+
+def test_config_reload_swaps_changed_connectors_and_drains_old_ones(tmp_path):
+    from app.runtime.config_reload import ConfigReloader
+    from app.settings import Settings
+
+    runtime = _agent_runtime(Settings())
+    config = tmp_path / "providers.json"
+    snow = {
+        "DEV_MODE": False,
+        "USE_SERVICENOW": True,
+        "SERVICENOW_INSTANCE_URL": "https://example.service-now.com",
+        "SERVICENOW_CLIENT_ID": "gateway",
+    }
+    reloader = ConfigReloader(runtime, str(config))
+    closed = []
+
+    async def _run():
+        first = runtime.generation
+        mock_llm = runtime.llm_connectors["mock-llm"]
+        config.write_text(json.dumps({**snow, "SERVICENOW_CLIENT_SECRET": "old"}))
+        added = await reloader.reload()
+        assert "servicedesk/servicenow" in added["rebuilt"] and "llm/mock-llm" in added["reused"]
+        assert runtime.llm_connectors["mock-llm"] is mock_llm and runtime.generation.number == first.number + 1
+        assert runtime.registry.version > first.registry.version
+
+        old = runtime.generation
+        old_snow = old.servicedesk_connectors["servicenow"]
+
+        async def _aclose():
+            closed.append(old_snow)
+
+        old_snow.aclose = _aclose
+        with old.pinned():
+            config.write_text(json.dumps({**snow, "SERVICENOW_CLIENT_SECRET": "rotated"}))
+            rotated = await reloader.reload(force=False)
+            assert rotated["rebuilt"] == ["servicedesk/servicenow"]
+            assert runtime.servicedesk_connectors["servicenow"].client_secret == "rotated"
+            await asyncio.sleep(0.01)
+            assert closed == []  # the pinned request still owns the old connector
+        await asyncio.sleep(0.01)
+        assert closed == [old_snow]
+        assert (await reloader.reload(force=False))["changed"] is False
+
+        config.write_text(json.dumps({"NOT_A_SETTING": 1}))
+        with pytest.raises(ValueError):
+            await reloader.reload()
+        config.write_text(json.dumps({**snow, "STT_MAX_UPLOAD_MB": 1}))
+        with pytest.raises(ValueError, match="cannot be reloaded"):
+            await reloader.reload()
+        config.write_text(json.dumps({**snow, "USE_AZURE_OPENAI_POOL": True, "AZURE_OPENAI_POOL": [{"name": "x"}]}))
+        with pytest.raises(ValueError, match="AZURE_OPENAI_POOL"):
+            await reloader.reload()
+        assert runtime.generation.servicedesk_connectors["servicenow"].client_secret == "rotated"
+        await runtime.aclose()
+
+    asyncio.run(_run())
+
+
+def test_connectors_are_built_on_first_use_or_by_warm_up():
+    from app.settings import Settings
+
+    runtime = _agent_runtime(
+        Settings(USE_AZURE_SEARCH=True, AZURE_SEARCH_ENDPOINT="https://search.example", AZURE_SEARCH_QUERY_KEY="key")
+    )
+    connectors = runtime.rag_connectors
+    assert "azure-ai-search" in connectors and connectors.peek("azure-ai-search") is None
+    search = connectors["azure-ai-search"]
+    assert connectors.peek("azure-ai-search") is search and connectors.get("azure-ai-search") is search
+    assert runtime.llm_connectors.peek("mock-llm") is None
+
+    report = asyncio.run(runtime.warm_up())
+    assert report["connectors"] == len(runtime.generation.slots())
+    assert all(slot.instance is not None for slot in runtime.generation.slots())
+    assert runtime.rag_connectors["azure-ai-search"] is search
+
+
+def test_readiness_blocks_on_required_checks_only():
+    from app.runtime.readiness import CheckFailed, Readiness
+
+    readiness = Readiness()
+    readiness.add("models")
+    readiness.add("validation", required=False)
+    assert not readiness.ready and readiness.snapshot()["checks"]["models"]["status"] == "pending"
+
+    async def _failing():
+        raise CheckFailed("servicedesk/servicenow: 401")
+
+    async def _slow():
+        await asyncio.sleep(1)
+
+    async def _run():
+        await readiness.run("validation", _failing)
+        await readiness.run("models", _slow, timeout=0.01)
+        assert not readiness.ready and readiness.checks["models"].detail == "timed out after 0.01s"
+
+        async def _loaded():
+            return "1 models resident"
+
+        await readiness.run("models", _loaded)
+
+    asyncio.run(_run())
+    snapshot = readiness.snapshot()
+    assert readiness.ready and snapshot["ready"]
+    assert snapshot["checks"]["validation"] == {
+        "status": "failed",
+        "required": False,
+        "detail": "servicedesk/servicenow: 401",
+        "elapsed_ms": snapshot["checks"]["validation"]["elapsed_ms"],
+    }
+    assert snapshot["checks"]["models"]["detail"] == "1 models resident"
+
+
+def test_connector_health_validates_concurrently_and_scores_failures():
+    from app.settings import Settings
+
+    runtime = _agent_runtime(Settings(CONNECTOR_VALIDATION_TIMEOUT_SECONDS=0.05, CONNECTOR_UNHEALTHY_AFTER=2))
+    health = runtime.connector_health
+    assert runtime.validation_view().status == "pending"
+    assert {item.status for item in runtime.validation_view().results} == {"pending"}
+
+    async def _hang():
+        await asyncio.sleep(1)
+
+    async def _run():
+        runtime.rag_connectors["mock-search"].validate = _hang
+        runtime.llm_connectors["mock-llm"].validate = _hang
+        started = asyncio.get_running_loop().time()
+        first, shared = await asyncio.gather(runtime.validate_connectors(), runtime.validate_connectors())
+        assert asyncio.get_running_loop().time() - started < 0.5  # both hung checks ran side by side
+        assert first is shared and first.status == "attention" and first.checked_at
+        rag = next(item for item in first.results if item.provider == "mock-search")
+        assert rag.status == "timeout" and rag.score == 0.5
+        assert health.healthy("rag", "mock-search")
+
+        await runtime.validate_connectors()
+        assert not health.healthy("rag", "mock-search") and health.score("rag", "mock-search") == 0.25
+        assert [item.status for item in runtime.validation_view().results if item.provider == "mock-search"] == [
+            "timeout"
+        ]
+
+        del runtime.llm_connectors["mock-llm"].validate
+        await runtime.validate_connectors()
+        assert health.score("llm", "mock-llm") == 1.0 and health.healthy("llm", "mock-llm")
+
+    asyncio.run(_run())
+
+
+def test_connector_health_reports_unbuildable_connectors_and_keeps_running():
+    from app.settings import Settings
+
+    runtime = _agent_runtime(Settings())
+    health = runtime.connector_health
+
+    def _missing_sdk():
+        raise ImportError("No module named 'openai'")
+
+    runtime.generation.llm_connectors.add("broken-llm", _missing_sdk)
+    generations = iter([runtime.generation])
+
+    def _current():
+        # The second tick fails outright; the loop must log it and carry on.
+        return next(generations)
+
+    async def _run():
+        loop = asyncio.create_task(health.run(_current, interval_seconds=0.01))
+        await asyncio.sleep(0.1)
+        assert not loop.done()
+        loop.cancel()
+
+    asyncio.run(_run())
+    broken = health.entries[("llm", "broken-llm")]
+    assert broken.status == "error" and "No module named 'openai'" in broken.reason
+    assert health.entries[("llm", "mock-llm")].status == "ok"
+
+
+def test_shared_state_gives_workers_one_view_of_sessions_and_metrics(tmp_path):
+    from app.common.metrics import MetricsRegistry
+    from app.runtime.shared_state import SharedMemoryStore, SharedState, merged_stats
+
+    path = str(tmp_path / "gateway-state.db")
+    first, second = SharedState(path, worker_id="w1"), SharedState(path, worker_id="w2")
+    first_store, second_store = SharedMemoryStore(first), SharedMemoryStore(second)
+
+    async def _sessions():
+        await first_store.append_turn("s1", ChatMessage(role="user", content="hello"))
+        await second_store.append_turn("s1", ChatMessage(role="assistant", content="hi"))
+        return await first_store.history("s1"), await second_store.session_count()
+
+    history, count = asyncio.run(_sessions())
+    assert [turn.content for turn in history] == ["hello", "hi"]
+    assert count == 1 and second_store.cached_session_count() == 1
+
+    now = [1000.0]
+    local, peer = StatsTracker(clock=lambda: now[0]), StatsTracker(clock=lambda: now[0])
+    for latency in (10.0, 20.0):
+        local.record(latency, endpoint="/v1/chat")
+    peer.record(400.0, RuntimeError("boom"), endpoint="/v1/chat")
+    peer_registry, local_registry = MetricsRegistry(), MetricsRegistry()
+    peer_registry.counter("requests", "Requests", ("route",)).inc("/v1/chat", amount=3)
+    local_registry.counter("requests", "Requests", ("route",)).inc("/v1/chat")
+    second.publish({"metrics": peer_registry.export_state(), "stats": peer.to_state()})
+
+    peers = first.peers()
+    assert merged_stats(local, []) is local and second.peers() == []
+    merged = merged_stats(local, peers)
+    assert (merged.total_requests, merged.total_failures, merged.last_error) == (3, 1, "boom")
+    assert merged.endpoints["/v1/chat"].window("1m").count == 3
+    assert merged.percentiles("1m")[0] == pytest.approx(20, rel=0.02)
+    assert local.total_requests == 2
+    assert 'requests_total{route="/v1/chat"} 4' in local_registry.render(peer["metrics"] for peer in peers)
+
+    # A worker that shuts down, or stops publishing, drops out of the merged totals.
+    second.retire()
+    assert first.peers() == []
+    second.publish({"stats": peer.to_state()})
+    third = SharedState(path, worker_id="w3", stale_after_seconds=0.05)
+    time.sleep(0.1)
+    assert third.peers() == [] and [row["worker"] for row in third.workers()] == []
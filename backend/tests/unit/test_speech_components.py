@@ -0,0 +1,541 @@
+import asyncio
+import io
+import socket
+import threading
+import time
+
+import httpx
+import numpy as np
+import pytest
+import soundfile as sf
+from app.common.circuit_breaker import CircuitBreaker
+from app.common.request_limits import BodySizeLimitMiddleware
+from app.services.model_cache import ModelCache
+from app.settings import Settings
+from app.speech.audio_ingest import decode_to_pcm
+from app.speech.providers.base import AudioStream, SpeechProviderError, TranscriptionOptions, TranscriptionResult
+from app.speech.providers.elevenlabs_stt import ElevenLabsProvider
+from app.speech.providers.router import SpeechRouter
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+
+def _slow_loader(calls):
+    def _load(model_name, compute_type):
+        calls.append((model_name, compute_type))
+        time.sleep(0.05)
+        return object()
+
+    return _load
+
+
+def test_model_cache_loads_each_key_once_under_concurrency():
+    calls = []
+    cache = ModelCache(_slow_loader(calls), budget_mb=10_000)
+    results = []
+
+    def _worker():
+        results.append(cache.get("small", "int8"))
+
+    threads = [threading.Thread(target=_worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [("small", "int8")]
+    assert len({id(model) for model in results}) == 1
+    stats = cache.stats()
+    assert stats["loads"] == 1
+    assert stats["hits"] == 7
+
+
+def test_model_cache_evicts_least_recently_used_within_budget():
+    cache = ModelCache(lambda name, compute: object(), budget_mb=250, estimator=lambda name, compute: 100)
+    cache.get("tiny", "int8")
+    cache.get("base", "int8")
+    cache.get("tiny", "int8")  # tiny becomes most recently used
+    cache.get("small", "int8")
+
+    assert ("tiny", "int8") in cache
+    assert ("small", "int8") in cache
+    assert ("base", "int8") not in cache
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["resident_mb"] <= 250
+
+    assert cache.unload("tiny") == [("tiny", "int8")]
+    assert ("tiny", "int8") not in cache
+
+
+def test_model_cache_keeps_leased_models_resident():
+    cache = ModelCache(lambda name, compute: object(), budget_mb=150, estimator=lambda name, compute: 100)
+    with cache.lease("tiny", "int8"):
+        cache.get("base", "int8")  # over budget, but tiny is pinned and must stay
+        assert ("tiny", "int8") in cache
+
+        assert cache.unload("tiny") == [("tiny", "int8")]
+        assert ("tiny", "int8") in cache  # deferred until the lease is released
+    assert ("tiny", "int8") not in cache
+
+    with cache.lease("tiny", "int8"):
+        cache.clear()
+        assert ("tiny", "int8") in cache and ("base", "int8") not in cache
+    assert cache.stats()["resident"] == []
+    # Load locks go with their entries; a failed load leaves none behind either.
+    assert cache._load_locks == {}
+
+    def _failing(name, compute):
+        raise RuntimeError("no such model")
+
+    failing = ModelCache(_failing, budget_mb=150)
+    with pytest.raises(RuntimeError):
+        failing.get("nope", "int8")
+    assert failing._load_locks == {}
+
+
+def test_local_whisper_and_whisper_service_share_model_cache():
+    from app.services.model_cache import get_model_cache
+    from app.settings import get_settings
+    from app.speech import LocalWhisperProvider
+
+    assert LocalWhisperProvider(get_settings()).model_cache is get_model_cache()
+
+
+def test_local_whisper_releases_model_when_cancelled_during_acquire():
+    from app.speech import LocalWhisperProvider
+
+    loading, unblock = threading.Event(), threading.Event()
+
+    def _blocking_loader(model_name, compute_type):
+        loading.set()
+        unblock.wait(5)
+        return _EchoWhisperModel()
+
+    cache = ModelCache(_blocking_loader, budget_mb=10_000)
+    provider = LocalWhisperProvider(Settings(), model_cache=cache)
+    options = TranscriptionOptions(language="fi", model="tiny")
+
+    async def _run():
+        task = asyncio.create_task(provider.transcribe(_wav_stream(0.5), options))
+        await asyncio.to_thread(loading.wait, 5)
+        task.cancel()  # as the hedge does with its losing call
+        unblock.set()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # The worker thread finishes after the cancellation; wait for its release.
+        for _ in range(100):
+            if cache.stats()["resident"] and cache.stats()["resident"][0]["in_use"] == 0:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(_run())
+    assert cache.stats()["resident"][0]["in_use"] == 0
+    assert cache.unload("tiny") and ("tiny", "int8") not in cache
+
+
+class _FakeProvider:
+    def __init__(self, name, *, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def transcribe(self, audio_bytes, options):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return TranscriptionResult(text=self.name, segments=[], provider=self.name, timing_ms={})
+
+
+def _router(**overrides):
+    settings = Settings(ELEVENLABS_API_KEY="test-key", STT_BREAKER_MIN_CALLS=2, **overrides)
+    return SpeechRouter(settings)
+
+
+def _transcribe(router, provider="auto"):
+    return asyncio.run(
+        router.transcribe(
+            b"audio", provider=provider, language="fi", beam_size=1, vad=False, model=None, correlation_id=None
+        )
+    )
+
+
+def test_circuit_breaker_opens_probes_and_closes():
+    now = [0.0]
+    breaker = CircuitBreaker("cloud", min_calls=4, error_rate_threshold=0.5, open_seconds=10, clock=lambda: now[0])
+    for _ in range(2):
+        breaker.record_success(5)
+        breaker.record_failure(5)
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    now[0] = 11
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one probe in flight
+    breaker.record_success(5)
+    assert breaker.state == "closed"
+
+
+def test_router_falls_back_on_server_errors_and_opens_breaker():
+    router = _router()
+    cloud = _FakeProvider("elevenlabs", error=SpeechProviderError("http_503", "unavailable", retryable=True))
+    router.providers = {"elevenlabs": cloud, "local_whisper": _FakeProvider("local_whisper")}
+
+    for _ in range(2):
+        result = _transcribe(router)
+        assert result.provider == "local_whisper"
+        assert result.mode == "fallback"
+    assert router.breakers["elevenlabs"].state == "open"
+
+    result = _transcribe(router)
+    assert cloud.calls == 2  # breaker open: cloud is skipped entirely
+    assert result.provider == "local_whisper"
+    assert router.status().elevenlabs_ok is False
+
+
+def test_router_hedges_slow_cloud_with_local_whisper():
+    router = _router(STT_HEDGE_ENABLED=True, STT_HEDGE_DEFAULT_DELAY_MS=20)
+    cloud = _FakeProvider("elevenlabs", delay=2.0)
+    router.providers = {"elevenlabs": cloud, "local_whisper": _FakeProvider("local_whisper", delay=0.01)}
+
+    started = time.perf_counter()
+    result = _transcribe(router)
+
+    assert result.provider == "local_whisper"
+    assert result.mode == "hedged"
+    assert cloud.cancelled
+    assert time.perf_counter() - started < 1.0
+    assert router.breakers["elevenlabs"].state == "closed"
+
+
+def test_router_hedge_blames_cloud_only_and_respects_local_breaker():
+    router = _router(STT_HEDGE_ENABLED=True, STT_HEDGE_DEFAULT_DELAY_MS=20)
+    cloud = _FakeProvider("elevenlabs", delay=0.1, error=SpeechProviderError("http_503", "cloud", retryable=True))
+    local = _FakeProvider("local_whisper", error=SpeechProviderError("inference_failed", "local", retryable=True))
+    router.providers = {"elevenlabs": cloud, "local_whisper": local}
+
+    try:
+        _transcribe(router)
+    except SpeechProviderError as exc:
+        assert exc.code == "http_503"  # local failed first, but the cloud error is what surfaces
+    else:  # pragma: no cover - assertion helper
+        raise AssertionError("expected the cloud error")
+    assert local.calls == 1  # the hedge already ran local Whisper; no second run as the fallback
+
+    router.breakers["local_whisper"].trip("down")
+    for requested in ("auto", "local_whisper"):
+        try:
+            _transcribe(router, provider=requested)
+        except SpeechProviderError:
+            pass
+    assert local.calls == 1  # neither the hedge, the fallback nor a direct request reached it
+    router.breakers["elevenlabs"].trip("down")
+    try:
+        _transcribe(router)
+    except SpeechProviderError as exc:
+        assert exc.code == "provider_unavailable" and exc.retryable
+    else:  # pragma: no cover - assertion helper
+        raise AssertionError("expected provider_unavailable")
+
+
+class _TimedLocalWhisper(_FakeProvider):
+    def __init__(self, compute_ms):
+        super().__init__("local_whisper")
+        self.compute_ms = compute_ms
+        self.seen = []
+
+    async def transcribe(self, audio_bytes, options):
+        self.seen.append(options)
+        result = await super().transcribe(audio_bytes, options)
+        result.timing_ms = {"transcribe": self.compute_ms, "audio_seconds": 2.0}
+        return result
+
+
+def test_router_downgrades_local_whisper_under_load_within_tenant_limits():
+    router = _router(
+        STT_ADAPTIVE_ENABLED=True,
+        STT_ADAPTIVE_QUEUE_DEPTH=2,
+        STT_ADAPTIVE_TARGET_RTF=0.5,
+        STT_ADAPTIVE_TENANT_LIMITS="acme=small:2:",
+        STT_WHISPER_COMPUTE_TYPE="float32",
+    )
+    local = _TimedLocalWhisper(compute_ms=200)
+    router.providers = {"local_whisper": local}
+    policy = router.adaptive
+    now = [0.0]
+    policy._clock = lambda: now[0]
+
+    def _call(tenant=None):
+        result = asyncio.run(
+            router.transcribe(
+                b"audio",
+                provider="local_whisper",
+                language="fi",
+                beam_size=5,
+                vad=False,
+                model="medium",
+                correlation_id=None,
+                tenant=tenant,
+            )
+        )
+        used = result.options
+        return (used.model, used.beam_size, used.compute_type), result.adapted
+
+    assert _call() == (("medium", 5, "float32"), [])  # idle: the request runs as asked
+
+    policy.in_flight = 4  # two levels: beam, then compute type
+    assert _call() == (("medium", 1, "int8"), ["beam_size", "compute_type"])
+    policy.in_flight = 10  # five levels: three model sizes left over
+    assert _call() == (("tiny", 1, "int8"), ["beam_size", "compute_type", "model"])
+    assert _call("acme") == (("small", 2, "int8"), ["beam_size", "compute_type", "model"])
+    assert policy.in_flight == 10  # each call released its slot
+
+    # Slow compute raises the level on its own: RTF 1.5 is three times the target.
+    policy.in_flight = 0
+    local.compute_ms = 3000
+    now[0] += 60  # earlier fast samples are stale, so the next one sets the average
+    _call()
+    assert policy.level() == 2
+    assert _call() == (("medium", 1, "int8"), ["beam_size", "compute_type"])
+    now[0] += 60  # the spike passed
+    assert _call()[1] == []
+    assert router.status().adaptive["in_flight"] == 0
+
+
+def test_elevenlabs_streams_multipart_over_pooled_client():
+    seen = []
+
+    async def _handler(request):
+        body = await request.aread()
+        seen.append((request.headers, body))
+        return httpx.Response(200, json={"text": "moi"})
+
+    provider = ElevenLabsProvider(Settings(ELEVENLABS_API_KEY="key"), transport=httpx.MockTransport(_handler))
+    audio = AudioStream.from_bytes(b"RIFF" + b"\x01" * 600_000, filename="clip.wav")
+
+    async def _run():
+        first = await provider.transcribe(audio, TranscriptionOptions(language="fi"))
+        client = provider._client()
+        await provider.transcribe(audio, TranscriptionOptions())
+        assert provider._client() is client
+        await provider.aclose()
+        return first
+
+    result = asyncio.run(_run())
+
+    assert result.text == "moi"
+    headers, body = seen[0]
+    assert headers["content-type"].startswith("multipart/form-data; boundary=")
+    assert int(headers["content-length"]) == len(body)
+    assert "transfer-encoding" not in headers
+    assert b'name="language_code"\r\n\r\nfi\r\n' in body
+    assert b'filename="clip.wav"' in body
+    assert b"RIFF" + b"\x01" * 600_000 in body
+
+
+def _wav_stream(seconds, rate=44_100, channels=2):
+    frames = np.sin(np.linspace(0, 440 * 2 * np.pi * seconds, int(seconds * rate), dtype=np.float32)) * 0.2
+    buffer = io.BytesIO()
+    sf.write(buffer, np.repeat(frames[:, None], channels, axis=1), rate, format="WAV", subtype="PCM_16")
+    return AudioStream.from_bytes(buffer.getvalue())
+
+
+def test_decode_to_pcm_downmixes_and_resamples_incrementally():
+    decoded = decode_to_pcm(_wav_stream(3.0), max_seconds=60)
+
+    assert decoded.decoder == "soundfile"
+    assert decoded.source_rate == 44_100
+    assert decoded.samples.dtype == np.float32
+    assert decoded.samples.ndim == 1
+    assert abs(decoded.seconds - 3.0) < 0.01
+
+
+def test_decode_to_pcm_rejects_audio_over_limit():
+    try:
+        decode_to_pcm(_wav_stream(3.0, rate=16_000, channels=1), max_seconds=1)
+    except SpeechProviderError as exc:
+        assert exc.code == "audio_too_long"
+    else:  # pragma: no cover - assertion helper
+        raise AssertionError("expected audio_too_long")
+
+
+def test_body_size_limit_rejects_large_uploads_with_413():
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=1024, path_prefixes=("/upload",))
+
+    @app.post("/upload")
+    async def _upload(file: UploadFile = File(...)):
+        return {"size": file.size}
+
+    client = TestClient(app)
+    assert client.post("/upload", files={"file": ("a.wav", b"x" * 100, "audio/wav")}).json() == {"size": 100}
+
+    response = client.post("/upload", files={"file": ("a.wav", b"x" * 4096, "audio/wav")})
+    assert response.status_code == 413
+
+    head = b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.wav"\r\n\r\n'
+    body = head + b"x" * 2000 + b"\r\n--b--\r\n"
+
+    def _chunked():  # no Content-Length: the limit must be enforced while streaming
+        yield body[:800]
+        yield body[800:]
+
+    response = client.post("/upload", content=_chunked(), headers={"content-type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+
+
+class _EchoWhisperModel:
+    """Records the PCM it was handed; fails on demand."""
+
+    def __init__(self):
+        self.samples = []
+        self.fail = False
+
+    def transcribe(self, samples, language=None, beam_size=1, vad_filter=False, chunk_length=None):
+        if self.fail:
+            raise RuntimeError("model crashed")
+        self.samples.append(np.array(samples))
+        text = f" {len(samples)} samples "
+        segment = type("Segment", (), {"text": text, "start": 0.0, "end": 1.0, "avg_logprob": -0.1})
+        info = type("Info", (), {"language": language or "en", "duration": len(samples) / 16000})
+        return iter([segment]), info
+
+
+def test_inference_sidecar_serves_local_whisper_over_unix_socket(tmp_path):
+    from app.speech import LocalWhisperProvider
+    from app.speech.inference_sidecar import SidecarServer
+
+    model = _EchoWhisperModel()
+    socket_path = str(tmp_path / "whisper.sock")
+    server = SidecarServer(socket_path, ModelCache(lambda *_: model, budget_mb=10_000), max_concurrency=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    provider = LocalWhisperProvider(Settings(STT_SIDECAR_SOCKET=socket_path), model_cache=ModelCache(None, budget_mb=0))
+    expected = decode_to_pcm(_wav_stream(1.5), max_seconds=60).samples
+    options = TranscriptionOptions(language="fi", beam_size=2, vad_filter=False, model="tiny")
+
+    async def _run():
+        first = await provider.transcribe(_wav_stream(1.5), options)
+        second = await provider.transcribe(_wav_stream(1.5), options)
+        model.fail = True
+        try:
+            await provider.transcribe(_wav_stream(1.5), options)
+        except SpeechProviderError as exc:
+            failure = exc
+        status = await provider.sidecar.status()
+        idle = len(provider.sidecar._idle)
+        await provider.aclose()
+        return first, second, failure, status, idle
+
+    try:
+        first, second, failure, status, idle = asyncio.run(_run())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert first.text == f"{len(expected)} samples" and second.text == first.text
+    assert np.array_equal(model.samples[0], expected)  # PCM arrives bit for bit
+    assert {"sidecar_queue", "sidecar_inference"} <= set(first.timing_ms)
+    assert failure.code == "inference_failed" and failure.retryable
+    assert status["served"] == 3 and status["resident"][0]["model"] == "tiny"
+    assert idle == 1  # sequential requests, including the failed one, reused one connection
+
+    async def _unreachable():
+        await provider.transcribe(_wav_stream(0.5), options)
+
+    try:
+        asyncio.run(_unreachable())
+    except SpeechProviderError as exc:
+        assert exc.code == "sidecar_unavailable" and exc.retryable
+    else:  # pragma: no cover - assertion helper
+        raise AssertionError("expected sidecar_unavailable")
+
+
+def test_inference_sidecar_bounds_payloads_and_retries_stale_connections(tmp_path):
+    from app.speech.inference_sidecar import HEADER, MAGIC, TRANSCRIBE, SidecarClient, SidecarServer
+
+    model = _EchoWhisperModel()
+    socket_path = str(tmp_path / "whisper.sock")
+
+    class _TrackedServer(SidecarServer):
+        def process_request(self, request, client_address):
+            self.connections.append(request)
+            super().process_request(request, client_address)
+
+    def _start():
+        server = _TrackedServer(socket_path, ModelCache(lambda *_: model, budget_mb=10_000), max_payload_bytes=64_000)
+        server.connections = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def _stop(server):
+        server.shutdown()
+        server.server_close()
+        for connection in server.connections:  # as if the process exited
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # the handler already closed it
+
+    servers = [_start()]
+    # A header announcing 4 GiB is refused before anything is allocated.
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as raw:
+        raw.connect(socket_path)
+        raw.sendall(HEADER.pack(MAGIC, TRANSCRIBE, 0, 0xFFFFFFFC))
+        reply = raw.recv(4096)
+    assert b"protocol_error" in reply and b"exceeds" in reply
+
+    client = SidecarClient(socket_path, timeout_seconds=5)
+    samples = np.zeros(8000, dtype=np.float32)
+    options = {"model": "tiny", "compute_type": "int8", "language": None, "beam_size": 1, "vad_filter": False}
+
+    async def _run():
+        first = await client.transcribe(samples, **options)
+        _stop(servers.pop())  # the sidecar restarts; the pooled connection is now stale
+        servers.append(_start())
+        second = await client.transcribe(samples, **options)
+        await client.aclose()
+        return first, second
+
+    try:
+        first, second = asyncio.run(_run())
+    finally:
+        _stop(servers.pop())
+    assert first["segments"] == second["segments"]
+    assert len(model.samples) == 2
+
+
+def test_whisper_playground_uses_sidecar_instead_of_local_models(tmp_path, monkeypatch):
+    from app.services import whisper_service
+    from app.speech.inference_sidecar import SidecarClient, SidecarServer
+
+    model = _EchoWhisperModel()
+    socket_path = str(tmp_path / "whisper.sock")
+    server = SidecarServer(socket_path, ModelCache(lambda *_: model, budget_mb=10_000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = SidecarClient(socket_path, timeout_seconds=5)
+    monkeypatch.setattr(whisper_service, "_sidecar_client", lambda: client)
+    # Any attempt to load a model in this process fails the test.
+    monkeypatch.setattr(whisper_service, "_lease_model", None)
+
+    async def _run():
+        result = await whisper_service.transcribe_audio_async(_wav_stream(1.0).read_all(), {"model": "tiny"})
+        await client.aclose()
+        return result
+
+    try:
+        result = asyncio.run(_run())
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert result["text"] == "16000 samples"
+    assert result["settings_used"]["model"] == "tiny" and result["timing"]["transcribe_ms"] > 0
+    assert len(model.samples) == 1